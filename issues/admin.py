@@ -1,12 +1,81 @@
 from django.contrib import admin
 from django.contrib.auth.models import Group
-from .models import State, Issue, Category
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from .archive import restore_issues
+from .models import State, Issue, Category, ArchivedIssue, IssueStatistics
+from .search import is_search_available, build_match_query, get_match_subquery
+from .statistics import get_group
+
+
+class RollupCountPaginator(Paginator):
+    # number of issues taken from the rollup statistics (one row) instead of COUNT(*) when the group is known
+    def __init__(self, *args, group=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.group = group
+
+    @cached_property
+    def count(self):
+        if self.group is None:
+            return super().count
+        return IssueStatistics.objects.filter(pk=self.group).values_list('issues_count', flat=True).first() or 0
 
 
 class IssueAdmin(admin.ModelAdmin):
-    list_display = ('name', 'creator', 'responsible_person', 'description', 'state', 'category', 'created_at',
+    DESCRIPTION_LENGTH = 80
+    # changelist filter parameter -> dimension of the rollup statistics
+    ROLLUP_FILTERS = {
+        'state__id__exact': IssueStatistics.STATE,
+        'category__id__exact': IssueStatistics.CATEGORY,
+        'responsible_person__id__exact': IssueStatistics.RESPONSIBLE_PERSON,
+    }
+
+    list_display = ('name', 'creator', 'responsible_person', 'short_description', 'state', 'category', 'created_at',
                     'finished_at',)
+    list_select_related = ('creator', 'responsible_person', 'state', 'category')
+    # filters and ordering backed by the indexes of Issue (id makes the ordering total => no extra '-pk')
+    list_filter = ('state', 'category', 'responsible_person')
+    date_hierarchy = 'created_at'
+    ordering = ('-created_at', 'name', 'state', 'id')
+    paginator = RollupCountPaginator
+    show_full_result_count = False
     exclude = ('duration',)
+    search_fields = ('name', 'description')
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if request.resolver_match and request.resolver_match.url_name == 'issues_issue_changelist':
+            # only the beginning of descriptions is shown in the list; extra() instead of annotate(Substr()),
+            # annotations would make COUNT and MIN/MAX (date_hierarchy) run over a subquery of all rows
+            table = Issue._meta.db_table
+            queryset = queryset.defer('description').extra(
+                select={'description_start': f'SUBSTR("{table}"."description", 1, %s)'},
+                select_params=(self.DESCRIPTION_LENGTH + 1, ))
+        return queryset
+
+    @admin.display(description='popis')
+    def short_description(self, obj):
+        description = getattr(obj, 'description_start', None)
+        if description is None:
+            description = obj.description[:self.DESCRIPTION_LENGTH + 1]
+        if len(description) > self.DESCRIPTION_LENGTH:
+            return description[:self.DESCRIPTION_LENGTH] + '…'
+        return description
+
+    def get_rollup_group(self, request):
+        # rollup statistics group of the changelist (no filter or a single filter by state/category/person)
+        params = {_k: _v for _k, _v in request.GET.items() if _k not in ('o', 'p')}
+        if not params:
+            return IssueStatistics.TOTAL
+        if len(params) == 1:
+            param, value = params.popitem()
+            if param in self.ROLLUP_FILTERS and value.isdigit():
+                return get_group(self.ROLLUP_FILTERS[param], int(value))
+        return None
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return self.paginator(queryset, per_page, orphans, allow_empty_first_page,
+                              group=self.get_rollup_group(request))
 
     # fill creator and responsible_person fields as a current user
     def get_changeform_initial_data(self, request):
@@ -15,10 +84,42 @@ class IssueAdmin(admin.ModelAdmin):
         get_data['responsible_person'] = request.user.pk
         return get_data
 
+    # search words (prefixes) of name and description in the full-text index instead of LIKE scans
+    def get_search_results(self, request, queryset, search_term):
+        if not is_search_available() or not build_match_query(search_term):
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=get_match_subquery(Issue._meta.db_table, search_term)), False
+
+
+class ArchivedIssueAdmin(admin.ModelAdmin):
+    list_display = ('name', 'creator', 'responsible_person', 'state', 'category', 'created_at', 'finished_at',
+                    'archived_at',)
+    list_select_related = ('creator', 'responsible_person', 'state', 'category')
+    search_fields = ('name', 'description')
+    actions = ('restore_selected',)
+
+    # archived issues are read only, they can be only restored (moved back to issues)
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_search_results(self, request, queryset, search_term):
+        if not is_search_available() or not build_match_query(search_term):
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=get_match_subquery(ArchivedIssue._meta.db_table, search_term)), False
+
+    @admin.action(description='Obnovit vybrané issues', permissions=('delete',))
+    def restore_selected(self, request, queryset):
+        restored = restore_issues(list(queryset.values_list('id', flat=True)))
+        self.message_user(request, f'Obnoveno issues: {restored}')
+
 
 admin.site.register(State)
 admin.site.register(Category)
 admin.site.register(Issue, IssueAdmin)
+admin.site.register(ArchivedIssue, ArchivedIssueAdmin)
 admin.site.unregister(Group)
 admin.site.site_title = 'Simple Tracker'
 admin.site.index_title = 'Tracker Administration'
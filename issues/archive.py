@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now as timezone_now
+
+from .issue_cache import issue_cache
+from .models import Issue, ArchivedIssue, ChangeCounter, IssueTombstone
+from .statistics import (update_statistics, snapshot_from_instance, invalidate_duration_statistics, make_snapshot,
+                         SNAPSHOT_FIELDS)
+
+
+# columns moved between Issue and ArchivedIssue
+ARCHIVE_FIELDS = ('id', 'name', 'creator_id', 'responsible_person_id', 'description', 'state_id', 'category_id',
+                  'created_at', 'finished_at', 'duration', 'updated_at', 'change_seq')
+
+
+def get_archive_days():
+    return getattr(settings, 'ISSUES_ARCHIVE_AFTER_DAYS', 365)
+
+
+def get_archive_batch_size():
+    return getattr(settings, 'ISSUES_ARCHIVE_BATCH_SIZE', 1000)
+
+
+def is_archive_included(params):
+    # ?include_archived=1 of the list and search API
+    return params.get('include_archived', '').lower() in ('1', 'true')
+
+
+def archive_batch(finished_before, batch_size):
+    """ Move at most <batch_size> issues finished before <finished_before> to the archive, return their count.
+
+    Archived issues leave the rollup statistics and the change feed reports them as deleted (both describe
+    the hot table only), restore_issues brings them back to both.
+    """
+    with transaction.atomic():
+        rows = list(Issue.objects.filter(finished_at__lt=finished_before).order_by('id').select_for_update()
+                    .values(*ARCHIVE_FIELDS)[:batch_size])
+        if not rows:
+            return 0
+        ids = [_r['id'] for _r in rows]
+        ArchivedIssue.objects.bulk_create([ArchivedIssue(**_r) for _r in rows])
+        # one DELETE instead of per-instance post_delete signals, whose work is done below for the whole batch
+        Issue.objects.filter(pk__in=ids)._raw_delete(Issue.objects.db)
+        change_seq = ChangeCounter.next_value()
+        IssueTombstone.objects.bulk_create([IssueTombstone(issue_id=_id, change_seq=change_seq) for _id in ids])
+        update_statistics([(make_snapshot(*[_r[_f] for _f in SNAPSHOT_FIELDS]), None) for _r in rows])
+        issue_cache.invalidate(ids)
+    invalidate_duration_statistics()
+    return len(rows)
+
+
+def archive_issues(days=None, batch_size=None):
+    # every batch is a transaction of its own => the tables are never locked for long
+    days = get_archive_days() if days is None else days
+    batch_size = get_archive_batch_size() if batch_size is None else batch_size
+    finished_before = timezone_now() - timedelta(days=days)
+    archived = 0
+    while True:
+        count = archive_batch(finished_before, batch_size)
+        archived += count
+        if count < batch_size:
+            return archived
+
+
+def restore_issues(ids):
+    # move archived issues back to the hot table (same ids), return their count
+    with transaction.atomic():
+        rows = list(ArchivedIssue.objects.filter(pk__in=ids).select_for_update().values(*ARCHIVE_FIELDS))
+        if not rows:
+            return 0
+        last_change_seq = ChangeCounter.next_value(count=len(rows))
+        issues = [Issue(**dict(_r, change_seq=_seq))
+                  for _seq, _r in enumerate(rows, start=last_change_seq - len(rows) + 1)]
+        Issue.objects.bulk_create(issues)
+        ArchivedIssue.objects.filter(pk__in=[_i.id for _i in issues]).delete()
+        # the change feed would report the restored issues as deleted after their new change_seq
+        IssueTombstone.objects.filter(issue_id__in=[_i.id for _i in issues]).delete()
+        update_statistics([(None, snapshot_from_instance(_i)) for _i in issues])
+        # the same pks as before archiving
+        issue_cache.invalidate([_i.id for _i in issues])
+    invalidate_duration_statistics()
+    return len(issues)
@@ -0,0 +1,142 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .conditional import (issue_etag, issue_last_modified, reference_etag, reference_last_modified,
+                          get_reference_stamp)
+from .exceptions import IssueException
+from .filters import filter_issues
+from .issue_cache import issue_cache
+from .models import Issue, State, Category
+from .pagination import IssueKeysetPagination
+from .serializers import (IssueReadSerializer, UserReadSerializer, CategoryReadSerializer, StateReadSerializer,
+                          render_reference_data)
+
+
+# Async counterparts of the read-only API views (same URLs under /api/v1/async/, same responses).
+# Django 3.2 has no async ORM yet => every DB access runs in the thread pool of sync_to_async,
+# the event loop itself is never blocked by a query.
+
+
+def json_response(data, status_code=status.HTTP_200_OK, headers=None):
+    # rendered by DRF's renderer => byte-identical with the responses of the sync views
+    response = HttpResponse(JSONRenderer().render(data), status=status_code, content_type='application/json')
+    for header, value in (headers or {}).items():
+        response[header] = value
+    return response
+
+
+def is_staff(request):
+    # the same rule as DRF's IsAdminUser (the default permission of the API)
+    return bool(request.user and request.user.is_staff)
+
+
+def read_only(view):
+    # staff check, GET only and IssueException handling of an async view returning data or a response
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return json_response({'detail': f'Method "{request.method}" not allowed.'},
+                                 status.HTTP_405_METHOD_NOT_ALLOWED)
+        if not await sync_to_async(is_staff)(request):
+            return json_response({'detail': 'You do not have permission to perform this action.'},
+                                 status.HTTP_403_FORBIDDEN)
+        try:
+            return await view(request, *args, **kwargs)
+        except IssueException as exception:
+            return json_response(exception.detail, exception.status_code)
+    return wrapper
+
+
+def get_validators(request, etag_func, last_modified_func, *args, **kwargs):
+    # quoted ETag and Last-Modified timestamp as django.views.decorators.http.condition computes them
+    etag = etag_func(request, *args, **kwargs)
+    last_modified = last_modified_func(request, *args, **kwargs)
+    if last_modified and not timezone.is_aware(last_modified):
+        last_modified = timezone.make_aware(last_modified, timezone.utc)
+    return (quote_etag(etag) if etag is not None else None,
+            int(last_modified.timestamp()) if last_modified else None)
+
+
+def condition(etag_func, last_modified_func):
+    # async counterpart of django.views.decorators.http.condition (the functions query DB => thread pool)
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            etag, last_modified = await sync_to_async(get_validators)(request, etag_func, last_modified_func,
+                                                                      *args, **kwargs)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if last_modified and not response.has_header('Last-Modified'):
+                response['Last-Modified'] = http_date(last_modified)
+            if etag and not response.has_header('ETag'):
+                response['ETag'] = etag
+            return response
+        return wrapper
+    return decorator
+
+
+def get_issue_data(request, pk):
+    # the entry is usually loaded by the ETag function already
+    entry = getattr(request, 'issue_entry', None) or issue_cache.get(pk)
+    return entry['data'] if entry else None
+
+
+def get_issues_page(request):
+    # DRF's Request only wraps the query parameters here (no authentication, no parsing of the body)
+    drf_request = Request(request)
+    paginator = IssueKeysetPagination()
+    issues = filter_issues(IssueReadSerializer.get_values(Issue.objects.all()), drf_request.query_params)
+    data = IssueReadSerializer(paginator.paginate_queryset(issues, drf_request), many=True).data
+    next_link = paginator.get_next_link()
+    return data, {'Link': f'<{next_link}>; rel="next"'} if next_link else {}
+
+
+def get_reference_data(request, serializer_class):
+    # pre-rendered JSON of the version given by the ETag
+    version = get_reference_stamp(request, serializer_class.serializer_class.Meta.model)[0]
+    return render_reference_data(serializer_class, version)
+
+
+@read_only
+@condition(etag_func=issue_etag, last_modified_func=issue_last_modified)
+async def get_issue(request, pk):
+    data = await sync_to_async(get_issue_data)(request, pk)
+    if data is None:
+        return HttpResponse(status=status.HTTP_404_NOT_FOUND)
+    return json_response(data)
+
+
+@read_only
+async def get_issues(request):
+    data, headers = await sync_to_async(get_issues_page)(request)
+    return json_response(data, headers=headers)
+
+
+@read_only
+@condition(etag_func=reference_etag(User), last_modified_func=reference_last_modified(User))
+async def get_all_users(request):
+    return HttpResponse(await sync_to_async(get_reference_data)(request, UserReadSerializer),
+                        content_type='application/json')
+
+
+@read_only
+@condition(etag_func=reference_etag(State), last_modified_func=reference_last_modified(State))
+async def get_all_states(request):
+    return HttpResponse(await sync_to_async(get_reference_data)(request, StateReadSerializer),
+                        content_type='application/json')
+
+
+@read_only
+@condition(etag_func=reference_etag(Category), last_modified_func=reference_last_modified(Category))
+async def get_all_categories(request):
+    return HttpResponse(await sync_to_async(get_reference_data)(request, CategoryReadSerializer),
+                        content_type='application/json')
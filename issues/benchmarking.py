@@ -0,0 +1,80 @@
+import math
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from .query_budget import record_queries
+
+
+def percentile(values, percent):
+    # nearest-rank percentile of a sorted list
+    if not values:
+        return None
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+def summarize_latencies(latencies, elapsed, errors=0):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'requests_per_second': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+    }
+
+
+def fetch(url, headers, timeout):
+    # (latency in seconds, ok)
+    started = time.perf_counter()
+    try:
+        with urlopen(Request(url, headers=headers), timeout=timeout) as response:
+            response.read()
+            ok = response.status < 400
+    except (HTTPError, OSError):
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def run_load(url, requests, concurrency, headers=None, timeout=30):
+    """ Send <requests> GET requests to <url> from <concurrency> parallel clients, return throughput and latency. """
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        started = time.perf_counter()
+        results = list(executor.map(lambda _: fetch(url, headers or {}, timeout), range(requests)))
+        elapsed = time.perf_counter() - started
+    return summarize_latencies([_l for _l, _ok in results if _ok], elapsed, sum(not _ok for _, _ok in results))
+
+
+def benchmark_request(client, url, requests):
+    """ Send <requests> GET requests to <url> by Django's test <client> in process, one by one.
+
+    Returns throughput, latency percentiles, queries per request and peak memory allocated by one request.
+    """
+    latencies, errors, queries = [], 0, 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        with record_queries() as recorder:
+            request_started = time.perf_counter()
+            response = client.get(url)
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+            latencies.append(time.perf_counter() - request_started)
+        queries += recorder.count
+        errors += response.status_code >= 400
+    elapsed = time.perf_counter() - started
+
+    # tracing slows requests down => peak memory is measured by an extra request
+    tracemalloc.start()
+    try:
+        response = client.get(url)
+        if getattr(response, 'streaming', False):
+            b''.join(response.streaming_content)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    result = summarize_latencies(latencies, elapsed, errors)
+    result.update(queries_per_request=round(queries / requests, 1) if requests else None,
+                  peak_memory_kb=round(peak_memory / 1024, 1))
+    return result
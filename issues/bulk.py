@@ -0,0 +1,152 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import DateTimeField, F, Value
+from django.db.models.functions import Greatest
+from django.utils.timezone import now as timezone_now
+
+from .exceptions import IssueException
+from .filters import filter_issues
+from .issue_cache import issue_cache
+from .models import Issue, State, Category, ChangeCounter
+from .reference_cache import get_reference_cache
+from .serializers import IssueSerializer
+from .statistics import (update_statistics, snapshot_from_instance, invalidate_duration_statistics, make_snapshot,
+                         SNAPSHOT_FIELDS)
+
+
+def get_bulk_max_size():
+    return getattr(settings, 'ISSUES_BULK_MAX_SIZE', 1000)
+
+
+def validate_bulk_payload(payload):
+    if not isinstance(payload, list) or not payload:
+        raise IssueException(400, [('chyba', 'Očekáván neprázdný seznam issues')])
+    if len(payload) > get_bulk_max_size():
+        raise IssueException(400, [('chyba', f'Najednou lze zpracovat nejvýše {get_bulk_max_size()} issues')])
+    return payload
+
+
+def get_row_data(row):
+    # every field given explicitly (missing ones as None) as by POST of a single issue => the same fields are required
+    if not isinstance(row, dict):
+        return row
+    return {_f: row.get(_f) for _f in IssueSerializer.Meta.fields if _f != 'id'}
+
+
+def build_issue(validated_data, users, states, categories):
+    # same rules as IssueSerializer.create, referenced rows are looked up in preloaded dicts instead of DB
+    for field, instances, model in (('creator_id', users, User), ('responsible_person_id', users, User),
+                                    ('state_id', states, State), ('category_id', categories, Category)):
+        if validated_data[field] not in instances:
+            raise IssueException(400, [('chyba', f'{model}: pk {validated_data[field]} nenalezen')])
+    creator = IssueSerializer.validate_creator_is_superuser(users[validated_data.pop('creator_id')])
+    issue = Issue(creator=creator, responsible_person=users[validated_data.pop('responsible_person_id')],
+                  state=states[validated_data.pop('state_id')], category=categories[validated_data.pop('category_id')],
+                  **validated_data)
+    issue.finished_at = IssueSerializer.validate_finished_datetime(issue.finished_at, issue.created_at, issue.state)
+    return issue
+
+
+def bulk_create_issues(payload):
+    """ Validate all issues of <payload> and insert them at once.
+
+    Referenced users, states and categories are taken from the reference cache (one query per model on a miss).
+    Nothing is inserted if any of the issues is invalid, the errors are returned as a list of
+    {'index': <position in payload>, 'errors': {...}}.
+    """
+    serializers = [IssueSerializer(data=get_row_data(_row)) for _row in validate_bulk_payload(payload)]
+    errors = [{'index': _i, 'errors': _s.errors} for _i, _s in enumerate(serializers) if not _s.is_valid()]
+    if errors:
+        return [], errors
+
+    rows = [dict(_s.validated_data) for _s in serializers]
+    users = get_reference_cache(User).get_many({_r[_f] for _r in rows
+                                                for _f in ('creator_id', 'responsible_person_id')})
+    states = get_reference_cache(State).get_many({_r['state_id'] for _r in rows})
+    categories = get_reference_cache(Category).get_many({_r['category_id'] for _r in rows})
+
+    issues = []
+    for index, row in enumerate(rows):
+        try:
+            issues.append(build_issue(row, users, states, categories))
+        except IssueException as exception:
+            errors.append({'index': index, 'errors': dict(exception.detail)})
+    if errors:
+        return [], errors
+
+    with transaction.atomic():
+        # bulk_create skips Issue.save => a block of change sequence numbers is reserved at once
+        last_change_seq = ChangeCounter.next_value(count=len(issues))
+        for change_seq, issue in enumerate(issues, start=last_change_seq - len(issues) + 1):
+            issue.change_seq = change_seq
+        Issue.objects.bulk_create(issues, batch_size=500)
+        # bulk_create does not send post_save signals
+        update_statistics([(None, snapshot_from_instance(_i)) for _i in issues])
+    invalidate_duration_statistics()
+    return issues, []
+
+
+def get_transition_queryset(payload):
+    # issues given by a list of ids or by the filters of the issues list API
+    if payload.get('ids') is not None:
+        ids = validate_bulk_payload(payload['ids'])
+        if not all(type(_id) is int for _id in ids):
+            raise IssueException(400, [('chyba', '<ids>: neplatný seznam ID')])
+        return Issue.objects.filter(pk__in=ids)
+    if isinstance(payload.get('filter'), dict) and payload['filter']:
+        return filter_issues(Issue.objects.all(), {_k: str(_v) for _k, _v in payload['filter'].items()})
+    raise IssueException(400, [('chyba', 'Zadejte <ids> nebo <filter> s alespoň jednou podmínkou')])
+
+
+def bulk_transition_issues(payload):
+    """ Move issues to the state <payload['state_id']> with a few set-based UPDATE statements.
+
+    Same rules as Issue.clean and IssueSerializer.validate_finished_datetime apply: a finishing state fills empty
+    <finished_at> with the current time (never earlier than <created_at>), other states clear it.
+    """
+    if not isinstance(payload, dict):
+        raise IssueException(400, [('chyba', 'Očekáván objekt s <state_id> a <ids> nebo <filter>')])
+    try:
+        state = get_reference_cache(State).get(int(payload.get('state_id')))
+    except (ValueError, TypeError):
+        state = None
+    if state is None:
+        raise IssueException(400, [('chyba', f'{State}: pk {payload.get("state_id")} nenalezen')])
+    issues = get_transition_queryset(payload).exclude(state=state)
+    finished_at = timezone_now().replace(microsecond=0)
+
+    with transaction.atomic():
+        # values before the change are needed for the rollup statistics only
+        max_size = get_bulk_max_size()
+        rows = list(issues.select_for_update().order_by().values_list('id', *SNAPSHOT_FIELDS)[:max_size + 1])
+        if len(rows) > max_size:
+            # the issues share one change sequence number => all of them have to fit one page of the change feed
+            raise IssueException(400, [('chyba', f'Přechodem lze najednou změnit nejvýše {max_size} issues, '
+                                                 f'upřesněte filtr')])
+        changes, ids = [], []
+        for issue_id, *values in rows:
+            state_id, category_id, responsible_person_id, created_at, issue_finished_at = values
+            ids.append(issue_id)
+            if state.mark_issue_as_finished:
+                issue_finished_at = issue_finished_at or max(finished_at, created_at)
+            else:
+                issue_finished_at = None
+            changes.append((make_snapshot(*values), make_snapshot(state.id, category_id, responsible_person_id,
+                                                                  created_at, issue_finished_at)))
+        # exactly the locked rows (not the ones matching the filter since then)
+        issues = Issue.objects.filter(pk__in=ids)
+        # all issues of the transition share one change sequence number
+        versions = {'updated_at': timezone_now(), 'change_seq': ChangeCounter.next_value()}
+        if state.mark_issue_as_finished:
+            finished_at_value = Value(finished_at, output_field=DateTimeField())
+            issues.filter(finished_at__isnull=True).update(state=state, **versions,
+                                                           finished_at=Greatest(finished_at_value, F('created_at')))
+            issues.update(state=state, **versions)
+        else:
+            issues.update(state=state, **versions, finished_at=None)
+        update_statistics(changes)
+        # UPDATE sends no signals
+        issue_cache.invalidate(ids)
+    invalidate_duration_statistics()
+    return len(changes)
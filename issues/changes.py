@@ -0,0 +1,73 @@
+from django.conf import settings
+
+from .exceptions import IssueException
+from .models import Issue, IssueTombstone
+from .serializers import IssueReadSerializer
+
+
+# checkpoint of a client without any local data
+INITIAL_CHECKPOINT = -1
+
+
+def parse_checkpoint(value):
+    if value is None or value == '':
+        return INITIAL_CHECKPOINT
+    try:
+        checkpoint = int(value)
+    except ValueError:
+        checkpoint = None
+    if checkpoint is None or checkpoint < INITIAL_CHECKPOINT:
+        raise IssueException(400, [('chyba', '<since>: neplatný checkpoint')])
+    return checkpoint
+
+
+def parse_limit(value):
+    max_limit = getattr(settings, 'ISSUES_MAX_PAGE_SIZE', 1000)
+    if value is None:
+        return getattr(settings, 'ISSUES_PAGE_SIZE', 100)
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if not 0 < limit <= max_limit:
+        raise IssueException(400, [('chyba', f'<limit> musí být v rozmezí 1 - {max_limit}')])
+    return limit
+
+
+def get_changes(since, limit):
+    """ Issues saved and deleted after the checkpoint <since> in order of their change sequence.
+
+    About <limit> changes are returned, changes with the same sequence number (e.g. of one bulk transition) are
+    never split between two responses, so the returned checkpoint may always be used as <since> of the next call.
+    """
+    fields = IssueReadSerializer.get_fields()
+    issues = list(Issue.objects.filter(change_seq__gt=since).order_by('change_seq', 'id')
+                  .values('change_seq', *fields)[:limit + 1])
+    deleted = list(IssueTombstone.objects.filter(change_seq__gt=since).order_by('change_seq', 'id')
+                   .values_list('change_seq', 'issue_id')[:limit + 1])
+
+    sequences = sorted([_i['change_seq'] for _i in issues] + [_seq for _seq, _ in deleted])
+    has_more = len(sequences) > limit
+    if not sequences:
+        checkpoint = since
+    elif not has_more:
+        checkpoint = sequences[-1]
+    elif sequences[limit] != sequences[0]:
+        # the last sequence may be incomplete => it is left for the next call
+        checkpoint = max(_seq for _seq in sequences[:limit + 1] if _seq < sequences[limit])
+    else:
+        # a single change bigger than <limit> is returned whole
+        checkpoint = sequences[0]
+        issues = list(Issue.objects.filter(change_seq=checkpoint).order_by('id').values('change_seq', *fields))
+        deleted = list(IssueTombstone.objects.filter(change_seq=checkpoint).order_by('id')
+                       .values_list('change_seq', 'issue_id'))
+        has_more = (Issue.objects.filter(change_seq__gt=checkpoint).exists() or
+                    IssueTombstone.objects.filter(change_seq__gt=checkpoint).exists())
+
+    issues = [{_f: _i[_f] for _f in fields} for _i in issues if _i['change_seq'] <= checkpoint]
+    return {
+        'issues': IssueReadSerializer(issues, many=True).data,
+        'deleted': [_issue_id for _seq, _issue_id in deleted if _seq <= checkpoint],
+        'checkpoint': str(checkpoint),
+        'has_more': has_more,
+    }
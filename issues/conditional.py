@@ -0,0 +1,51 @@
+from .issue_cache import issue_cache
+from .models import Issue
+from .reference_cache import get_reference_cache
+
+
+# ETag / Last-Modified functions for django.views.decorators.http.condition, they never serialize the data
+
+def get_issue_updated_at(request, pk):
+    # a single indexed lookup per request shared by ETag and Last-Modified
+    if request.method not in ('GET', 'HEAD') and not (request.META.get('HTTP_IF_MATCH') or
+                                                      request.META.get('HTTP_IF_UNMODIFIED_SINCE')):
+        # writes without preconditions don't need the version
+        return None
+    if request.method in ('GET', 'HEAD') and issue_cache.is_enabled():
+        # the cached response knows its version, the view serves the same entry
+        if not hasattr(request, 'issue_entry'):
+            request.issue_entry = issue_cache.get(pk)
+        return request.issue_entry['updated_at'] if request.issue_entry else None
+    if not hasattr(request, 'issue_updated_at'):
+        request.issue_updated_at = Issue.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    return request.issue_updated_at
+
+
+def issue_etag(request, pk):
+    updated_at = get_issue_updated_at(request, pk)
+    return f'issue-{pk}-{updated_at.strftime("%Y%m%d%H%M%S%f")}' if updated_at else None
+
+
+def issue_last_modified(request, pk):
+    return get_issue_updated_at(request, pk)
+
+
+def get_reference_stamp(request, model):
+    # persisted (version, last change) of the reference data => the same in all processes, read once per request
+    if not hasattr(request, 'reference_stamps'):
+        request.reference_stamps = dict()
+    if model not in request.reference_stamps:
+        request.reference_stamps[model] = get_reference_cache(model).get_stamp()
+    return request.reference_stamps[model]
+
+
+def reference_etag(model):
+    def etag_func(request, *args, **kwargs):
+        return f'{model._meta.model_name}-{get_reference_stamp(request, model)[0]}'
+    return etag_func
+
+
+def reference_last_modified(model):
+    def last_modified_func(request, *args, **kwargs):
+        return get_reference_stamp(request, model)[1]
+    return last_modified_func
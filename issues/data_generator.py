@@ -0,0 +1,98 @@
+import random
+from datetime import timedelta
+from uuid import uuid4
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils.timezone import now as timezone_now
+
+from .export import iter_chunks
+from .models import Issue, State, Category, ChangeCounter
+from .reference_cache import get_reference_cache
+from .statistics import rebuild_statistics, invalidate_duration_statistics
+
+
+# (name, mark_issue_as_finished, weight of issues in the state)
+GENERATED_STATES = (
+    ('New', False, 8),
+    ('In progress', False, 6),
+    ('Delayed', False, 2),
+    ('Finished', True, 75),
+    ('Canceled', True, 9),
+)
+WORDS = ('chyba', 'přihlášení', 'export', 'import', 'stránka', 'formulář', 'tlačítko', 'uživatel',
+         'heslo', 'report', 'databáze', 'výkon', 'pomalé', 'načítání', 'faktura', 'platba', 'e-mail',
+         'notifikace', 'filtr', 'řazení', 'oprávnění', 'překlep', 'dokumentace', 'rozhraní', 'API', 'mobilní',
+         'aplikace', 'kalendář')
+
+
+def zipf_weights(count, exponent=1.1):
+    # a few of the objects get most of the issues (as categories and responsible persons do in real trackers)
+    return [1 / (_rank ** exponent) for _rank in range(1, count + 1)]
+
+
+def generate_text(rng, min_words, max_words):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words)))
+
+
+def generate_reference_data(rng, users_count, categories_count, superusers_ratio=0.05, batch_size=1000):
+    """ Create users, states and categories (the missing ones), return (superusers, users, states, categories). """
+    # unique suffix (independent of the seed) => generated names never collide with the existing (unique) ones
+    suffix = uuid4().hex[:8]
+    # at least one superuser (creator of issues), password '!' = unusable
+    superuser_flags = [_i == 0 or rng.random() < superusers_ratio for _i in range(users_count)]
+    User.objects.bulk_create([User(username=f'user_{suffix}_{_i}', password='!', is_superuser=_flag, is_staff=_flag)
+                              for _i, _flag in enumerate(superuser_flags)], batch_size=batch_size)
+    users = list(User.objects.filter(username__startswith=f'user_{suffix}_').order_by('id')
+                 .values_list('id', 'is_superuser'))
+    states = [(State.objects.get_or_create(name=_name, defaults={'mark_issue_as_finished': _finished})[0], _weight)
+              for _name, _finished, _weight in GENERATED_STATES]
+    Category.objects.bulk_create([Category(name=f'Kategorie {suffix}-{_i + 1}') for _i in range(categories_count)],
+                                 batch_size=batch_size)
+    categories = list(Category.objects.filter(name__startswith=f'Kategorie {suffix}-').order_by('id')
+                      .values_list('id', flat=True))
+    # bulk_create sends no signals => the reference caches have to be told
+    for model in (User, State, Category):
+        get_reference_cache(model).bump_version()
+    return [_id for _id, _is_superuser in users if _is_superuser], [_id for _id, _ in users], states, categories
+
+
+def iter_issues(rng, count, superusers, users, states, categories, days=3 * 365):
+    # issues with skewed categories, responsible persons and states, more of them in recent months
+    now = timezone_now().replace(microsecond=0)
+    user_weights = zipf_weights(len(users))
+    category_weights = zipf_weights(len(categories))
+    state_weights = [_w for _, _w in states]
+    for _ in range(count):
+        state = rng.choices(states, state_weights)[0][0]
+        created_at = now - timedelta(seconds=int(days * 86400 * rng.random() ** 2))
+        finished_at = None
+        if state.mark_issue_as_finished:
+            # durations from minutes to months (log-normal)
+            finished_at = min(now, created_at + timedelta(seconds=int(rng.lognormvariate(11, 1.5))))
+        yield Issue(name=generate_text(rng, 1, 5)[:50], description=generate_text(rng, 5, 60),
+                    creator_id=rng.choice(superusers), responsible_person_id=rng.choices(users, user_weights)[0],
+                    state=state, category_id=rng.choices(categories, category_weights)[0],
+                    created_at=created_at, finished_at=finished_at)
+
+
+def generate_data(issues_count, users_count=100, categories_count=20, batch_size=5000, seed=None, progress=None):
+    """ Insert users, categories and <issues_count> issues in bulk, then rebuild the rollup statistics.
+
+    Every batch of issues is a transaction of its own, memory usage does not grow with <issues_count>.
+    """
+    rng = random.Random(seed)
+    superusers, users, states, categories = generate_reference_data(rng, users_count, categories_count)
+    created = 0
+    for batch in iter_chunks(iter_issues(rng, issues_count, superusers, users, states, categories), batch_size):
+        with transaction.atomic():
+            last_change_seq = ChangeCounter.next_value(count=len(batch))
+            for change_seq, issue in enumerate(batch, start=last_change_seq - len(batch) + 1):
+                issue.change_seq = change_seq
+            Issue.objects.bulk_create(batch, batch_size=500)
+        created += len(batch)
+        if progress:
+            progress(created)
+    rebuild_statistics()
+    invalidate_duration_statistics()
+    return created
@@ -0,0 +1,63 @@
+import csv
+import json
+from datetime import datetime
+
+from django.http import StreamingHttpResponse
+
+
+EXPORT_FIELDS = ('id', 'name', 'creator_id', 'responsible_person_id', 'description', 'state_id', 'category_id',
+                 'created_at', 'finished_at')
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    # csv.writer writes into this pseudo buffer, the written line is returned instead of being stored
+    @staticmethod
+    def write(value):
+        return value
+
+
+def format_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def iter_chunks(rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_ndjson(rows):
+    for chunk in iter_chunks(rows, EXPORT_CHUNK_SIZE):
+        yield ''.join(json.dumps(dict(zip(EXPORT_FIELDS, map(format_value, _r))), ensure_ascii=False) + '\n'
+                      for _r in chunk)
+
+
+def iter_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for chunk in iter_chunks(rows, EXPORT_CHUNK_SIZE):
+        yield ''.join(writer.writerow(['' if _v is None else format_value(_v) for _v in _r]) for _r in chunk)
+
+
+EXPORT_FORMATS = {
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+    'csv': (iter_csv, 'text/csv; charset=utf-8'),
+}
+
+
+def export_issues(queryset, export_format):
+    # Rows are fetched in chunks from a single query and sent as soon as they are formatted (flat memory usage)
+    iter_rows, content_type = EXPORT_FORMATS[export_format]
+    # the rows are read while the response streams, after the view has returned => the database (replica or
+    # primary) is chosen by the router now
+    queryset = queryset.using(queryset.db)
+    rows = queryset.order_by('id').values_list(*EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    response = StreamingHttpResponse(iter_rows(rows), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="issues.{export_format}"'
+    return response
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from django.utils.dateparse import parse_datetime, parse_date
+
+from .exceptions import IssueException
+
+
+# query parameter -> Issue's column (a single id or several ids separated by comma)
+ID_FILTERS = (
+    ('state', 'state_id'),
+    ('category', 'category_id'),
+    ('responsible_person', 'responsible_person_id'),
+)
+
+# query parameter -> lookup (date or datetime in ISO 8601)
+DATETIME_FILTERS = (
+    ('created_after', 'created_at__gte'),
+    ('created_before', 'created_at__lt'),
+    ('finished_after', 'finished_at__gte'),
+    ('finished_before', 'finished_at__lt'),
+)
+
+
+def parse_ids(param, value):
+    try:
+        return [int(_id) for _id in value.split(',')]
+    except ValueError:
+        raise IssueException(400, [('chyba', f'<{param}>: neplatný seznam ID')])
+
+
+def parse_datetime_param(param, value):
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            parsed_date = parse_date(value)
+            parsed = datetime(parsed_date.year, parsed_date.month, parsed_date.day) if parsed_date else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise IssueException(400, [('chyba', f'<{param}>: neplatné datum')])
+    return parsed
+
+
+def filter_issues(queryset, params):
+    # Filter issues by query parameters, the combinations with ordering by -created_at are backed by indexes
+    for param, field in ID_FILTERS:
+        if params.get(param):
+            ids = parse_ids(param, params[param])
+            queryset = queryset.filter(**{field: ids[0]} if len(ids) == 1 else {f'{field}__in': ids})
+    for param, lookup in DATETIME_FILTERS:
+        if params.get(param):
+            queryset = queryset.filter(**{lookup: parse_datetime_param(param, params[param])})
+    return queryset
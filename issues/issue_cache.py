@@ -0,0 +1,112 @@
+import random
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .export import iter_chunks
+from .models import Issue
+from .serializers import IssueReadSerializer
+
+
+# max. number of pks in one IN (...) of load
+IN_CHUNK_SIZE = 500
+
+# backends not shared by processes => writes of one process could not invalidate the entries of the others
+PROCESS_LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',
+                          'django.core.cache.backends.dummy.DummyCache')
+
+
+class IssueCache:
+    """ Serialized issues (the data of GET /api/v1/issues/<pk>/) in the shared Django cache, loaded on read.
+
+    Every issue has a version stamp of its own, entries are stored under it. Writes delete the stamps (before and
+    after commit, see invalidate), a reader who loaded the issue before that stores it under a stamp nobody reads.
+    The cache is used only when all processes share it (ISSUES_ISSUE_CACHE), otherwise issues are read from DB.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_version_key(pk):
+        return f'issues:issue_version:{pk}'
+
+    @staticmethod
+    def get_entry_key(pk, version):
+        return f'issues:issue:{pk}:{version}'
+
+    @staticmethod
+    def get_timeout():
+        return getattr(settings, 'ISSUES_ISSUE_CACHE_TIMEOUT', 3600)
+
+    @staticmethod
+    def is_enabled():
+        # None => by the backend of the default cache
+        enabled = getattr(settings, 'ISSUES_ISSUE_CACHE', None)
+        if enabled is None:
+            return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+        return enabled
+
+    def get_versions(self, pks):
+        # pk -> version stamp, missing stamps are created (random start => a deleted stamp is never reused)
+        keys = {self.get_version_key(_pk): _pk for _pk in pks}
+        versions = cache.get_many(keys)
+        missing = [_k for _k in keys if _k not in versions]
+        if missing:
+            for key in missing:
+                cache.add(key, random.getrandbits(48), None)
+            versions.update(cache.get_many(missing))
+        return {keys[_k]: _v for _k, _v in versions.items()}
+
+    def get_many(self, pks):
+        """ pk -> {'updated_at': ..., 'data': {...}} of existing issues (missing pks are left out).
+
+        One cache round trip for stamps and one for entries, the issues not found in cache are loaded by one query.
+        """
+        pks = list(dict.fromkeys(pks))
+        if not self.is_enabled():
+            return self.load(pks)
+        versions = self.get_versions(pks)
+        keys = {self.get_entry_key(_pk, versions[_pk]): _pk for _pk in pks if _pk in versions}
+        entries = {keys[_k]: _e for _k, _e in cache.get_many(keys).items()}
+        missing = [_pk for _pk in pks if _pk not in entries]
+        with self._lock:
+            self.hits += len(entries)
+            self.misses += len(missing)
+        if missing:
+            loaded = self.load(missing)
+            # stamps not read above (e.g. an unavailable cache) are not stored
+            cache.set_many({self.get_entry_key(_pk, versions[_pk]): _e for _pk, _e in loaded.items()
+                            if _pk in versions}, self.get_timeout())
+            entries.update(loaded)
+        return entries
+
+    def get(self, pk):
+        # pks of URLs come as strings
+        return self.get_many([int(pk)]).get(int(pk))
+
+    @staticmethod
+    def load(pks):
+        # entries straight from DB (nonexistent issues are not cached, they may be created under the pk later)
+        rows = []
+        # IN lists stay under the SQLite limit of query parameters, the primary => no stale rows of a lagging replica
+        for chunk in iter_chunks(pks, IN_CHUNK_SIZE):
+            rows += Issue.objects.using(DEFAULT_DB_ALIAS).filter(pk__in=chunk).values(
+                'updated_at', *IssueReadSerializer.get_fields())
+        updated_at = [_r.pop('updated_at') for _r in rows]
+        data = IssueReadSerializer(rows, many=True).data
+        return {_d['id']: {'updated_at': _u, 'data': _d} for _u, _d in zip(updated_at, data)}
+
+    def invalidate(self, pks):
+        # deleted again after commit => nobody keeps data read before the commit
+        keys = [self.get_version_key(_pk) for _pk in pks]
+        if keys and self.is_enabled():
+            cache.delete_many(keys)
+            transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+issue_cache = IssueCache()
@@ -0,0 +1,56 @@
+import json
+import logging
+from datetime import datetime
+from logging.config import ConvertingList
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+
+
+# attributes of every LogRecord, the other ones were given by <extra> (e.g. duration and sql of DB queries)
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """ One JSON object per line: time, level, logger, source, message and the extra attributes of the record. """
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'source': f'{record.module}:{record.lineno}',
+            'message': record.getMessage(),
+        }
+        data.update((_k, _v) for _k, _v in vars(record).items() if _k not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class QueueListenerHandler(logging.Handler):
+    """ Put records into an in-memory queue, a background thread writes them by <handlers>.
+
+    Logging threads never wait on disk (or console), use it in LOGGING with other handlers referenced as
+    'cfg://handlers.<name>'.
+    """
+
+    def __init__(self, handlers, respect_handler_level=True):
+        super().__init__()
+        # composition, not inheritance: dictConfig of newer Pythons configures QueueHandler subclasses its own way
+        self.queue = SimpleQueue()
+        self.queue_handler = QueueHandler(self.queue)
+        if isinstance(handlers, ConvertingList):
+            # indexing resolves the cfg:// references to the configured handlers
+            handlers = [handlers[_i] for _i in range(len(handlers))]
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=respect_handler_level)
+        self.listener.start()
+
+    def emit(self, record):
+        self.queue_handler.emit(record)
+
+    def close(self):
+        # called by logging.shutdown on exit (and when LOGGING is reconfigured), records left in the queue are written
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super().close()
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from issues.archive import archive_issues, get_archive_days, get_archive_batch_size
+
+
+class Command(BaseCommand):
+    help = 'Move issues finished more than <days> ago from the issues table to the archive (in batches)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=get_archive_days(),
+                            help='archive issues finished more than this number of days ago')
+        parser.add_argument('--batch-size', type=int, default=get_archive_batch_size(),
+                            help='number of issues moved in one transaction')
+
+    def handle(self, *args, **options):
+        archived = archive_issues(options['days'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} issues'))
@@ -0,0 +1,37 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from issues.benchmarking import run_load
+
+
+# sync API path -> async API path
+BENCHMARK_PATHS = (
+    ('/api/v1/issues/', '/api/v1/async/issues/'),
+    ('/api/v1/users/', '/api/v1/async/users/'),
+    ('/api/v1/states/', '/api/v1/async/states/'),
+    ('/api/v1/categories/', '/api/v1/async/categories/'),
+)
+
+
+class Command(BaseCommand):
+    help = ('Compare requests per second and p99 latency of the sync API served by WSGI with the async API served '
+            'by ASGI under concurrent load (both servers have to be running, e.g. gunicorn and uvicorn)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi-url', default='http://127.0.0.1:8000', help='base URL of the WSGI server')
+        parser.add_argument('--asgi-url', default='http://127.0.0.1:8001', help='base URL of the ASGI server')
+        parser.add_argument('--sessionid', required=True, help='session cookie of a staff user')
+        parser.add_argument('--requests', type=int, default=1000, help='requests per endpoint and server')
+        parser.add_argument('--concurrency', type=int, default=50, help='parallel clients')
+
+    def handle(self, *args, **options):
+        headers = {'Cookie': f'sessionid={options["sessionid"]}'}
+        results = []
+        for sync_path, async_path in BENCHMARK_PATHS:
+            for server, url in (('wsgi', options['wsgi_url'] + sync_path), ('asgi', options['asgi_url'] + async_path)):
+                result = run_load(url, options['requests'], options['concurrency'], headers)
+                results.append(dict(server=server, path=sync_path, **result))
+                self.stderr.write(f'{server} {sync_path}: {result["requests_per_second"]} req/s, '
+                                  f'p99 {result["p99_ms"]} ms, {result["errors"]} errors')
+        self.stdout.write(json.dumps(results, indent=2))
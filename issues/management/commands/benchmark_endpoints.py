@@ -0,0 +1,74 @@
+import json
+import platform
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from issues.benchmarking import benchmark_request
+from issues.models import Issue, State, Category
+
+
+def get_benchmark_urls():
+    # (name, URL) of every read endpoint of the issues app and the admin changelist, writes are left out
+    issue = Issue.objects.order_by('-id').first()
+    state, category = State.objects.first(), Category.objects.first()
+    urls = [
+        ('get_post_issues', reverse('get_post_issues')),
+        ('get_post_issues?state', f'{reverse("get_post_issues")}?state={state.id if state else 0}'),
+        ('get_post_issues?category', f'{reverse("get_post_issues")}?category={category.id if category else 0}'),
+        ('get_issue_changes', reverse('get_issue_changes')),
+        ('get_issues_search', f'{reverse("get_issues_search")}?q=chyba'),
+        ('get_issues_export(ndjson)', reverse('get_issues_export', kwargs={'export_format': 'ndjson'})),
+        ('get_issues_export(csv)', reverse('get_issues_export', kwargs={'export_format': 'csv'})),
+        ('get_all_users', reverse('get_all_users')),
+        ('get_all_states', reverse('get_all_states')),
+        ('get_all_categories', reverse('get_all_categories')),
+        ('get_duration_stats', reverse('get_duration_stats')),
+        ('async_get_issues', reverse('async_get_issues')),
+        ('async_get_all_users', reverse('async_get_all_users')),
+        ('get_metrics', reverse('get_metrics')),
+        ('admin:issues_issue_changelist', reverse('admin:issues_issue_changelist')),
+    ]
+    if issue is not None:
+        urls += [('get_delete_update_issue', reverse('get_delete_update_issue', kwargs={'pk': issue.pk})),
+                 ('async_get_issue', reverse('async_get_issue', kwargs={'pk': issue.pk}))]
+    return urls
+
+
+class Command(BaseCommand):
+    help = ('Measure throughput, p50/p99 latency, queries per request and peak memory of the issues endpoints '
+            'and the admin changelist in process (Django test client), write the results as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help='superuser the requests are sent as')
+        parser.add_argument('--requests', type=int, default=50, help='requests per endpoint')
+        parser.add_argument('--host', default='localhost', help='Host header (has to be in ALLOWED_HOSTS)')
+        parser.add_argument('--only', nargs='*', default=None, help='names of the endpoints to measure')
+        parser.add_argument('--output', default=None, help='JSON file (standard output by default)')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None or not user.is_superuser:
+            raise CommandError(f'Superuser {options["username"]} not found')
+        client = Client(HTTP_HOST=options['host'])
+        client.force_login(user)
+
+        results = {'started_at': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+                   'issues': Issue.objects.count(), 'requests': options['requests'], 'endpoints': {}}
+        for name, url in get_benchmark_urls():
+            if options['only'] and name not in options['only']:
+                continue
+            # one warm-up request (caches, lazy imports)
+            client.get(url)
+            results['endpoints'][name] = dict(url=url, **benchmark_request(client, url, options['requests']))
+            self.stderr.write(f'{name}: {results["endpoints"][name]}')
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output)
+        else:
+            self.stdout.write(output)
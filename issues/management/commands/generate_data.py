@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from issues.data_generator import generate_data
+
+
+class Command(BaseCommand):
+    help = ('Generate users, categories and issues with realistic (skewed) distributions by bulk inserts '
+            '(states New, In progress, Delayed, Finished and Canceled are created if missing)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--issues', type=int, default=100000, help='number of issues')
+        parser.add_argument('--users', type=int, default=100, help='number of users (about 5 %% are superusers)')
+        parser.add_argument('--categories', type=int, default=20, help='number of categories')
+        parser.add_argument('--batch-size', type=int, default=5000, help='issues inserted in one transaction')
+        parser.add_argument('--seed', type=int, default=None, help='seed of the random generator (repeatable data)')
+
+    def handle(self, *args, **options):
+        created = generate_data(options['issues'], options['users'], options['categories'], options['batch_size'],
+                                options['seed'], progress=lambda _count: self.stderr.write(f'{_count} issues'))
+        self.stdout.write(self.style.SUCCESS(f'Generated {created} issues'))
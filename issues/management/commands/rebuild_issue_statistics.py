@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from issues.models import IssueStatistics
+from issues.statistics import rebuild_statistics
+
+
+class Command(BaseCommand):
+    help = 'Rebuild rollup statistics of issues from scratch (repairs any drift of incrementally updated values)'
+
+    def handle(self, *args, **options):
+        rebuild_statistics()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {IssueStatistics.objects.count()} rollup rows'))
@@ -0,0 +1,123 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from .issue_cache import issue_cache
+from .reference_cache import get_reference_caches
+
+
+# upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MetricsShard:
+    # metrics recorded by one thread (only that thread writes into it => no locking on the request path)
+
+    def __init__(self):
+        self.requests = defaultdict(int)
+        self.latency_buckets = defaultdict(lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+        self.latency_sum = defaultdict(float)
+        self.queries = defaultdict(int)
+        self.db_time = defaultdict(float)
+
+
+class MetricsRegistry:
+    """ Request metrics per URL name kept in per-thread shards, merged only when they are exported. """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def get_shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            # the only locked step, once per thread
+            shard = self._local.shard = MetricsShard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def record_request(self, view, method, status_code, duration, queries=0, db_time=0.0):
+        shard = self.get_shard()
+        shard.requests[(view, method, str(status_code))] += 1
+        shard.latency_buckets[view][bisect_left(LATENCY_BUCKETS, duration)] += 1
+        shard.latency_sum[view] += duration
+        shard.queries[view] += queries
+        shard.db_time[view] += db_time
+
+    def collect(self):
+        # merged copy of all shards (other threads may be recording meanwhile, the values are just a bit stale)
+        merged = MetricsShard()
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for key, value in list(shard.requests.items()):
+                merged.requests[key] += value
+            for key, buckets in list(shard.latency_buckets.items()):
+                merged.latency_buckets[key] = [_m + _b for _m, _b in zip(merged.latency_buckets[key], buckets)]
+            for name in ('latency_sum', 'queries', 'db_time'):
+                for key, value in list(getattr(shard, name).items()):
+                    getattr(merged, name)[key] += value
+        return merged
+
+    def reset(self):
+        with self._lock:
+            self._shards.clear()
+        self._local = threading.local()
+
+
+registry = MetricsRegistry()
+
+
+def format_labels(**labels):
+    escaped = (str(_v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _v in labels.values())
+    return '{' + ','.join(f'{_k}="{_v}"' for _k, _v in zip(labels, escaped)) + '}'
+
+
+def get_cache_stats():
+    # [(cache name, hits, misses), ...] of the caches which count their hits
+    stats = [('issue', issue_cache.hits, issue_cache.misses)]
+    for reference_cache in get_reference_caches():
+        label = reference_cache.model._meta.label_lower
+        stats += [(f'reference:{label}', reference_cache.hits, reference_cache.misses),
+                  (f'reference_response:{label}', reference_cache.response_hits, reference_cache.response_misses)]
+    return stats
+
+
+def render_metrics():
+    """ All metrics in Prometheus text exposition format (version 0.0.4). """
+    metrics = registry.collect()
+    lines = ['# HELP tracker_requests_total Number of requests by view, method and status code.',
+             '# TYPE tracker_requests_total counter']
+    for (view, method, status_code), count in sorted(metrics.requests.items()):
+        lines.append(f'tracker_requests_total{format_labels(view=view, method=method, status=status_code)} {count}')
+
+    lines += ['# HELP tracker_request_duration_seconds Latency of requests by view.',
+              '# TYPE tracker_request_duration_seconds histogram']
+    for view, buckets in sorted(metrics.latency_buckets.items()):
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf', ), buckets):
+            cumulative += count
+            lines.append(f'tracker_request_duration_seconds_bucket{format_labels(view=view, le=bound)} {cumulative}')
+        lines.append(f'tracker_request_duration_seconds_sum{format_labels(view=view)} {metrics.latency_sum[view]}')
+        lines.append(f'tracker_request_duration_seconds_count{format_labels(view=view)} {cumulative}')
+
+    lines += ['# HELP tracker_db_queries_total Number of SQL queries by view.',
+              '# TYPE tracker_db_queries_total counter']
+    lines += [f'tracker_db_queries_total{format_labels(view=_v)} {_c}' for _v, _c in sorted(metrics.queries.items())]
+    lines += ['# HELP tracker_db_duration_seconds_total Time spent in SQL queries by view.',
+              '# TYPE tracker_db_duration_seconds_total counter']
+    lines += [f'tracker_db_duration_seconds_total{format_labels(view=_v)} {_t}'
+              for _v, _t in sorted(metrics.db_time.items())]
+
+    cache_stats = get_cache_stats()
+    for name, help_text, index in (('tracker_cache_hits_total', 'Cache hits.', 1),
+                                   ('tracker_cache_misses_total', 'Cache misses.', 2)):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        lines += [f'{name}{format_labels(cache=_s[0])} {_s[index]}' for _s in cache_stats]
+    lines += ['# HELP tracker_cache_hit_ratio Ratio of cache hits to all lookups.',
+              '# TYPE tracker_cache_hit_ratio gauge']
+    lines += [f'tracker_cache_hit_ratio{format_labels(cache=_n)} {_h / (_h + _m) if _h + _m else 0}'
+              for _n, _h, _m in cache_stats]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+
+from django.conf import settings
+
+from .metrics import registry
+from .query_budget import record_queries, get_query_budget
+from .routers import get_replica_alias, set_primary_sticky, reset_primary_sticky, is_primary_sticky
+
+
+class AsyncCapableMiddleware:
+    """ Base of middlewares running in the mode of the next handler (sync under WSGI, async under ASGI).
+
+    Django does not have to adapt them => requests of the async views are not moved to threads and back.
+    Subclasses implement handle (sync) and ahandle (async).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = asyncio.iscoroutinefunction(get_response)
+        if self.async_mode:
+            # Django recognises the instance as a coroutine function (the way of its MiddlewareMixin)
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.ahandle(request)
+        return self.handle(request)
+
+    def handle(self, request):
+        raise NotImplementedError
+
+    async def ahandle(self, request):
+        raise NotImplementedError
+
+
+class ReplicaStickinessMiddleware(AsyncCapableMiddleware):
+    """ Reads of a client go to the primary database for a while after it has written something.
+
+    The time is given by ISSUES_REPLICA_STICKY_SECONDS (how long the replica may lag behind) and it is kept
+    in a cookie, so it works across processes. Without a configured replica the middleware does nothing.
+    """
+    cookie_name = 'tracker_primary'
+
+    def set_cookie(self, request, response):
+        if is_primary_sticky() and request.method not in ('GET', 'HEAD'):
+            max_age = getattr(settings, 'ISSUES_REPLICA_STICKY_SECONDS', 5)
+            response.set_cookie(self.cookie_name, '1', max_age=max_age, httponly=True, samesite='Lax')
+
+    def handle(self, request):
+        if not get_replica_alias():
+            return self.get_response(request)
+        token = set_primary_sticky(self.cookie_name in request.COOKIES)
+        try:
+            response = self.get_response(request)
+            self.set_cookie(request, response)
+        finally:
+            reset_primary_sticky(token)
+        return response
+
+    async def ahandle(self, request):
+        if not get_replica_alias():
+            return await self.get_response(request)
+        # sync_to_async runs the DB access in a copy of this context => the views see the flag
+        token = set_primary_sticky(self.cookie_name in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+            self.set_cookie(request, response)
+        finally:
+            reset_primary_sticky(token)
+        return response
+
+
+logger = logging.getLogger('issues.queries')
+
+
+class QueryBudgetMiddleware:
+    """ Count queries of every request, warn when the view's budget is exceeded or a query repeats (N+1).
+
+    Budgets are given per URL name by ISSUES_QUERY_BUDGETS (ISSUES_QUERY_BUDGET_DEFAULT for other views). With
+    ISSUES_QUERY_DEBUG_HEADERS the numbers are sent in X-Query-Count, X-Query-Time-Ms and X-Query-Repeated headers.
+
+    Sync only on purpose: under ASGI Django runs it by sync_to_async(thread_sensitive=True), i.e. in the thread
+    where the sync views and the DB access of the async views run => their queries are on the wrapped connections.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        # for MetricsMiddleware
+        request.query_recorder = recorder
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        budget = get_query_budget(url_name)
+        repeated = recorder.get_repeated()
+        if budget is not None and recorder.count > budget:
+            logger.warning(f'{request.method} {request.path} ({url_name}): {recorder.count} queries '
+                           f'(budget {budget}), {recorder.duration * 1000:.1f} ms')
+        for template, count in repeated:
+            logger.warning(f'{request.method} {request.path} ({url_name}): query repeated {count}x (N+1?): '
+                           f'{template[:200]}')
+        if getattr(settings, 'ISSUES_QUERY_DEBUG_HEADERS', False):
+            response['X-Query-Count'] = str(recorder.count)
+            response['X-Query-Time-Ms'] = f'{recorder.duration * 1000:.1f}'
+            response['X-Query-Repeated'] = str(max((_c for _, _c in repeated), default=0))
+        return response
+
+
+class MetricsMiddleware(AsyncCapableMiddleware):
+    """ Record count, status, latency, SQL queries and DB time of every request per URL name (see metrics.py).
+
+    It has to be placed before QueryBudgetMiddleware, whose query recorder it reads.
+    """
+
+    def handle(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started)
+        return response
+
+    async def ahandle(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def record(request, response, duration):
+        view = request.resolver_match.url_name if request.resolver_match else None
+        recorder = getattr(request, 'query_recorder', None)
+        registry.record_request(view or '<unresolved>', request.method, response.status_code, duration,
+                                recorder.count if recorder else 0, recorder.duration if recorder else 0.0)
@@ -0,0 +1,60 @@
+# Generated by Django 3.2.7 on 2026-10-18 17:59
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Count, Sum, Max, Min, F, Q, ExpressionWrapper, DurationField
+
+
+# self-contained (a migration must not depend on the current code of the app)
+def build_issue_statistics(apps, schema_editor):
+    issue_model = apps.get_model('issues', 'Issue')
+    statistics_model = apps.get_model('issues', 'IssueStatistics')
+    duration = ExpressionWrapper(F('finished_at') - F('created_at'), output_field=DurationField())
+    finished = Q(finished_at__isnull=False)
+    aggregates = dict(issues_count=Count('id'), open_count=Count('id', filter=Q(finished_at__isnull=True)),
+                      finished_count=Count('id', filter=finished), duration_sum=Sum(duration, filter=finished),
+                      duration_min=Min(duration, filter=finished), duration_max=Max(duration, filter=finished))
+    issues = issue_model.objects.order_by()
+    results = [('total', 'total', None, issues.aggregate(**aggregates))]
+    for dimension, field in (('state', 'state_id'), ('category', 'category_id')):
+        for values in issues.values(field).annotate(**aggregates):
+            results.append((f'{dimension}:{values[field]}', dimension, values[field], values))
+    rows = []
+    for group, dimension, object_id, values in results:
+        for _f in ('duration_sum', 'duration_min', 'duration_max'):
+            values[_f] = values[_f] // timedelta(microseconds=1) if values[_f] is not None else None
+        values['duration_sum'] = values['duration_sum'] or 0
+        rows.append(statistics_model(group=group, dimension=dimension, object_id=object_id,
+                                     **{_f: values[_f] for _f in aggregates}))
+    statistics_model.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueStatistics',
+            fields=[
+                ('group', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='skupina')),
+                ('dimension', models.CharField(choices=[('total', 'celkem'), ('state', 'stav'), ('category', 'kategorie')], max_length=20, verbose_name='dimenze')),
+                ('object_id', models.BigIntegerField(blank=True, null=True, verbose_name='ID objektu')),
+                ('issues_count', models.BigIntegerField(default=0, verbose_name='počet issues')),
+                ('open_count', models.BigIntegerField(default=0, verbose_name='počet otevřených')),
+                ('finished_count', models.BigIntegerField(default=0, verbose_name='počet dokončených')),
+                ('duration_sum', models.BigIntegerField(default=0, verbose_name='součet délek')),
+                ('duration_min', models.BigIntegerField(blank=True, null=True, verbose_name='min. délka')),
+                ('duration_max', models.BigIntegerField(blank=True, null=True, verbose_name='max. délka')),
+            ],
+            options={
+                'verbose_name': 'Statistika issues',
+                'verbose_name_plural': 'Statistiky issues',
+                'ordering': ('group',),
+            },
+        ),
+        migrations.RunPython(build_issue_statistics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 3.2.7 on 2026-10-18 18:00
+
+import math
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+# parameters of the duration sketch (issues.sketch.DurationSketch) the rows are created with
+SKETCH_RELATIVE_ACCURACY = 0.01
+SKETCH_MAX_BINS = 2048
+
+
+class GroupRow:
+    def __init__(self, group, dimension, object_id):
+        self.values = dict(group=group, dimension=dimension, object_id=object_id, issues_count=0, open_count=0,
+                           finished_count=0, duration_sum=0, duration_min=None, duration_max=None)
+        self.zero_count = 0
+        self.bins = dict()
+
+    def add(self, duration, log_gamma):
+        self.values['issues_count'] += 1
+        if duration is None:
+            self.values['open_count'] += 1
+            return
+        self.values['finished_count'] += 1
+        self.values['duration_sum'] += duration
+        self.values['duration_min'] = min(_d for _d in (duration, self.values['duration_min']) if _d is not None)
+        self.values['duration_max'] = max(_d for _d in (duration, self.values['duration_max']) if _d is not None)
+        if duration <= 0:
+            self.zero_count += 1
+        else:
+            key = math.ceil(math.log(duration) / log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + 1
+
+    def get_sketch(self):
+        keys = sorted(self.bins)
+        if len(keys) > SKETCH_MAX_BINS:
+            # the lowest buckets are merged (as the sketch does)
+            target = keys[len(keys) - SKETCH_MAX_BINS]
+            self.bins[target] += sum(self.bins.pop(_k) for _k in keys[:len(keys) - SKETCH_MAX_BINS])
+        return {'a': SKETCH_RELATIVE_ACCURACY, 'z': self.zero_count, 'b': {str(_k): _v for _k, _v in self.bins.items()}}
+
+
+# self-contained (a migration must not depend on the current code of the app), one pass over all issues
+def rebuild_issue_statistics(apps, schema_editor):
+    issue_model = apps.get_model('issues', 'Issue')
+    statistics_model = apps.get_model('issues', 'IssueStatistics')
+    log_gamma = math.log((1 + SKETCH_RELATIVE_ACCURACY) / (1 - SKETCH_RELATIVE_ACCURACY))
+    rows = {'total': GroupRow('total', 'total', None)}
+    issues = issue_model.objects.order_by().values_list('state_id', 'category_id', 'responsible_person_id',
+                                                        'created_at', 'finished_at')
+    for state_id, category_id, responsible_person_id, created_at, finished_at in issues.iterator(chunk_size=2000):
+        duration = (finished_at - created_at) // timedelta(microseconds=1) if finished_at is not None else None
+        groups = [('total', 'total', None), (f'state:{state_id}', 'state', state_id),
+                  (f'category:{category_id}', 'category', category_id),
+                  (f'responsible_person:{responsible_person_id}', 'responsible_person', responsible_person_id)]
+        for group, dimension, object_id in groups:
+            if group not in rows:
+                rows[group] = GroupRow(group, dimension, object_id)
+            rows[group].add(duration, log_gamma)
+    statistics_model.objects.all().delete()
+    statistics_model.objects.bulk_create([statistics_model(duration_sketch=_r.get_sketch(), **_r.values)
+                                          for _r in rows.values()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0002_issue_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issuestatistics',
+            name='duration_sketch',
+            field=models.JSONField(blank=True, default=dict, verbose_name='rozložení délek'),
+        ),
+        migrations.AlterField(
+            model_name='issuestatistics',
+            name='dimension',
+            field=models.CharField(choices=[('total', 'celkem'), ('state', 'stav'), ('category', 'kategorie'), ('responsible_person', 'řešitel')], max_length=20, verbose_name='dimenze'),
+        ),
+        migrations.RunPython(rebuild_issue_statistics, migrations.RunPython.noop),
+    ]
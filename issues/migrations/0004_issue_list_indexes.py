@@ -0,0 +1,33 @@
+# Generated by Django 3.2.7 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0003_issue_statistics_sketch'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['-created_at', 'name', 'state', 'id'], name='issue_ordering_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['state', '-created_at', 'name', 'id'], name='issue_state_ordering_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['category', '-created_at', 'name', 'state', 'id'], name='issue_category_ordering_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['responsible_person', '-created_at', 'name', 'state', 'id'], name='issue_person_ordering_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['finished_at'], name='issue_finished_at_idx'),
+        ),
+    ]
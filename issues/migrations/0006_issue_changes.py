@@ -0,0 +1,49 @@
+# Generated by Django 3.2.7 on 2026-10-18 18:09
+
+from django.db import migrations, models
+
+
+def create_issues_counter(apps, schema_editor):
+    # the row is locked by every change of an issue, existing issues keep change_seq 0
+    apps.get_model('issues', 'ChangeCounter').objects.get_or_create(name='issues')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0005_issue_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='název')),
+                ('value', models.BigIntegerField(default=0, verbose_name='hodnota')),
+            ],
+            options={
+                'verbose_name': 'Počítadlo změn',
+                'verbose_name_plural': 'Počítadla změn',
+            },
+        ),
+        migrations.CreateModel(
+            name='IssueTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('issue_id', models.BigIntegerField(verbose_name='ID issue')),
+                ('change_seq', models.BigIntegerField(db_index=True, verbose_name='pořadí změny')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, verbose_name='smazáno')),
+            ],
+            options={
+                'verbose_name': 'Smazané issue',
+                'verbose_name_plural': 'Smazané issues',
+                'ordering': ('change_seq',),
+            },
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, default=0, verbose_name='pořadí změny'),
+        ),
+        migrations.RunPython(create_issues_counter, migrations.RunPython.noop),
+    ]
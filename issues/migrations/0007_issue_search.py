@@ -0,0 +1,57 @@
+# Generated by Django 3.2.7 on 2026-10-18 18:20
+
+from django.db import migrations
+
+# external content FTS5 index (the SQL of issues.search at the time of this migration, kept here so that the migration
+# never changes with the app's code), SQLite only
+FTS_CREATE_SQL = (
+    "CREATE VIRTUAL TABLE {table}_fts USING fts5(name, description, content='{table}', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN "
+    "INSERT INTO {table}_fts (rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN "
+    "INSERT INTO {table}_fts ({table}_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER {table}_fts_update AFTER UPDATE OF name, description ON {table} BEGIN "
+    "INSERT INTO {table}_fts ({table}_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO {table}_fts (rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')",
+)
+FTS_DROP_SQL = (
+    "DROP TRIGGER IF EXISTS {table}_fts_insert",
+    "DROP TRIGGER IF EXISTS {table}_fts_delete",
+    "DROP TRIGGER IF EXISTS {table}_fts_update",
+    "DROP TABLE IF EXISTS {table}_fts",
+)
+
+
+def create_search_index(schema_editor, table):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in FTS_CREATE_SQL:
+            schema_editor.execute(sql.format(table=table))
+
+
+def drop_search_index(schema_editor, table):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in FTS_DROP_SQL:
+            schema_editor.execute(sql.format(table=table))
+
+
+def create_issue_search_index(apps, schema_editor):
+    create_search_index(schema_editor, apps.get_model('issues', 'Issue')._meta.db_table)
+
+
+def drop_issue_search_index(apps, schema_editor):
+    drop_search_index(schema_editor, apps.get_model('issues', 'Issue')._meta.db_table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0006_issue_changes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_issue_search_index, drop_issue_search_index),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 3.2.7 on 2026-10-18 18:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# external content FTS5 index (the SQL of issues.search at the time of this migration, kept here so that the migration
+# never changes with the app's code), SQLite only
+FTS_CREATE_SQL = (
+    "CREATE VIRTUAL TABLE {table}_fts USING fts5(name, description, content='{table}', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN "
+    "INSERT INTO {table}_fts (rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN "
+    "INSERT INTO {table}_fts ({table}_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER {table}_fts_update AFTER UPDATE OF name, description ON {table} BEGIN "
+    "INSERT INTO {table}_fts ({table}_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO {table}_fts (rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')",
+)
+FTS_DROP_SQL = (
+    "DROP TRIGGER IF EXISTS {table}_fts_insert",
+    "DROP TRIGGER IF EXISTS {table}_fts_delete",
+    "DROP TRIGGER IF EXISTS {table}_fts_update",
+    "DROP TABLE IF EXISTS {table}_fts",
+)
+
+
+def create_search_index(schema_editor, table):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in FTS_CREATE_SQL:
+            schema_editor.execute(sql.format(table=table))
+
+
+def drop_search_index(schema_editor, table):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in FTS_DROP_SQL:
+            schema_editor.execute(sql.format(table=table))
+
+
+def create_archived_issue_search_index(apps, schema_editor):
+    create_search_index(schema_editor, apps.get_model('issues', 'ArchivedIssue')._meta.db_table)
+
+
+def drop_archived_issue_search_index(apps, schema_editor):
+    drop_search_index(schema_editor, apps.get_model('issues', 'ArchivedIssue')._meta.db_table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('issues', '0007_issue_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedIssue',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='název')),
+                ('description', models.TextField(verbose_name='popis')),
+                ('created_at', models.DateTimeField(verbose_name='vytvořeno')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='dokončeno')),
+                ('duration', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(verbose_name='změněno')),
+                ('change_seq', models.BigIntegerField(default=0, verbose_name='pořadí změny')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='archivováno')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='issues.category', verbose_name='kategorie')),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_created_by', to=settings.AUTH_USER_MODEL, verbose_name='zadavatel')),
+                ('responsible_person', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_responsible_person', to=settings.AUTH_USER_MODEL, verbose_name='řešitel')),
+                ('state', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='issues.state', verbose_name='stav')),
+            ],
+            options={
+                'verbose_name': 'Archivované issue',
+                'verbose_name_plural': 'Archivované issues',
+                'ordering': ('-created_at', 'name', 'state'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedissue',
+            index=models.Index(fields=['-created_at', 'name', 'state', 'id'], name='archived_issue_ordering_idx'),
+        ),
+        migrations.RunPython(create_archived_issue_search_index, drop_archived_issue_search_index),
+    ]
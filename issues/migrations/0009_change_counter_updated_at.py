@@ -0,0 +1,18 @@
+# Generated by Django 3.2.7 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0008_archived_issue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changecounter',
+            name='updated_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='poslední změna'),
+        ),
+    ]
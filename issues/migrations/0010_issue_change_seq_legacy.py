@@ -0,0 +1,28 @@
+from django.db import migrations
+from django.db.models import F, Max
+
+
+def number_legacy_issues(apps, schema_editor):
+    # issues saved before the change feed existed share change_seq 0 => they get unique numbers above the counter,
+    # so the first sync of a client is paged like any other (the gaps between the numbers do not matter)
+    Issue = apps.get_model('issues', 'Issue')
+    ChangeCounter = apps.get_model('issues', 'ChangeCounter')
+    legacy = Issue.objects.filter(change_seq=0)
+    max_id = legacy.aggregate(max_id=Max('id'))['max_id']
+    if max_id is None:
+        return
+    ChangeCounter.objects.get_or_create(name='issues')
+    start = ChangeCounter.objects.select_for_update().filter(pk='issues').values_list('value', flat=True).get()
+    legacy.update(change_seq=F('id') + start)
+    ChangeCounter.objects.filter(pk='issues').update(value=start + max_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0009_change_counter_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(number_legacy_issues, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,12 @@
-from django.db import models
+from datetime import timedelta
+
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from django.utils.timezone import now as timezone_now
 from django.contrib.auth.models import User
 
+from .reference_cache import get_reference_cache
+
 
 class State(models.Model):
     name = models.CharField(max_length=50, unique=True, verbose_name='název')
@@ -35,12 +39,87 @@ class Category(models.Model):
         return self.name
 
 
+class ChangeCounter(models.Model):
+    ISSUES = 'issues'
+
+    # Monotonic counter of changes, the row stays locked until the incrementing transaction ends =>
+    # => values are visible in the order they were assigned
+    name = models.CharField(max_length=50, primary_key=True, verbose_name='název')
+    value = models.BigIntegerField(default=0, verbose_name='hodnota')
+    updated_at = models.DateTimeField(null=True, blank=True, verbose_name='poslední změna')
+
+    class Meta:
+        verbose_name = 'Počítadlo změn'
+        verbose_name_plural = 'Počítadla změn'
+
+    def __repr__(self):
+        return f'{self.name}={self.value}'
+
+    def __str__(self):
+        return f'{self.name}={self.value}'
+
+    @classmethod
+    def next_value(cls, name=ISSUES, count=1):
+        # reserve <count> values, the last one is returned
+        with transaction.atomic(savepoint=False):
+            updated_at = timezone_now()
+            if not cls.objects.filter(pk=name).update(value=models.F('value') + count, updated_at=updated_at):
+                cls.objects.create(name=name, value=count, updated_at=updated_at)
+            return cls.objects.filter(pk=name).values_list('value', flat=True).get()
+
+
 def validate_superuser(value):
-    user = User.objects.get(id=value)
+    user = get_reference_cache(User).get(value)
+    if user is None:
+        raise User.DoesNotExist(f'User matching query does not exist (id={value}).')
     if not user.is_superuser:
         raise ValidationError('Pouze superuser může zadávat issue. ')
 
 
+def truncate_datetime(value, kind):
+    # start of the year/month/day of <value>
+    if kind == 'year':
+        return value.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    if kind == 'month':
+        return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_period(value, kind):
+    # start of the next year/month/day after the truncated <value>
+    if kind == 'year':
+        return value.replace(year=value.year + 1)
+    if kind == 'month':
+        return value.replace(year=value.year + value.month // 12, month=value.month % 12 + 1)
+    return value + timedelta(days=1)
+
+
+class IssueQuerySet(models.QuerySet):
+    # max. number of periods probed one by one in datetimes(), more of them are truncated row by row
+    MAX_PROBED_PERIODS = 400
+
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None, is_dst=None):
+        """ Periods (years, months, days) having some issues found by index lookups instead of a full scan.
+
+        MIN/MAX of the column and one EXISTS per period between them use the column's index, while the default
+        implementation truncates the column of every row (admin's date_hierarchy lists years of all issues).
+        """
+        if kind not in ('year', 'month', 'day') or tzinfo is not None:
+            return super().datetimes(field_name, kind, order, tzinfo, is_dst)
+        bounds = self.order_by().aggregate(first=models.Min(field_name), last=models.Max(field_name))
+        if bounds['first'] is None:
+            return []
+        periods = [truncate_datetime(bounds['first'], kind)]
+        while next_period(periods[-1], kind) <= bounds['last']:
+            periods.append(next_period(periods[-1], kind))
+            if len(periods) > self.MAX_PROBED_PERIODS:
+                return super().datetimes(field_name, kind, order, tzinfo, is_dst)
+        periods = [_p for _p in periods if self.order_by().filter(**{f'{field_name}__gte': _p,
+                                                                      f'{field_name}__lt': next_period(_p, kind)})
+                   .exists()]
+        return periods[::-1] if order == 'DESC' else periods
+
+
 class Issue(models.Model):
     name = models.CharField(max_length=50, verbose_name='název')
     creator = models.ForeignKey(User, on_delete=models.PROTECT, related_name='created_by',
@@ -53,11 +132,46 @@ class Issue(models.Model):
     created_at = models.DateTimeField(default=timezone_now(), verbose_name='vytvořeno')
     finished_at = models.DateTimeField(null=True, blank=True, verbose_name='dokončeno')
     duration = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='změněno')
+    # ChangeCounter value of the last change (checkpoint of the delta sync API)
+    change_seq = models.BigIntegerField(default=0, db_index=True, verbose_name='pořadí změny')
+
+    objects = IssueQuerySet.as_manager()
 
     class Meta:
         ordering = ('-created_at', 'name', 'state')
         verbose_name = 'Issue'
         verbose_name_plural = 'Issues'
+        # ordering (+ id as a tie breaker) alone and after the filters of the issues list API
+        indexes = [
+            models.Index(fields=['-created_at', 'name', 'state', 'id'], name='issue_ordering_idx'),
+            models.Index(fields=['state', '-created_at', 'name', 'id'], name='issue_state_ordering_idx'),
+            models.Index(fields=['category', '-created_at', 'name', 'state', 'id'],
+                         name='issue_category_ordering_idx'),
+            models.Index(fields=['responsible_person', '-created_at', 'name', 'state', 'id'],
+                         name='issue_person_ordering_idx'),
+            models.Index(fields=['finished_at'], name='issue_finished_at_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember values loaded from DB, the rollup statistics are updated by the difference on save/delete
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    # Issue and its rollup statistics (updated by signals) are always saved/deleted in the same transaction
+    def save(self, *args, **kwargs):
+        # partial saves have to refresh <updated_at> and <change_seq> too (versions of the issue)
+        if kwargs.get('update_fields'):
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'updated_at', 'change_seq'}
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            self.change_seq = ChangeCounter.next_value()
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            return super().delete(*args, **kwargs)
 
     def clean(self):
         # Auto fill the finished_at field for specific State's values
@@ -78,3 +192,93 @@ class Issue(models.Model):
 
     def __str__(self):
         return f'{self.created_at.strftime("%Y-%m-%d %H:%M:%S")} - {self.name}'
+
+
+class ArchivedIssue(models.Model):
+    # Issue finished long ago, moved out of the hot table by the <archive_issues> command (see archive.py)
+    # same columns as Issue, the id is kept => the issue can be restored under the same id
+    id = models.BigIntegerField(primary_key=True, verbose_name='ID')
+    name = models.CharField(max_length=50, verbose_name='název')
+    creator = models.ForeignKey(User, on_delete=models.PROTECT, related_name='archived_created_by',
+                                verbose_name='zadavatel')
+    responsible_person = models.ForeignKey(User, on_delete=models.PROTECT, related_name='archived_responsible_person',
+                                           verbose_name='řešitel')
+    description = models.TextField(verbose_name='popis')
+    state = models.ForeignKey(State, on_delete=models.PROTECT, verbose_name='stav')
+    category = models.ForeignKey(Category, on_delete=models.PROTECT, verbose_name='kategorie')
+    created_at = models.DateTimeField(verbose_name='vytvořeno')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='dokončeno')
+    duration = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(verbose_name='změněno')
+    change_seq = models.BigIntegerField(default=0, verbose_name='pořadí změny')
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name='archivováno')
+
+    class Meta:
+        ordering = ('-created_at', 'name', 'state')
+        verbose_name = 'Archivované issue'
+        verbose_name_plural = 'Archivované issues'
+        indexes = [
+            models.Index(fields=['-created_at', 'name', 'state', 'id'], name='archived_issue_ordering_idx'),
+        ]
+
+    def __repr__(self):
+        return f'{self.id}-{self.name}'
+
+    def __str__(self):
+        return f'{self.created_at.strftime("%Y-%m-%d %H:%M:%S")} - {self.name}'
+
+
+class IssueStatistics(models.Model):
+    TOTAL = 'total'
+    STATE = 'state'
+    CATEGORY = 'category'
+    RESPONSIBLE_PERSON = 'responsible_person'
+    DIMENSION_CHOICES = (
+        (TOTAL, 'celkem'),
+        (STATE, 'stav'),
+        (CATEGORY, 'kategorie'),
+        (RESPONSIBLE_PERSON, 'řešitel'),
+    )
+
+    # <dimension>:<pk> (e.g. 'state:4'), 'total' for all issues
+    group = models.CharField(max_length=50, primary_key=True, verbose_name='skupina')
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES, verbose_name='dimenze')
+    object_id = models.BigIntegerField(null=True, blank=True, verbose_name='ID objektu')
+    issues_count = models.BigIntegerField(default=0, verbose_name='počet issues')
+    open_count = models.BigIntegerField(default=0, verbose_name='počet otevřených')
+    finished_count = models.BigIntegerField(default=0, verbose_name='počet dokončených')
+    # durations (finished_at - created_at) of finished issues in microseconds
+    duration_sum = models.BigIntegerField(default=0, verbose_name='součet délek')
+    duration_min = models.BigIntegerField(null=True, blank=True, verbose_name='min. délka')
+    duration_max = models.BigIntegerField(null=True, blank=True, verbose_name='max. délka')
+    # DurationSketch.to_dict() of the durations (percentiles and histogram)
+    duration_sketch = models.JSONField(default=dict, blank=True, verbose_name='rozložení délek')
+
+    class Meta:
+        ordering = ('group',)
+        verbose_name = 'Statistika issues'
+        verbose_name_plural = 'Statistiky issues'
+
+    def __repr__(self):
+        return self.group
+
+    def __str__(self):
+        return self.group
+
+
+class IssueTombstone(models.Model):
+    # Deleted issue reported by the delta sync API
+    issue_id = models.BigIntegerField(verbose_name='ID issue')
+    change_seq = models.BigIntegerField(db_index=True, verbose_name='pořadí změny')
+    deleted_at = models.DateTimeField(auto_now_add=True, verbose_name='smazáno')
+
+    class Meta:
+        ordering = ('change_seq',)
+        verbose_name = 'Smazané issue'
+        verbose_name_plural = 'Smazané issues'
+
+    def __repr__(self):
+        return f'{self.issue_id}@{self.change_seq}'
+
+    def __str__(self):
+        return f'{self.issue_id}@{self.change_seq}'
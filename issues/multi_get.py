@@ -0,0 +1,33 @@
+from django.conf import settings
+
+from .exceptions import IssueException
+from .issue_cache import issue_cache
+
+
+def get_multi_get_max_size():
+    return getattr(settings, 'ISSUES_MULTI_GET_MAX_SIZE', 5000)
+
+
+def parse_ids(value):
+    # ids given as "1,2,3" (query string) or as a list of integers (JSON body)
+    if isinstance(value, str):
+        try:
+            value = [int(_id) for _id in value.split(',') if _id.strip()]
+        except ValueError:
+            value = None
+    if not isinstance(value, list) or not value or not all(type(_id) is int for _id in value):
+        raise IssueException(400, [('chyba', '<ids>: neplatný seznam ID')])
+    if len(value) > get_multi_get_max_size():
+        raise IssueException(400, [('chyba', f'Najednou lze načíst nejvýše {get_multi_get_max_size()} issues')])
+    return value
+
+
+def find_issues(ids):
+    """ {'issues': [...], 'missing': [...]} of <ids> in their order (repeated ids are returned once).
+
+    Issues are taken from the issue cache, the rest is loaded by IN queries of a few hundred ids each.
+    """
+    ids = list(dict.fromkeys(ids))
+    entries = issue_cache.get_many(ids)
+    return {'issues': [entries[_id]['data'] for _id in ids if _id in entries],
+            'missing': [_id for _id in ids if _id not in entries]}
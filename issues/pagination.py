@@ -0,0 +1,133 @@
+import json
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .exceptions import IssueException
+from .search import search_ids
+
+
+class IssueKeysetPagination(BasePagination):
+    """ Keyset (cursor) pagination of issues in order of Issue.Meta.ordering (+ pk as a tie breaker).
+
+    The next page continues right after the last issue of the previous one (WHERE instead of OFFSET) and
+    no COUNT(*) is run, so every page costs the same. The body stays a plain list, the next page is sent
+    in the <Link> header (rel="next").
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    # Issue.Meta.ordering ('-created_at', 'name', 'state') where State is ordered by id
+    ordering = ('-created_at', 'name', 'state_id', 'id')
+    keyset_fields = ('created_at', 'name', 'state_id', 'id')
+
+    def __init__(self):
+        self.page_size = getattr(settings, 'ISSUES_PAGE_SIZE', 100)
+        self.max_page_size = getattr(settings, 'ISSUES_MAX_PAGE_SIZE', 1000)
+        self.next_cursor = None
+        self.request = None
+
+    def get_page_size(self, request):
+        page_size = request.query_params.get(self.page_size_query_param)
+        if page_size is None:
+            return self.page_size
+        try:
+            page_size = int(page_size)
+        except ValueError:
+            page_size = 0
+        if not 0 < page_size <= self.max_page_size:
+            raise IssueException(400, [('chyba', f'<page_size> musí být v rozmezí 1 - {self.max_page_size}')])
+        return page_size
+
+    def encode_cursor(self, item):
+        values = [item[_f] if isinstance(item, dict) else getattr(item, _f) for _f in self.keyset_fields]
+        values[0] = values[0].isoformat()
+        return urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            created_at, name, state_id, pk = json.loads(urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(created_at), str(name), int(state_id), int(pk)
+        except (ValueError, TypeError):
+            raise IssueException(400, [('chyba', f'<{self.cursor_query_param}>: neplatný kurzor')])
+
+    @staticmethod
+    def get_keyset_filter(created_at, name, state_id, pk):
+        # rows after (created_at DESC, name, state_id, id); the leading range condition allows an index range scan
+        return Q(created_at__lte=created_at) & (
+            Q(created_at__lt=created_at) |
+            Q(created_at=created_at, name__gt=name) |
+            Q(created_at=created_at, name=name, state_id__gt=state_id) |
+            Q(created_at=created_at, name=name, state_id=state_id, id__gt=pk)
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate_querysets([queryset], request)
+
+    def paginate_querysets(self, querysets, request):
+        # .values() querysets of the same columns (e.g. hot and archived issues) paginated as one
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            keyset_filter = self.get_keyset_filter(*self.decode_cursor(cursor))
+            querysets = [_q.filter(keyset_filter) for _q in querysets]
+        queryset = querysets[0]
+        if len(querysets) > 1:
+            # parts of UNION must not be ordered (Meta.ordering), only the whole result is
+            queryset = queryset.order_by().union(*[_q.order_by() for _q in querysets[1:]], all=True)
+        # one extra row tells whether a next page exists
+        page = list(queryset.order_by(*self.ordering)[:page_size + 1])
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_cursor = self.encode_cursor(page[-1])
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        headers = {}
+        next_link = self.get_next_link()
+        if next_link is not None:
+            headers['Link'] = f'<{next_link}>; rel="next"'
+        return Response(data, headers=headers)
+
+
+class IssueSearchPagination(IssueKeysetPagination):
+    """ Keyset pagination of full-text search results ordered by (rank, id), see search.search_ids. """
+    keyset_fields = ('rank', 'id')
+
+    def __init__(self, tables):
+        super().__init__()
+        self.tables = tables
+
+    def encode_cursor(self, item):
+        return urlsafe_b64encode(json.dumps(list(item), separators=(',', ':')).encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            rank, pk = json.loads(urlsafe_b64decode(cursor.encode()))
+            return float(rank), int(pk)
+        except (ValueError, TypeError):
+            raise IssueException(400, [('chyba', f'<{self.cursor_query_param}>: neplatný kurzor')])
+
+    def paginate_queryset(self, text, request, view=None):
+        # [(id, rank), ...] of the current page
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        after = self.decode_cursor(cursor) if cursor else None
+        # ids are unique across the searched tables (archived issues keep their ids)
+        page = sorted((_r for _t in self.tables for _r in search_ids(_t, text, page_size + 1, after)),
+                      key=lambda _r: (_r[1], _r[0]))
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_cursor = self.encode_cursor(page[-1][::-1])
+        return page
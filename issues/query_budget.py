@@ -0,0 +1,74 @@
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+
+# lists of placeholders (IN (%s, %s, ...), VALUES (...), (...)) differ by the number of values only
+_PLACEHOLDERS_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)(?:\s*,\s*\(\s*%s(?:\s*,\s*%s)*\s*\))*')
+
+
+def get_query_template(sql):
+    # SQL with parameters replaced by placeholders => the same query with other values has the same template
+    return _PLACEHOLDERS_RE.sub('(...)', sql)
+
+
+def get_query_budget(url_name):
+    # max. number of queries of a request to the view <url_name> (None = unlimited)
+    budgets = getattr(settings, 'ISSUES_QUERY_BUDGETS', {})
+    return budgets.get(url_name, getattr(settings, 'ISSUES_QUERY_BUDGET_DEFAULT', None))
+
+
+logger = logging.getLogger('issues.sql')
+
+
+def get_repeat_threshold():
+    # the same query template run this many times in one request is reported as N+1
+    return getattr(settings, 'ISSUES_QUERY_REPEAT_THRESHOLD', 5)
+
+
+class QueryRecorder:
+    """ Execute wrapper (connection.execute_wrapper) counting queries, their total time and repeated templates.
+
+    A sample (ISSUES_SLOW_SQL_SAMPLE_RATE) of queries slower than ISSUES_SLOW_SQL_SECONDS is logged, unlike
+    the query log of django.db.backends it works with DEBUG off too.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.templates = Counter()
+        self.slow_seconds = getattr(settings, 'ISSUES_SLOW_SQL_SECONDS', 0.1)
+        self.slow_sample_rate = getattr(settings, 'ISSUES_SLOW_SQL_SAMPLE_RATE', 0.1)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.duration += duration
+            self.count += 1
+            self.templates[get_query_template(sql)] += 1
+            if duration >= self.slow_seconds and random.random() < self.slow_sample_rate:
+                logger.warning(f'slow query: {duration * 1000:.1f} ms', extra={'duration': duration, 'sql': sql})
+
+    def get_repeated(self, threshold=None):
+        # [(template, count), ...] of templates run at least <threshold> times, most frequent first
+        threshold = get_repeat_threshold() if threshold is None else threshold
+        return [(_t, _c) for _t, _c in self.templates.most_common() if _c >= threshold]
+
+
+@contextmanager
+def record_queries():
+    # queries of all DB connections of the current thread in the block
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
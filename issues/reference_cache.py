@@ -0,0 +1,127 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+class ReferenceCache:
+    """ Bounded in-process (LRU) cache of rarely changing model instances (states, categories, users) by pk.
+
+    Entries are valid for one version of the model's data. The version is a ChangeCounter row incremented by
+    post_save/post_delete signals in the transaction of the change. Every process compares it with the version of its
+    entries at most once per ISSUES_REFERENCE_VERSION_CHECK_SECONDS, the changing process drops its entries at once.
+    """
+
+    def __init__(self, model, max_size):
+        self.model = model
+        self.max_size = max_size
+        self.counter_name = f'reference:{model._meta.label_lower}'
+        self._entries = OrderedDict()
+        self._version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.response_hits = 0
+        self.response_misses = 0
+
+    def get_stamp(self):
+        # (version, time of the last change) of the model's data, (0, None) before the first change
+        # models import this module => imported here
+        from .models import ChangeCounter
+        # the primary => never an older version of a lagging replica
+        stamp = ChangeCounter.objects.using(DEFAULT_DB_ALIAS).filter(pk=self.counter_name).values_list(
+            'value', 'updated_at').first()
+        return stamp or (0, None)
+
+    def get_version(self):
+        return self.get_stamp()[0]
+
+    def bump_version(self):
+        from .models import ChangeCounter
+        # the row stays locked until the end of the transaction => versions are never assigned twice
+        ChangeCounter.next_value(self.counter_name)
+        # data read by other threads of this process before the commit is dropped after it
+        self.clear()
+        transaction.on_commit(self.clear)
+
+    def _sync_version(self):
+        check_seconds = getattr(settings, 'ISSUES_REFERENCE_VERSION_CHECK_SECONDS', 1)
+        if self._checked_at is not None and time.monotonic() - self._checked_at < check_seconds:
+            return
+        version = self.get_version()
+        self._checked_at = time.monotonic()
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def _store(self, instance):
+        self._entries[instance.pk] = instance
+        self._entries.move_to_end(instance.pk)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get_many(self, pks):
+        # pk -> copy of the instance (missing pks are left out)
+        with self._lock:
+            self._sync_version()
+            found, missing = dict(), set()
+            for pk in pks:
+                if pk in self._entries:
+                    self._entries.move_to_end(pk)
+                    found[pk] = self._entries[pk]
+                else:
+                    missing.add(pk)
+            self.hits += len(found)
+            self.misses += len(missing)
+        if missing:
+            loaded = self.model.objects.in_bulk(missing)
+            with self._lock:
+                for instance in loaded.values():
+                    self._store(instance)
+            found.update(loaded)
+        # callers get copies, cached instances must not be changed
+        return {_pk: copy.copy(_i) for _pk, _i in found.items()}
+
+    def get(self, pk):
+        return self.get_many([pk]).get(pk)
+
+    def get_rendered(self, render, version=None):
+        # content (bytes) of the list endpoint made by <render>, kept in the shared cache under <version>
+        # (the current one by default)
+        version = self.get_version() if version is None else version
+        key = f'issues:reference_response:{self.model._meta.label_lower}:{version}'
+        content = cache.get(key)
+        with self._lock:
+            if content is None:
+                self.response_misses += 1
+            else:
+                self.response_hits += 1
+        if content is None:
+            # old versions are never read again, they just expire
+            content = render()
+            cache.set(key, content, getattr(settings, 'ISSUES_REFERENCE_RESPONSE_TIMEOUT', 24 * 3600))
+        return content
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+            self._checked_at = None
+
+
+_reference_caches = dict()
+
+
+def get_reference_caches():
+    return list(_reference_caches.values())
+
+
+def get_reference_cache(model):
+    if model not in _reference_caches:
+        _reference_caches[model] = ReferenceCache(model, getattr(settings, 'ISSUES_REFERENCE_CACHE_SIZE', 1000))
+    return _reference_caches[model]
@@ -0,0 +1,83 @@
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+# reads may go to the replica (set for read-only views and the statistics in the admin header)
+_replica_allowed = ContextVar('issues_replica_allowed', default=False)
+# something was written (or the client wrote shortly before) => all reads go to the primary
+_primary_sticky = ContextVar('issues_primary_sticky', default=False)
+
+
+def get_replica_alias():
+    # DATABASES alias of the read replica, None = no replica is configured
+    return getattr(settings, 'ISSUES_READ_REPLICA', None)
+
+
+def set_primary_sticky(sticky):
+    # start of a request, returns a token for reset_primary_sticky
+    return _primary_sticky.set(sticky)
+
+
+def reset_primary_sticky(token):
+    _primary_sticky.reset(token)
+
+
+def is_primary_sticky():
+    return _primary_sticky.get()
+
+
+class read_from_replica(ContextDecorator):
+    """ Reads in the block (or decorated function) go to the replica unless something has been written before. """
+
+    def _recreate_cm(self):
+        # a new instance for every call of a decorated function (the token must not be shared between threads)
+        return type(self)()
+
+    def __enter__(self):
+        self._token = _replica_allowed.set(True)
+        return self
+
+    def __exit__(self, *exc):
+        _replica_allowed.reset(self._token)
+        return False
+
+
+def replica_for_safe_methods(view):
+    # GET/HEAD of the view read from the replica, other methods (read before they write) stay on the primary
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+        with read_from_replica():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReadReplicaRouter:
+    """ Writes go to the primary (default) database, reads of marked views to the replica <ISSUES_READ_REPLICA>.
+
+    After the first write all reads of the request go to the primary (read-your-writes), ReplicaStickinessMiddleware
+    keeps that for the following requests of the same client too (the replica may lag behind).
+    """
+
+    def db_for_read(self, model, **hints):
+        replica = get_replica_alias()
+        if replica and _replica_allowed.get() and not _primary_sticky.get():
+            return replica
+        return None
+
+    def db_for_write(self, model, **hints):
+        _primary_sticky.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replica holds the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # the replica gets its schema from the primary (replication or a copy of the SQLite file)
+        return db != get_replica_alias() or db == DEFAULT_DB_ALIAS
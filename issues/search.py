@@ -0,0 +1,76 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+
+# external content FTS5 index of a table with <name> and <description> columns, kept in sync by triggers
+# (diacritics are removed => 'chyba' finds 'chýba' and vice versa)
+FTS_CREATE_SQL = (
+    "CREATE VIRTUAL TABLE {table}_fts USING fts5(name, description, content='{table}', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN "
+    "INSERT INTO {table}_fts (rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN "
+    "INSERT INTO {table}_fts ({table}_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER {table}_fts_update AFTER UPDATE OF name, description ON {table} BEGIN "
+    "INSERT INTO {table}_fts ({table}_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO {table}_fts (rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')",
+)
+FTS_DROP_SQL = (
+    "DROP TRIGGER IF EXISTS {table}_fts_insert",
+    "DROP TRIGGER IF EXISTS {table}_fts_delete",
+    "DROP TRIGGER IF EXISTS {table}_fts_update",
+    "DROP TABLE IF EXISTS {table}_fts",
+)
+
+
+def create_search_index(schema_editor, table):
+    # FTS5 is SQLite only, other databases fall back to plain (slow) searching
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in FTS_CREATE_SQL:
+            schema_editor.execute(sql.format(table=table))
+
+
+def drop_search_index(schema_editor, table):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in FTS_DROP_SQL:
+            schema_editor.execute(sql.format(table=table))
+
+
+def is_search_available():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(text):
+    # every word of <text> has to be present as a prefix of a word (quoted => FTS5 operators are not interpreted)
+    return ' '.join(f'"{_word}"*' for _word in re.findall(r'\w+', text))
+
+
+def get_match_subquery(table, text):
+    # ids of rows matching <text> (for pk__in filters, e.g. in admin's search)
+    return RawSQL(f'SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH %s', [build_match_query(text)])
+
+
+def search_ids(table, text, limit, after=None):
+    """ [(id, rank), ...] of at most <limit> rows of <table> matching <text>, best first (bm25, name weighs more).
+
+    <after> is the (rank, id) of the last row of the previous page, the next page continues right after it.
+    """
+    match_query = build_match_query(text)
+    if not match_query:
+        return []
+    # auxiliary functions (bm25) can not be used in WHERE => the page is cut in an outer query
+    sql = (f'SELECT rowid, score FROM (SELECT rowid, bm25({table}_fts, 10.0, 1.0) AS score FROM {table}_fts '
+           f'WHERE {table}_fts MATCH %s)')
+    params = [match_query]
+    if after is not None:
+        sql += ' WHERE score > %s OR (score = %s AND rowid > %s)'
+        params += [after[0], after[0], after[1]]
+    sql += ' ORDER BY score, rowid LIMIT %s'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [limit])
+        return cursor.fetchall()
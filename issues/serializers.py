@@ -1,10 +1,13 @@
 from datetime import datetime
 
 from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS
 from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
 
 from .exceptions import IssueException
 from .models import Issue, Category, State
+from .reference_cache import get_reference_cache
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -36,12 +39,12 @@ class IssueSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'creator_id', 'responsible_person_id', 'description', 'state_id', 'category_id',
                   'created_at', 'finished_at',)
 
-    # Check if model's instance with given pk exists
+    # Check if model's instance with given pk exists (looked up in the reference cache)
     @staticmethod
     def validate_instance_of_model_exists(model, pk):
-        model_instance = model.objects.filter(pk=pk)
-        if model_instance:
-            return model_instance[0]
+        model_instance = get_reference_cache(model).get(pk)
+        if model_instance is not None:
+            return model_instance
         else:
             raise IssueException(400, [('chyba', f'{model}: pk {pk} nenalezen')])
 
@@ -83,6 +86,8 @@ class IssueSerializer(serializers.ModelSerializer):
         return new_issue
 
     def update(self, instance, validated_data):
+        if self.partial:
+            return self.partial_update(instance, validated_data)
         creator_instance = self.validate_instance_of_model_exists(User, validated_data.pop('creator_id'))
         response_person = self.validate_instance_of_model_exists(User, validated_data.pop('responsible_person_id'))
         state_instance = self.validate_instance_of_model_exists(State, validated_data.pop('state_id'))
@@ -97,3 +102,101 @@ class IssueSerializer(serializers.ModelSerializer):
         instance.created_at = validated_data.get('created_at')
         instance.save()
         return instance
+
+    def partial_update(self, instance, validated_data):
+        # Only submitted fields are validated and saved, untouched relations are not loaded
+        update_fields = set()
+        for field, model in (('creator_id', User), ('responsible_person_id', User), ('state_id', State),
+                             ('category_id', Category)):
+            if field in validated_data:
+                related_instance = self.validate_instance_of_model_exists(model, validated_data.pop(field))
+                if field == 'creator_id':
+                    self.validate_creator_is_superuser(related_instance)
+                setattr(instance, field[:-3], related_instance)
+                update_fields.add(field[:-3])
+        for field in ('name', 'description', 'created_at'):
+            if field in validated_data:
+                setattr(instance, field, validated_data[field])
+                update_fields.add(field)
+
+        # finished_at depends on the state and created_at => validate it whenever one of them is changed
+        if 'finished_at' in validated_data or update_fields & {'state', 'created_at'}:
+            state_instance = self.validate_instance_of_model_exists(State, instance.state_id)
+            if 'finished_at' in validated_data:
+                finished_datetime = validated_data['finished_at']
+            elif state_instance.mark_issue_as_finished:
+                # same as Issue.clean: keep the finished time (filled if empty) for finishing states, reset otherwise
+                finished_datetime = instance.finished_at
+            else:
+                finished_datetime = None
+            instance.finished_at = self.validate_finished_datetime(finished_datetime, instance.created_at,
+                                                                   state_instance)
+            update_fields.add('finished_at')
+        instance.save(update_fields=update_fields)
+        return instance
+
+
+class ValuesReadSerializer:
+    """ Fast read-only counterpart of <serializer_class> serializing .values() rows instead of model instances.
+
+    Values of flat columns are returned as they come from DB, only <converted_fields> go through the DRF field's
+    to_representation, so the output stays identical to serializer_class(instances, many=True).data.
+    """
+    serializer_class = None
+    converted_fields = ()
+
+    def __init__(self, instance, many=False):
+        self.instance = instance
+        self.many = many
+
+    @classmethod
+    def get_fields(cls):
+        return cls.serializer_class.Meta.fields
+
+    @classmethod
+    def get_values(cls, queryset):
+        return queryset.values(*cls.get_fields())
+
+    @classmethod
+    def get_converters(cls):
+        fields = cls.serializer_class().fields
+        return [(_f, fields[_f].to_representation) for _f in cls.converted_fields]
+
+    @property
+    def data(self):
+        converters = self.get_converters()
+        rows = self.instance if self.many else [self.instance]
+        data = []
+        for row in rows:
+            row = dict(row)
+            for field, to_representation in converters:
+                if row[field] is not None:
+                    row[field] = to_representation(row[field])
+            data.append(row)
+        return data if self.many else data[0]
+
+
+class UserReadSerializer(ValuesReadSerializer):
+    serializer_class = UserSerializer
+
+
+class CategoryReadSerializer(ValuesReadSerializer):
+    serializer_class = CategorySerializer
+
+
+class StateReadSerializer(ValuesReadSerializer):
+    serializer_class = StateSerializer
+
+
+def render_reference_data(serializer_class, version=None):
+    # JSON of all users / states / categories, a cache hit runs neither the ORM nor the serializer
+    model = serializer_class.serializer_class.Meta.model
+    # the data of the primary (where the version comes from) => a lagging replica never puts old data under <version>
+    queryset = model.objects.using(DEFAULT_DB_ALIAS).all()
+    return get_reference_cache(model).get_rendered(lambda: JSONRenderer().render(
+        serializer_class(serializer_class.get_values(queryset), many=True).data), version)
+
+
+class IssueReadSerializer(ValuesReadSerializer):
+    serializer_class = IssueSerializer
+    converted_fields = ('created_at', 'finished_at')
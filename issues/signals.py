@@ -1,7 +1,14 @@
-from django.contrib.auth.models import Permission
+from django.contrib.auth.models import Permission, User
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.signals import user_logged_in
 
+from .issue_cache import issue_cache
+from .models import Issue, State, Category, ChangeCounter, IssueTombstone
+from .reference_cache import get_reference_cache
+from .serializers import UserSerializer
+from .statistics import (invalidate_duration_statistics, update_statistics, snapshot_from_instance, SNAPSHOT_FIELDS)
+
 
 # Add or Remove 'Can view Issue' permission for user with/without staff role (if needed)
 @receiver(user_logged_in)
@@ -11,3 +18,77 @@ def post_login(sender, user, request, **kwargs):
         user.user_permissions.add(permission)
     if (not user.is_staff) and (not user.is_superuser) and (user.has_perm(permission)):
         user.user_permissions.remove(permission)
+
+
+# Drop cached reference data (in all processes) whenever it is changed
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=State)
+@receiver(post_delete, sender=State)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def reset_reference_cache(sender, update_fields=None, **kwargs):
+    # e.g. a login saves User.last_login only => neither the cached users nor the users API change
+    if sender is User and update_fields and not set(update_fields) & set(UserSerializer.Meta.fields):
+        return
+    # the persisted version changes in the transaction of the change => other processes see both together
+    get_reference_cache(sender).bump_version()
+
+
+def get_stored_values(issue):
+    # Values of the issue as they are stored in DB (the instance may have been changed since loading)
+    loaded_values = getattr(issue, '_loaded_values', {})
+    if all(_f in loaded_values for _f in SNAPSHOT_FIELDS):
+        return loaded_values
+    stored_values = Issue.objects.filter(pk=issue.pk).values(*SNAPSHOT_FIELDS).first()
+    return dict(loaded_values, **stored_values) if stored_values else None
+
+
+# Remember the issue's stored values before saving, the rollup statistics are updated by the difference
+@receiver(pre_save, sender=Issue)
+def remember_stored_values(sender, instance, raw=False, **kwargs):
+    # raw saves (loaddata) may overwrite an existing row even if the instance is marked as a new one
+    instance._stored_values = get_stored_values(instance) if (raw or not instance._state.adding) else None
+
+
+# loaddata saves issues raw (bypassing Issue.save) => they get a change sequence number here
+@receiver(pre_save, sender=Issue)
+def number_raw_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        instance.change_seq = ChangeCounter.next_value()
+
+
+@receiver(post_save, sender=Issue)
+def update_statistics_on_save(sender, instance, update_fields=None, **kwargs):
+    stored_values = getattr(instance, '_stored_values', None)
+    if update_fields is not None and stored_values:
+        # columns not listed in <update_fields> keep their stored values
+        saved_values = {_f: getattr(instance, _f) for _f in SNAPSHOT_FIELDS
+                        if instance._meta.get_field(_f).name in update_fields or _f in update_fields}
+    else:
+        saved_values = {_f: getattr(instance, _f) for _f in SNAPSHOT_FIELDS}
+    before = snapshot_from_instance(instance, stored_values) if stored_values else None
+    after = snapshot_from_instance(instance, dict(stored_values or {}, **saved_values))
+    update_statistics([(before, after)])
+    instance._loaded_values = dict(getattr(instance, '_loaded_values', {}), **saved_values)
+    invalidate_duration_statistics()
+
+
+@receiver(post_delete, sender=Issue)
+def update_statistics_on_delete(sender, instance, **kwargs):
+    stored_values = getattr(instance, '_loaded_values', {})
+    update_statistics([(snapshot_from_instance(instance, stored_values), None)])
+    invalidate_duration_statistics()
+
+
+# Deletion log of the change feed (API, admin and any other delete of issues)
+@receiver(post_delete, sender=Issue)
+def log_issue_deletion(sender, instance, **kwargs):
+    IssueTombstone.objects.create(issue_id=instance.pk, change_seq=ChangeCounter.next_value())
+
+
+# Cached responses of changed issues (API, admin and any other save/delete of a single issue)
+@receiver(post_save, sender=Issue)
+@receiver(post_delete, sender=Issue)
+def invalidate_issue_cache(sender, instance, **kwargs):
+    issue_cache.invalidate([instance.pk])
@@ -0,0 +1,96 @@
+import math
+
+
+class DurationSketch:
+    """ Mergeable quantile sketch of durations (DDSketch - logarithmically sized buckets).
+
+    Every quantile is returned with a relative error lower than <relative_accuracy>. Buckets only count values,
+    so the sketch supports removing of values and merging of sketches (sums of bucket counts).
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_bins=2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.zero_count = 0
+        self.bins = dict()
+
+    @property
+    def count(self):
+        return self.zero_count + sum(self.bins.values())
+
+    def key(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def value(self, key):
+        # representative value of the bucket <gamma^(key-1), gamma^key>
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value, count=1):
+        if value <= 0:
+            self.zero_count += count
+        else:
+            key = self.key(value)
+            self.bins[key] = self.bins.get(key, 0) + count
+            if not self.bins[key]:
+                del self.bins[key]
+            self._collapse()
+
+    def remove(self, value, count=1):
+        self.add(value, -count)
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('Only sketches with the same relative accuracy can be merged')
+        self.zero_count += other.zero_count
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+            if not self.bins[key]:
+                del self.bins[key]
+        self._collapse()
+        return self
+
+    def _collapse(self):
+        # keep the size bounded by merging the lowest buckets (highest quantiles stay accurate)
+        if len(self.bins) > self.max_bins:
+            keys = sorted(self.bins)
+            excess, target = keys[:len(keys) - self.max_bins], keys[len(keys) - self.max_bins]
+            self.bins[target] += sum(self.bins.pop(_k) for _k in excess)
+
+    def quantile(self, q):
+        total = self.count
+        if total <= 0:
+            return None
+        rank = q * (total - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                return self.value(key)
+        return self.value(max(self.bins))
+
+    def histogram(self, edges):
+        # counts of values in intervals <edges[i], edges[i + 1]), the last interval is open
+        counts = [0] * len(edges)
+        for key, count in self.bins.items():
+            value = self.value(key)
+            position = 0
+            while position + 1 < len(edges) and value >= edges[position + 1]:
+                position += 1
+            counts[position] += count
+        counts[0] += self.zero_count
+        return counts
+
+    def to_dict(self):
+        return {'a': self.relative_accuracy, 'z': self.zero_count, 'b': {str(_k): _v for _k, _v in self.bins.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(relative_accuracy=data.get('a', 0.01)) if data else cls()
+        if data:
+            sketch.zero_count = data.get('z', 0)
+            sketch.bins = {int(_k): _v for _k, _v in data.get('b', {}).items()}
+        return sketch
@@ -0,0 +1,245 @@
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum, Max, Min, F, Q, ExpressionWrapper, DurationField
+
+from .models import Issue, IssueStatistics
+from .sketch import DurationSketch
+
+
+STATISTICS_CACHE_KEY = 'issues:duration_statistics'
+
+# Values of an issue the rollup statistics depend on
+IssueSnapshot = namedtuple('IssueSnapshot', ('state_id', 'category_id', 'responsible_person_id', 'duration'))
+SNAPSHOT_FIELDS = ('state_id', 'category_id', 'responsible_person_id', 'created_at', 'finished_at')
+
+# Rollup dimensions and the Issue's columns they are grouped by
+DIMENSION_FIELDS = (
+    (IssueStatistics.STATE, 'state_id'),
+    (IssueStatistics.CATEGORY, 'category_id'),
+    (IssueStatistics.RESPONSIBLE_PERSON, 'responsible_person_id'),
+)
+
+
+def get_statistics_cache_timeout():
+    return getattr(settings, 'ISSUES_STATISTICS_CACHE_TIMEOUT', 60)
+
+
+def to_microseconds(duration):
+    return duration // timedelta(microseconds=1)
+
+
+def make_snapshot(state_id, category_id, responsible_person_id, created_at, finished_at):
+    duration = to_microseconds(finished_at - created_at) if finished_at is not None else None
+    return IssueSnapshot(state_id, category_id, responsible_person_id, duration)
+
+
+def snapshot_from_instance(issue, values=None):
+    # <values> (attname -> value) take precedence over the instance's attributes
+    values = values or {}
+    return make_snapshot(*[values[_f] if _f in values else getattr(issue, _f) for _f in SNAPSHOT_FIELDS])
+
+
+def get_group(dimension, object_id):
+    return dimension if dimension == IssueStatistics.TOTAL else f'{dimension}:{object_id}'
+
+
+def get_issue_groups(snapshot):
+    groups = [(IssueStatistics.TOTAL, IssueStatistics.TOTAL, None)]
+    for dimension, field in DIMENSION_FIELDS:
+        object_id = getattr(snapshot, field)
+        groups.append((get_group(dimension, object_id), dimension, object_id))
+    return groups
+
+
+def get_group_filter(dimension, object_id):
+    fields = dict(DIMENSION_FIELDS)
+    return Q(**{fields[dimension]: object_id}) if dimension in fields else Q()
+
+
+class GroupDelta:
+    def __init__(self, dimension, object_id):
+        self.dimension = dimension
+        self.object_id = object_id
+        self.issues_count = 0
+        self.open_count = 0
+        self.finished_count = 0
+        self.duration_sum = 0
+        self.added = []
+        self.removed = []
+
+    def apply(self, snapshot, sign):
+        self.issues_count += sign
+        if snapshot.duration is None:
+            self.open_count += sign
+        else:
+            self.finished_count += sign
+            self.duration_sum += sign * snapshot.duration
+            (self.added if sign > 0 else self.removed).append(snapshot.duration)
+
+    def is_empty(self):
+        return not (self.issues_count or self.open_count or self.finished_count or self.duration_sum or
+                    self.added or self.removed)
+
+
+def collect_deltas(changes):
+    # <changes> are pairs (snapshot before, snapshot after), None means the issue did not exist
+    deltas = dict()
+    for before, after in changes:
+        if before == after:
+            continue
+        for snapshot, sign in ((before, -1), (after, 1)):
+            if snapshot is None:
+                continue
+            for group, dimension, object_id in get_issue_groups(snapshot):
+                deltas.setdefault(group, GroupDelta(dimension, object_id)).apply(snapshot, sign)
+    return {group: delta for group, delta in deltas.items() if not delta.is_empty()}
+
+
+def recompute_min_max(row):
+    duration = ExpressionWrapper(F('finished_at') - F('created_at'), output_field=DurationField())
+    result = Issue.objects.filter(get_group_filter(row.dimension, row.object_id),
+                                  finished_at__isnull=False).aggregate(min=Min(duration), max=Max(duration))
+    row.duration_min = to_microseconds(result['min']) if result['min'] is not None else None
+    row.duration_max = to_microseconds(result['max']) if result['max'] is not None else None
+
+
+def update_statistics(changes):
+    deltas = collect_deltas(changes)
+    if not deltas:
+        return
+    with transaction.atomic(savepoint=False):
+        rows = {_r.group: _r for _r in IssueStatistics.objects.select_for_update().filter(group__in=deltas.keys())}
+        new_rows, changed_rows = [], []
+        for group, delta in deltas.items():
+            row = rows.get(group)
+            if row is None:
+                row = IssueStatistics(group=group, dimension=delta.dimension, object_id=delta.object_id)
+                new_rows.append(row)
+            else:
+                changed_rows.append(row)
+            row.issues_count += delta.issues_count
+            row.open_count += delta.open_count
+            row.finished_count += delta.finished_count
+            row.duration_sum += delta.duration_sum
+            if delta.added or delta.removed:
+                sketch = DurationSketch.from_dict(row.duration_sketch)
+                for duration in delta.added:
+                    sketch.add(duration)
+                for duration in delta.removed:
+                    sketch.remove(duration)
+                row.duration_sketch = sketch.to_dict()
+            if row.duration_min in delta.removed or row.duration_max in delta.removed:
+                # an extreme value was removed => the new one is known only to DB (already contains the change)
+                recompute_min_max(row)
+            elif delta.added:
+                row.duration_min = min(delta.added + ([row.duration_min] if row.duration_min is not None else []))
+                row.duration_max = max(delta.added + ([row.duration_max] if row.duration_max is not None else []))
+        IssueStatistics.objects.bulk_create(new_rows)
+        IssueStatistics.objects.bulk_update(changed_rows, ('issues_count', 'open_count', 'finished_count',
+                                                           'duration_sum', 'duration_min', 'duration_max',
+                                                           'duration_sketch'))
+
+
+def build_statistics(issue_model):
+    # Aggregate rollup rows of all groups from scratch (<issue_model> may be a historical model in migrations)
+    duration = ExpressionWrapper(F('finished_at') - F('created_at'), output_field=DurationField())
+    aggregates = dict(issues_count=Count('id'), open_count=Count('id', filter=Q(finished_at__isnull=True)),
+                      finished_count=Count('id', filter=Q(finished_at__isnull=False)),
+                      duration_sum=Sum(duration, filter=Q(finished_at__isnull=False)),
+                      duration_min=Min(duration, filter=Q(finished_at__isnull=False)),
+                      duration_max=Max(duration, filter=Q(finished_at__isnull=False)))
+    issues = issue_model.objects.order_by()
+    results = [(IssueStatistics.TOTAL, IssueStatistics.TOTAL, None, issues.aggregate(**aggregates))]
+    for dimension, field in DIMENSION_FIELDS:
+        for values in issues.values(field).annotate(**aggregates):
+            results.append((get_group(dimension, values[field]), dimension, values[field], values))
+
+    # sketches need every single duration => one pass over finished issues
+    sketches = {_r[0]: DurationSketch() for _r in results}
+    finished_issues = issues.filter(finished_at__isnull=False).values_list(*SNAPSHOT_FIELDS)
+    for values in finished_issues.iterator(chunk_size=2000):
+        snapshot = make_snapshot(*values)
+        for group, _dimension, _object_id in get_issue_groups(snapshot):
+            sketches[group].add(snapshot.duration)
+
+    rows = []
+    for group, dimension, object_id, values in results:
+        for _f in ('duration_sum', 'duration_min', 'duration_max'):
+            values[_f] = to_microseconds(values[_f]) if values[_f] is not None else None
+        values['duration_sum'] = values['duration_sum'] or 0
+        rows.append(dict(group=group, dimension=dimension, object_id=object_id,
+                         duration_sketch=sketches[group].to_dict(), **{_f: values[_f] for _f in aggregates}))
+    return rows
+
+
+def rebuild_statistics(issue_model=Issue, statistics_model=IssueStatistics):
+    # historical models in migrations may not have all the columns yet
+    field_names = {_f.name for _f in statistics_model._meta.concrete_fields}
+    rows = [{_k: _v for _k, _v in _r.items() if _k in field_names} for _r in build_statistics(issue_model)]
+    with transaction.atomic():
+        statistics_model.objects.all().delete()
+        statistics_model.objects.bulk_create([statistics_model(**_r) for _r in rows])
+    invalidate_duration_statistics()
+
+
+def get_group_statistics(group):
+    try:
+        return IssueStatistics.objects.get(pk=group)
+    except IssueStatistics.DoesNotExist:
+        return IssueStatistics(group=group)
+
+
+def compute_duration_statistics():
+    # avg/max/min of <finished_at - created_at> read from the rollup row of all issues
+    row = get_group_statistics(IssueStatistics.TOTAL)
+    if not row.finished_count:
+        return dict(avg=None, max=None, min=None)
+    return dict(avg=timedelta(microseconds=row.duration_sum / row.finished_count),
+                max=timedelta(microseconds=row.duration_max), min=timedelta(microseconds=row.duration_min))
+
+
+def get_duration_statistics():
+    statistics = cache.get(STATISTICS_CACHE_KEY)
+    if statistics is None:
+        statistics = compute_duration_statistics()
+        cache.set(STATISTICS_CACHE_KEY, statistics, get_statistics_cache_timeout())
+    return statistics
+
+
+def invalidate_duration_statistics():
+    cache.delete(STATISTICS_CACHE_KEY)
+
+
+PERCENTILES = (50, 90, 99)
+# Bounds (seconds) of histogram buckets: 1 hour, 4 hours, 8 hours, 1 day, 3 days, 1 week, 2 weeks, 30 days
+HISTOGRAM_EDGES = (0, 3600, 4 * 3600, 8 * 3600, 86400, 3 * 86400, 7 * 86400, 14 * 86400, 30 * 86400)
+
+
+def to_seconds(microseconds):
+    return round(microseconds / 1000000) if microseconds is not None else None
+
+
+def summarize_durations(groups):
+    # Merge rollup rows of given groups (e.g. several categories) into percentiles and histogram of durations
+    sketch, finished_count, duration_sum, duration_min, duration_max = DurationSketch(), 0, 0, None, None
+    for row in IssueStatistics.objects.filter(group__in=groups):
+        sketch.merge(DurationSketch.from_dict(row.duration_sketch))
+        finished_count += row.finished_count
+        duration_sum += row.duration_sum
+        if row.duration_min is not None:
+            duration_min = row.duration_min if duration_min is None else min(duration_min, row.duration_min)
+            duration_max = row.duration_max if duration_max is None else max(duration_max, row.duration_max)
+    edges = [_e * 1000000 for _e in HISTOGRAM_EDGES]
+    return {
+        'finished_count': finished_count,
+        'avg': to_seconds(duration_sum / finished_count) if finished_count else None,
+        'min': to_seconds(duration_min),
+        'max': to_seconds(duration_max),
+        'percentiles': {f'p{_p}': to_seconds(sketch.quantile(_p / 100)) for _p in PERCENTILES},
+        'histogram': [{'from': HISTOGRAM_EDGES[_i], 'to': HISTOGRAM_EDGES[_i + 1] if _i + 1 < len(edges) else None,
+                       'count': _c} for _i, _c in enumerate(sketch.histogram(edges))],
+    }
@@ -0,0 +1,74 @@
+import re
+from datetime import datetime
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from ..models import Issue, State, Category
+
+
+class IssueAdminChangelistTest(TestCase):
+    """ Test module for the changelist of issues in admin """
+
+    def setUp(self):
+        State.objects.create(name='New', mark_issue_as_finished=False)
+        State.objects.create(name='Finished', mark_issue_as_finished=True)
+        Category.objects.create(name='Bug')
+        User.objects.create(username='first_superuser', password='Super001', is_superuser=True, is_staff=True)
+        self.client.force_login(User.objects.get(username='first_superuser'))
+        self.add_issues(5)
+
+    def add_issues(self, count):
+        user = User.objects.get(username='first_superuser')
+        for index in range(count):
+            Issue.objects.create(name=f'Issue {index}', description='Dlouhý popis ' * 50, creator=user,
+                                 responsible_person=user, category=Category.objects.get(name='Bug'),
+                                 state=State.objects.get(name='New' if index % 2 else 'Finished'),
+                                 created_at=datetime(2020 + index % 2, 1 + index % 3, 1 + index % 5, 12, 0, 0),
+                                 finished_at=None if index % 2 else datetime(2022, 1, 1, 12, 0, 0))
+
+    def get_changelist(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/issues/issue/', params)
+        self.assertEqual(response.status_code, 200)
+        return response, queries
+
+    def test_queries_do_not_grow_with_rows(self):
+        _, queries = self.get_changelist()
+        self.add_issues(20)
+        response, more_queries = self.get_changelist()
+        self.assertEqual(len(response.context['cl'].result_list), 25)
+        self.assertEqual(len(queries), len(more_queries))
+        # no COUNT(*) of issues without filters, the total comes from the rollup statistics
+        self.assertEqual(response.context['cl'].result_count, 25)
+        self.assertFalse([_q for _q in more_queries if 'COUNT(*)' in _q['sql'] and '"issues_issue"' in _q['sql']])
+        # the whole description is not loaded
+        self.assertFalse([_q for _q in more_queries
+                          if re.search(r'(?<!SUBSTR\()"issues_issue"\."description"', _q['sql'])])
+        # MIN/MAX of date_hierarchy without a subquery
+        self.assertFalse([_q for _q in more_queries if 'subquery' in _q['sql']])
+
+    def test_truncated_description(self):
+        response, _ = self.get_changelist()
+        self.assertContains(response, 'Dlouhý popis Dlouhý popis')
+        self.assertContains(response, '…')
+        self.assertNotContains(response, 'Dlouhý popis ' * 10)
+
+    def test_filters_and_counts(self):
+        state = State.objects.get(name='New')
+        response, _ = self.get_changelist(state__id__exact=state.id)
+        self.assertEqual(response.context['cl'].result_count, Issue.objects.filter(state=state).count())
+        response, _ = self.get_changelist(state__id__exact=state.id, category__id__exact=Category.objects.get().id)
+        self.assertEqual(response.context['cl'].result_count, Issue.objects.filter(state=state).count())
+
+    def test_date_hierarchy(self):
+        for kind, params in (('year', {}), ('month', {'created_at__year': 2020}),
+                             ('day', {'created_at__year': 2020, 'created_at__month': 1})):
+            issues = Issue.objects.filter(**params)
+            expected = list(QuerySet.datetimes(issues, 'created_at', kind))
+            self.assertEqual(list(issues.datetimes('created_at', kind)), expected)
+            self.assertEqual(list(issues.datetimes('created_at', kind, 'DESC')), expected[::-1])
+        self.get_changelist(created_at__year=2020)
+        self.get_changelist(created_at__year=2020, created_at__month=1)
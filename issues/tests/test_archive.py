@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth.models import User
+from ..archive import archive_issues, restore_issues
+from ..changes import get_changes
+from ..models import Issue, ArchivedIssue, State, Category, IssueStatistics, IssueTombstone
+from ..statistics import build_statistics
+
+
+client = Client()
+
+
+class ArchiveTest(TestCase):
+    """ Test module for moving finished issues to the archive and back """
+
+    def setUp(self):
+        State.objects.create(name='New', mark_issue_as_finished=False)
+        State.objects.create(name='Finished', mark_issue_as_finished=True)
+        Category.objects.create(name='Bug')
+        User.objects.create(username='first_superuser', password='Super001', is_superuser=True, is_staff=True)
+
+        user = User.objects.get(username='first_superuser')
+        old = datetime.now() - timedelta(days=400)
+        for index in range(5):
+            Issue.objects.create(name=f'Old {index}', description='Stará chyba', creator=user,
+                                 responsible_person=user, state=State.objects.get(name='Finished'),
+                                 category=Category.objects.get(name='Bug'), created_at=old,
+                                 finished_at=old + timedelta(days=index + 1))
+        Issue.objects.create(name='Recent', description='Nová chyba', creator=user, responsible_person=user,
+                             state=State.objects.get(name='Finished'), category=Category.objects.get(name='Bug'),
+                             created_at=datetime.now() - timedelta(days=2), finished_at=datetime.now())
+        Issue.objects.create(name='Open', description='Otevřená chyba', creator=user, responsible_person=user,
+                             state=State.objects.get(name='New'), category=Category.objects.get(name='Bug'),
+                             created_at=old)
+
+    def assertStatisticsConsistent(self):
+        fields = ('group', 'issues_count', 'open_count', 'finished_count', 'duration_sum')
+        stored = set(IssueStatistics.objects.filter(issues_count__gt=0).values_list(*fields))
+        self.assertEqual(stored, {tuple(_r[_f] for _f in fields) for _r in build_statistics(Issue)})
+
+    def test_archive_in_batches_and_restore(self):
+        ids = set(Issue.objects.filter(name__startswith='Old').values_list('id', flat=True))
+        self.assertEqual(archive_issues(days=365, batch_size=2), 5)
+        self.assertEqual(set(ArchivedIssue.objects.values_list('id', flat=True)), ids)
+        self.assertEqual(set(Issue.objects.values_list('name', flat=True)), {'Recent', 'Open'})
+        self.assertEqual(set(IssueTombstone.objects.values_list('issue_id', flat=True)), ids)
+        self.assertStatisticsConsistent()
+
+        self.assertEqual(restore_issues(list(ids)[:2]), 2)
+        self.assertEqual(Issue.objects.count(), 4)
+        self.assertEqual(ArchivedIssue.objects.count(), 3)
+        self.assertStatisticsConsistent()
+
+    def test_change_feed(self):
+        ids = sorted(Issue.objects.filter(name__startswith='Old').values_list('id', flat=True))
+        checkpoint = get_changes(0, 100)['checkpoint']
+        archive_issues(days=365)
+        changes = get_changes(int(checkpoint), 100)
+        self.assertEqual((changes['issues'], changes['deleted']), ([], ids))
+        restore_issues(ids[:2])
+        self.assertEqual(set(IssueTombstone.objects.values_list('issue_id', flat=True)), set(ids[2:]))
+        # a client synced before archiving gets the restored issues as changed, not deleted
+        changes = get_changes(int(checkpoint), 100)
+        self.assertEqual([_i['id'] for _i in changes['issues']], ids[:2])
+        self.assertEqual(changes['deleted'], ids[2:])
+        # as does a client synced after archiving
+        changes = get_changes(int(get_changes(int(checkpoint), 1)['checkpoint']), 100)
+        self.assertEqual([_i['id'] for _i in changes['issues']], ids[:2])
+
+    def test_command(self):
+        call_command('archive_issues', days=1000, batch_size=10, stdout=StringIO())
+        self.assertEqual(ArchivedIssue.objects.count(), 0)
+        call_command('archive_issues', days=1, batch_size=10, stdout=StringIO())
+        self.assertEqual(ArchivedIssue.objects.count(), 5)
+
+    def test_api_include_archived(self):
+        archive_issues(days=365)
+        client.force_login(User.objects.get(username='first_superuser'))
+        response = client.get(reverse('get_post_issues'))
+        self.assertEqual([_i['name'] for _i in response.data], ['Recent', 'Open'])
+        names = []
+        url = reverse('get_post_issues') + '?include_archived=1&page_size=3'
+        while url:
+            response = client.get(url)
+            names += [_i['name'] for _i in response.data]
+            url = response['Link'][1:response['Link'].index('>')] if response.has_header('Link') else None
+        self.assertEqual(names, ['Recent', 'Old 0', 'Old 1', 'Old 2', 'Old 3', 'Old 4', 'Open'])
+
+        response = client.get(reverse('get_issues_search'), {'q': 'chyba'})
+        self.assertEqual(len(response.data), 2)
+        response = client.get(reverse('get_issues_search'), {'q': 'stara', 'include_archived': '1'})
+        self.assertEqual(len(response.data), 5)
+
+    def test_admin_restore(self):
+        archive_issues(days=365)
+        client.force_login(User.objects.get(username='first_superuser'))
+        response = client.get('/admin/issues/archivedissue/', {'q': 'stara'})
+        self.assertEqual(response.context['cl'].result_count, 5)
+        archived = ArchivedIssue.objects.get(name='Old 0')
+        client.post('/admin/issues/archivedissue/', {'action': 'restore_selected', '_selected_action': [archived.id]})
+        self.assertTrue(Issue.objects.filter(pk=archived.id, name='Old 0').exists())
+        self.assertFalse(ArchivedIssue.objects.filter(pk=archived.id).exists())
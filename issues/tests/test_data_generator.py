@@ -0,0 +1,47 @@
+import json
+from collections import Counter
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.contrib.auth.models import User
+from ..data_generator import generate_data
+from ..models import Issue, IssueStatistics
+from ..statistics import build_statistics
+
+
+class DataGeneratorTest(TestCase):
+    """ Test module for the synthetic data generator and the endpoint benchmark """
+
+    def test_generate_data(self):
+        self.assertEqual(generate_data(300, users_count=10, categories_count=5, batch_size=70, seed=1), 300)
+        self.assertEqual(Issue.objects.count(), 300)
+        # every issue was created by a superuser, finished ones have a valid finished_at
+        self.assertFalse(Issue.objects.filter(creator__is_superuser=False).exists())
+        for created_at, finished_at, finished in Issue.objects.values_list('created_at', 'finished_at',
+                                                                          'state__mark_issue_as_finished'):
+            self.assertEqual(finished_at is not None, finished)
+            self.assertTrue(finished_at is None or finished_at >= created_at)
+        # skewed distribution: the most frequent category has more issues than the least frequent one
+        counts = Counter(Issue.objects.values_list('category_id', flat=True)).most_common()
+        self.assertGreater(counts[0][1], 2 * counts[-1][1])
+        # unique change sequence numbers, statistics rebuilt
+        self.assertEqual(len(set(Issue.objects.values_list('change_seq', flat=True))), 300)
+        fields = ('group', 'issues_count', 'open_count', 'finished_count', 'duration_sum')
+        self.assertEqual(set(IssueStatistics.objects.filter(issues_count__gt=0).values_list(*fields)),
+                         {tuple(_r[_f] for _f in fields) for _r in build_statistics(Issue)})
+
+    def test_commands(self):
+        call_command('generate_data', issues=50, users=5, categories=3, seed=2, stdout=StringIO(), stderr=StringIO())
+        call_command('generate_data', issues=50, users=5, categories=3, seed=2, stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(Issue.objects.count(), 100)
+        username = User.objects.filter(is_superuser=True).first().username
+        output = StringIO()
+        call_command('benchmark_endpoints', username=username, requests=2, host='testserver', stdout=output,
+                     stderr=StringIO(), only=['get_post_issues', 'admin:issues_issue_changelist'])
+        results = json.loads(output.getvalue())
+        self.assertEqual(set(results['endpoints']), {'get_post_issues', 'admin:issues_issue_changelist'})
+        for result in results['endpoints'].values():
+            self.assertEqual((result['requests'], result['errors']), (2, 0))
+            for key in ('requests_per_second', 'p50_ms', 'p99_ms', 'queries_per_request', 'peak_memory_kb'):
+                self.assertIsNotNone(result[key])
@@ -0,0 +1,126 @@
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth.models import User
+from ..archive import archive_issues, restore_issues
+from ..issue_cache import IssueCache, issue_cache
+from ..models import Issue, State, Category
+
+
+client = Client()
+
+
+# the local memory cache of tests stands in for a shared one
+@override_settings(ISSUES_ISSUE_CACHE=True)
+class IssueCacheTest(TestCase):
+    """ Test module for the cache of single issue responses """
+
+    def setUp(self):
+        cache.clear()
+        State.objects.create(name='New', mark_issue_as_finished=False)
+        State.objects.create(name='Finished', mark_issue_as_finished=True)
+        Category.objects.create(name='Bug')
+        User.objects.create(username='first_superuser', password='Super001', is_superuser=True, is_staff=True)
+
+        user = User.objects.get(username='first_superuser')
+        for index in range(3):
+            Issue.objects.create(name=f'Issue {index}', description='Chyba', creator=user, responsible_person=user,
+                                 state=State.objects.get(name='New'), category=Category.objects.get(name='Bug'),
+                                 created_at=datetime(2021, 9, index + 1, 12, 0, 0))
+        client.force_login(user)
+
+    def get_issue(self, issue):
+        return client.get(reverse('get_delete_update_issue', kwargs={'pk': issue.pk}))
+
+    def test_hit_without_issue_queries(self):
+        issue = Issue.objects.get(name='Issue 0')
+        content = self.get_issue(issue).content
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get_issue(issue)
+        self.assertEqual(response.content, content)
+        self.assertFalse([_q for _q in queries if 'issues_issue' in _q['sql']])
+
+    def test_etag_of_cached_issue(self):
+        issue = Issue.objects.get(name='Issue 0')
+        etag = self.get_issue(issue)['ETag']
+        response = client.get(reverse('get_delete_update_issue', kwargs={'pk': issue.pk}), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_invalidation_on_api_writes(self):
+        issue = Issue.objects.get(name='Issue 0')
+        self.get_issue(issue)
+        client.patch(reverse('get_delete_update_issue', kwargs={'pk': issue.pk}),
+                     data=json.dumps({'name': 'Renamed'}), content_type='application/json')
+        self.assertEqual(json.loads(self.get_issue(issue).content)['name'], 'Renamed')
+        client.delete(reverse('get_delete_update_issue', kwargs={'pk': issue.pk}))
+        self.assertEqual(self.get_issue(issue).status_code, 404)
+
+    def test_invalidation_on_model_save(self):
+        # the admin saves instances the same way
+        issue = Issue.objects.get(name='Issue 0')
+        self.get_issue(issue)
+        issue.description = 'Jiná chyba'
+        issue.save()
+        self.assertEqual(json.loads(self.get_issue(issue).content)['description'], 'Jiná chyba')
+
+    def test_invalidation_on_bulk_transition(self):
+        issues = list(Issue.objects.all())
+        for issue in issues:
+            self.get_issue(issue)
+        response = client.post(reverse('post_issues_transition'), content_type='application/json',
+                               data=json.dumps({'state_id': State.objects.get(name='Finished').id,
+                                                'ids': [_i.id for _i in issues]}))
+        self.assertEqual(response.status_code, 200)
+        for issue in issues:
+            self.assertEqual(json.loads(self.get_issue(issue).content)['state_id'],
+                             State.objects.get(name='Finished').id)
+
+    def test_invalidation_on_archive_and_restore(self):
+        issue = Issue.objects.get(name='Issue 0')
+        Issue.objects.filter(pk=issue.pk).update(finished_at=datetime.now() - timedelta(days=400))
+        issue_cache.invalidate([issue.pk])
+        self.get_issue(issue)
+        archive_issues(days=365)
+        self.assertEqual(self.get_issue(issue).status_code, 404)
+        restore_issues([issue.pk])
+        self.assertEqual(self.get_issue(issue).status_code, 200)
+
+    def test_get_many(self):
+        issues = list(Issue.objects.order_by('id'))
+        issue_cache.get(issues[0].pk)
+        hits, misses = issue_cache.hits, issue_cache.misses
+        with CaptureQueriesContext(connection) as queries:
+            entries = issue_cache.get_many([issues[2].pk, issues[0].pk, 0, issues[1].pk])
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(set(entries), {_i.pk for _i in issues})
+        self.assertEqual(entries[issues[2].pk]['data']['name'], 'Issue 2')
+        self.assertEqual((issue_cache.hits - hits, issue_cache.misses - misses), (1, 3))
+        with self.assertNumQueries(0):
+            self.assertEqual(len(issue_cache.get_many([_i.pk for _i in issues])), 3)
+
+    @override_settings(ISSUES_ISSUE_CACHE=None)
+    def test_off_with_local_cache(self):
+        # entries of one process would outlive the writes of others => always read from DB
+        self.assertFalse(issue_cache.is_enabled())
+        issue = Issue.objects.get(name='Issue 0')
+        self.get_issue(issue)
+        Issue.objects.filter(pk=issue.pk).update(name='Renamed elsewhere')
+        self.assertEqual(json.loads(self.get_issue(issue).content)['name'], 'Renamed elsewhere')
+        with self.settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+                                               'LOCATION': '127.0.0.1:11211'}}):
+            self.assertTrue(issue_cache.is_enabled())
+
+    @override_settings(ISSUES_ISSUE_CACHE=False)
+    def test_not_modified_without_serialization(self):
+        issue = Issue.objects.get(name='Issue 0')
+        etag = self.get_issue(issue)['ETag']
+        with patch.object(IssueCache, 'load', side_effect=AssertionError('serialized')):
+            response = client.get(reverse('get_delete_update_issue', kwargs={'pk': issue.pk}),
+                                  HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
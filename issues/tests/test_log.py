@@ -0,0 +1,40 @@
+import json
+import logging
+
+from django.test import SimpleTestCase
+from ..log import JsonFormatter, QueueListenerHandler
+
+
+class CollectingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_record(message, **extra):
+    record = logging.LogRecord('issues.test', logging.WARNING, __file__, 1, message, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class LoggingTest(SimpleTestCase):
+    """ Test module for the queued structured logging """
+
+    def test_json_formatter(self):
+        data = json.loads(JsonFormatter().format(make_record('Pomalý dotaz', duration=0.25, sql='SELECT 1')))
+        self.assertEqual((data['level'], data['logger'], data['message']), ('WARNING', 'issues.test', 'Pomalý dotaz'))
+        self.assertEqual((data['duration'], data['sql']), (0.25, 'SELECT 1'))
+        self.assertIn('time', data)
+
+    def test_queue_handler_writes_in_background(self):
+        target = CollectingHandler()
+        handler = QueueListenerHandler([target])
+        try:
+            handler.handle(make_record('Zpráva 1'))
+        finally:
+            # stopping the listener writes the queued records
+            handler.close()
+        self.assertEqual([_r.getMessage() for _r in target.records], ['Zpráva 1'])
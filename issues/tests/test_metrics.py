@@ -0,0 +1,71 @@
+import asyncio
+import re
+import threading
+
+from asgiref.sync import async_to_sync
+from django.test import TestCase, AsyncClient
+from django.urls import reverse
+from django.contrib.auth.models import User
+from ..metrics import MetricsRegistry, registry, LATENCY_BUCKETS
+from ..middleware import ReplicaStickinessMiddleware, QueryBudgetMiddleware, MetricsMiddleware
+from ..models import State
+
+
+class MetricsTest(TestCase):
+    """ Test module for request metrics and the /metrics endpoint """
+
+    def setUp(self):
+        State.objects.create(name='New', mark_issue_as_finished=False)
+        User.objects.create(username='first_staff', password='ReadOnly001', is_staff=True)
+        User.objects.create(username='not_allowed_1', password='CanDoNothing1')
+        registry.reset()
+
+    def test_shards_are_merged(self):
+        metrics = MetricsRegistry()
+        threads = [threading.Thread(target=lambda: [metrics.record_request('view', 'GET', 200, 0.02, 3, 0.001)
+                                                    for _ in range(100)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        merged = metrics.collect()
+        self.assertEqual(merged.requests[('view', 'GET', '200')], 400)
+        self.assertEqual(merged.latency_buckets['view'][LATENCY_BUCKETS.index(0.025)], 400)
+        self.assertEqual(merged.queries['view'], 1200)
+
+    def test_metrics_endpoint(self):
+        client = self.client
+        client.force_login(User.objects.get(username='first_staff'))
+        client.get(reverse('get_all_states'))
+        client.get(reverse('get_all_states'))
+        response = client.get(reverse('get_metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        content = response.content.decode()
+        self.assertIn('tracker_requests_total{view="get_all_states",method="GET",status="200"} 2', content)
+        self.assertIn('tracker_request_duration_seconds_count{view="get_all_states"} 2', content)
+        self.assertIn('tracker_request_duration_seconds_bucket{view="get_all_states",le="+Inf"} 2', content)
+        self.assertIn('tracker_db_queries_total{view="get_all_states"}', content)
+        self.assertIn('tracker_cache_hit_ratio{cache="reference:issues.state"}', content)
+
+    def test_metrics_403(self):
+        self.assertEqual(self.client.get(reverse('get_metrics')).status_code, 403)
+        self.client.force_login(User.objects.get(username='not_allowed_1'))
+        self.assertEqual(self.client.get(reverse('get_metrics')).status_code, 403)
+
+    def test_async_requests(self):
+        async def get_response(request):
+            pass
+        # Django does not wrap these middlewares in sync_to_async when the next handler is async
+        for middleware in (ReplicaStickinessMiddleware, MetricsMiddleware):
+            self.assertTrue(asyncio.iscoroutinefunction(middleware(get_response)))
+        # the query budget runs in the thread of the DB access => queries of async requests are counted too
+        self.assertFalse(getattr(QueryBudgetMiddleware, 'async_capable', False))
+        client = AsyncClient()
+        client.force_login(User.objects.get(username='first_staff'))
+        self.assertEqual(async_to_sync(client.get)(reverse('async_get_all_states')).status_code, 200)
+        self.client.force_login(User.objects.get(username='first_staff'))
+        content = self.client.get(reverse('get_metrics')).content.decode()
+        self.assertIn('tracker_requests_total{view="async_get_all_states",method="GET",status="200"} 1', content)
+        queries = re.search(r'^tracker_db_queries_total\{view="async_get_all_states"\} (\d+)$', content, re.M)
+        self.assertGreater(int(queries.group(1)), 0)
@@ -1,8 +1,12 @@
 from datetime import datetime
+from io import StringIO
 
+from django.conf import settings
+from django.core.management import call_command
 from django.test import TestCase
 from django.db import utils
 from django.contrib.auth.models import User
+from ..changes import get_changes, INITIAL_CHECKPOINT
 from ..models import State, Category, Issue
 
 
@@ -269,3 +273,20 @@ class IssueTest(TestCase):
                                      category=category, responsible_person=user)
         issue.delete()
         self.assertEqual(len(Issue.objects.filter(pk=issue.id)), 0)
+
+
+class DataFixtureTest(TestCase):
+    """ Test module for the DB dump of README (data.json) """
+
+    def test_loaddata(self):
+        call_command('loaddata', str(settings.BASE_DIR / 'data.json'), stdout=StringIO())
+        self.assertEqual(Issue.objects.count(), 9)
+        # raw saves of loaddata skip auto_now => the dump carries the last change of every issue
+        for issue in Issue.objects.all():
+            self.assertGreaterEqual(issue.updated_at, issue.finished_at or issue.created_at)
+
+    def test_loaded_issues_are_paged_by_change_feed(self):
+        call_command('loaddata', str(settings.BASE_DIR / 'data.json'), stdout=StringIO())
+        self.assertEqual(len(set(Issue.objects.values_list('change_seq', flat=True))), 9)
+        changes = get_changes(INITIAL_CHECKPOINT, 5)
+        self.assertEqual((len(changes['issues']), changes['has_more']), (5, True))
@@ -0,0 +1,92 @@
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from ..models import Issue, State, Category
+from ..query_budget import get_query_template, record_queries, logger
+from .utils import QueryBudgetMixin
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    """ Test module for the query budgets of the issues API """
+
+    def setUp(self):
+        State.objects.create(name='New', mark_issue_as_finished=False)
+        State.objects.create(name='Finished', mark_issue_as_finished=True)
+        Category.objects.create(name='Bug')
+        User.objects.create(username='first_superuser', password='Super001', is_superuser=True, is_staff=True)
+
+        user = User.objects.get(username='first_superuser')
+        for index in range(20):
+            Issue.objects.create(name=f'Issue {index}', description='Popis', creator=user, responsible_person=user,
+                                 state=State.objects.get(name='New'), category=Category.objects.get(name='Bug'),
+                                 created_at=datetime(2021, 9, 1, 12, 0, 0))
+        self.client.force_login(user)
+        self.payload = {'name': 'New issue', 'description': '...', 'creator_id': user.id,
+                        'responsible_person_id': user.id, 'state_id': State.objects.get(name='New').id,
+                        'category_id': Category.objects.get(name='Bug').id, 'created_at': '2021-09-01T12:00:00'}
+
+    def test_read_views(self):
+        pk = Issue.objects.first().pk
+        for url_name, kwargs, params in (('get_delete_update_issue', {'pk': pk}, {}),
+                                         ('get_post_issues', {}, {'include_archived': '1'}),
+                                         ('get_issue_changes', {}, {}),
+                                         ('get_issues_search', {}, {'q': 'popis'}),
+                                         ('get_all_users', {}, {}),
+                                         ('get_all_states', {}, {}),
+                                         ('get_all_categories', {}, {}),
+                                         ('get_duration_stats', {}, {}),
+                                         ('async_get_issue', {'pk': pk}, {}),
+                                         ('async_get_issues', {}, {})):
+            with self.assertQueryBudget(url_name):
+                self.assertEqual(self.client.get(reverse(url_name, kwargs=kwargs), params).status_code, 200)
+
+    def test_write_views(self):
+        url = reverse('get_delete_update_issue', kwargs={'pk': Issue.objects.first().pk})
+        with self.assertQueryBudget('get_delete_update_issue'):
+            self.client.put(url, data=json.dumps(self.payload), content_type='application/json')
+        with self.assertQueryBudget('get_post_issues'):
+            self.client.post(reverse('get_post_issues'), data=json.dumps(self.payload),
+                             content_type='application/json')
+        with self.assertQueryBudget('post_bulk_issues'):
+            self.client.post(reverse('post_bulk_issues'), data=json.dumps([self.payload] * 50),
+                             content_type='application/json')
+        with self.assertQueryBudget('post_issues_transition'):
+            self.client.post(reverse('post_issues_transition'), content_type='application/json',
+                             data=json.dumps({'state_id': State.objects.get(name='Finished').id,
+                                              'filter': {'category': Category.objects.get(name='Bug').id}}))
+        with self.assertQueryBudget('get_delete_update_issue'):
+            self.client.delete(url)
+
+    @override_settings(ISSUES_QUERY_DEBUG_HEADERS=True, ISSUES_QUERY_BUDGETS={'get_all_states': 1})
+    def test_middleware_warns_and_sets_headers(self):
+        with self.assertLogs('issues.queries', 'WARNING') as logs:
+            response = self.client.get(reverse('get_all_states'))
+        self.assertIn('budget 1', logs.output[0])
+        self.assertGreater(int(response['X-Query-Count']), 1)
+        self.assertIn('X-Query-Time-Ms', response)
+        self.assertEqual(response['X-Query-Repeated'], '0')
+
+    def test_repeated_queries(self):
+        self.assertEqual(get_query_template('SELECT 1 FROM t WHERE id IN (%s, %s, %s)'),
+                         get_query_template('SELECT 1 FROM t WHERE id IN (%s)'))
+        with record_queries() as recorder:
+            for issue in Issue.objects.all():
+                issue.state.name
+        self.assertEqual(recorder.count, 21)
+        self.assertEqual(recorder.get_repeated()[0][1], 20)
+
+    @override_settings(ISSUES_SLOW_SQL_SECONDS=0, ISSUES_SLOW_SQL_SAMPLE_RATE=1.0)
+    def test_slow_queries_sampled(self):
+        # logged without DEBUG (the query log of django.db.backends is written in DEBUG mode only)
+        with self.assertLogs('issues.sql', 'WARNING') as logs, record_queries():
+            State.objects.count()
+        self.assertIn('issues_state', logs.records[0].sql)
+        self.assertGreaterEqual(logs.records[0].duration, 0)
+        with self.settings(ISSUES_SLOW_SQL_SAMPLE_RATE=0.0), patch.object(logger, 'warning') as warning, \
+                record_queries():
+            State.objects.count()
+        warning.assert_not_called()
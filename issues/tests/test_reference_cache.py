@@ -0,0 +1,68 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from ..models import State, Category, ChangeCounter, validate_superuser
+from ..reference_cache import ReferenceCache, get_reference_cache
+from ..serializers import IssueSerializer
+
+
+class ReferenceCacheTest(TestCase):
+    """ Test module for the in-process cache of states, categories and users """
+
+    def setUp(self):
+        State.objects.create(name='New', mark_issue_as_finished=False)
+        Category.objects.create(name='Bug')
+        User.objects.create(username='first_superuser', password='Super001', is_superuser=True)
+
+    def test_cached_lookup_without_queries(self):
+        state = State.objects.get(name='New')
+        self.assertEqual(IssueSerializer.validate_instance_of_model_exists(State, state.id).name, 'New')
+        with self.assertNumQueries(0):
+            self.assertEqual(IssueSerializer.validate_instance_of_model_exists(State, state.id).name, 'New')
+
+    def test_validate_superuser_uses_cache(self):
+        user_id = User.objects.get(username='first_superuser').id
+        validate_superuser(user_id)
+        with self.assertNumQueries(0):
+            validate_superuser(user_id)
+
+    def test_invalidation_on_save_and_delete(self):
+        category = Category.objects.get(name='Bug')
+        get_reference_cache(Category).get(category.id)
+        category.name = 'Bugs'
+        category.save()
+        self.assertEqual(get_reference_cache(Category).get(category.id).name, 'Bugs')
+        category.delete()
+        self.assertIsNone(get_reference_cache(Category).get(category.id))
+
+    def test_returned_instances_are_copies(self):
+        state = State.objects.get(name='New')
+        get_reference_cache(State).get(state.id).name = 'Changed'
+        self.assertEqual(get_reference_cache(State).get(state.id).name, 'New')
+
+    def test_bounded_size(self):
+        for name in ('Docs', 'Fix', 'Feature'):
+            Category.objects.create(name=name)
+        reference_cache = ReferenceCache(Category, max_size=2)
+        reference_cache.get_many(Category.objects.values_list('id', flat=True))
+        self.assertEqual(len(reference_cache._entries), 2)
+
+    def test_change_made_by_other_process(self):
+        # the other process changes the row and the persisted version only (its signals run there)
+        reference_cache = ReferenceCache(State, max_size=10)
+        state = State.objects.get(name='New')
+        reference_cache.get(state.id)
+        State.objects.filter(pk=state.id).update(name='Nový')
+        ChangeCounter.next_value(reference_cache.counter_name)
+        with override_settings(ISSUES_REFERENCE_VERSION_CHECK_SECONDS=60):
+            self.assertEqual(reference_cache.get(state.id).name, 'New')
+        with override_settings(ISSUES_REFERENCE_VERSION_CHECK_SECONDS=0):
+            self.assertEqual(reference_cache.get(state.id).name, 'Nový')
+
+    def test_login_keeps_version(self):
+        user = User.objects.get(username='first_superuser')
+        version = get_reference_cache(User).get_version()
+        self.client.force_login(user)
+        self.assertEqual(get_reference_cache(User).get_version(), version)
+        user.is_superuser = False
+        user.save(update_fields=['is_superuser'])
+        self.assertEqual(get_reference_cache(User).get_version(), version + 1)
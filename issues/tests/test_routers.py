@@ -0,0 +1,94 @@
+import json
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from ..export import export_issues
+from ..middleware import ReplicaStickinessMiddleware
+from ..models import Issue, State
+from ..routers import ReadReplicaRouter, read_from_replica, replica_for_safe_methods, set_primary_sticky, \
+    reset_primary_sticky
+from ..serializers import StateReadSerializer, render_reference_data
+
+
+class FakeRequest:
+    def __init__(self, method):
+        self.method = method
+
+
+@override_settings(ISSUES_READ_REPLICA='replica')
+class ReadReplicaRouterTest(TestCase):
+    """ Test module for routing of reads to the read replica """
+
+    def setUp(self):
+        self.router = ReadReplicaRouter()
+        self.token = set_primary_sticky(False)
+
+    def tearDown(self):
+        reset_primary_sticky(self.token)
+
+    def test_reads_of_marked_blocks_only(self):
+        self.assertIsNone(self.router.db_for_read(Issue))
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_read(Issue), 'replica')
+        self.assertIsNone(self.router.db_for_read(Issue))
+        self.assertEqual(self.router.db_for_write(Issue), 'default')
+
+    def test_read_your_writes(self):
+        with read_from_replica():
+            self.router.db_for_write(Issue)
+            self.assertIsNone(self.router.db_for_read(Issue))
+
+    def test_safe_methods_only(self):
+        view = replica_for_safe_methods(lambda request: self.router.db_for_read(Issue))
+        self.assertEqual(view(FakeRequest('GET')), 'replica')
+        self.assertIsNone(view(FakeRequest('POST')))
+
+    @override_settings(ISSUES_READ_REPLICA=None)
+    def test_without_replica(self):
+        with read_from_replica():
+            self.assertIsNone(self.router.db_for_read(Issue))
+
+    def test_export_keeps_database(self):
+        # rows are read after the view (and its replica block) has returned => no routing then
+        response = export_issues(Issue.objects.all(), 'csv')
+        with patch.object(ReadReplicaRouter, 'db_for_read', side_effect=AssertionError('routed while streaming')):
+            self.assertEqual(len(list(response.streaming_content)), 1)
+
+    def test_reference_data_rendered_from_primary(self):
+        # it is cached under the version of the primary
+        cache.clear()
+        with read_from_replica(), patch.object(ReadReplicaRouter, 'db_for_read',
+                                               side_effect=AssertionError('read from the replica')):
+            self.assertEqual(render_reference_data(StateReadSerializer), b'[]')
+
+    def test_migrations_on_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'issues'))
+        self.assertFalse(self.router.allow_migrate('replica', 'issues'))
+
+
+# the default database stands in for the replica (the routing itself is tested above)
+@override_settings(ISSUES_READ_REPLICA='default')
+class ReplicaStickinessTest(TestCase):
+    """ Test module for read-your-writes stickiness across requests """
+
+    def setUp(self):
+        State.objects.create(name='New', mark_issue_as_finished=False)
+        User.objects.create(username='first_superuser', password='Super001', is_superuser=True, is_staff=True)
+        self.client = Client()
+        self.client.force_login(User.objects.get(username='first_superuser'))
+
+    def test_cookie_after_write(self):
+        response = self.client.get(reverse('get_all_states'))
+        self.assertNotIn(ReplicaStickinessMiddleware.cookie_name, response.cookies)
+        user = User.objects.get(username='first_superuser')
+        response = self.client.post(reverse('get_post_issues'), content_type='application/json', data=json.dumps({
+            'name': 'Issue', 'description': '...', 'creator_id': user.id, 'responsible_person_id': user.id,
+            'state_id': State.objects.get(name='New').id, 'category_id': None}))
+        # a failed validation writes nothing
+        self.assertNotIn(ReplicaStickinessMiddleware.cookie_name, response.cookies)
+        response = self.client.post(reverse('post_issues_transition'), content_type='application/json',
+                                    data=json.dumps({'state_id': State.objects.get(name='New').id, 'ids': [1]}))
+        self.assertEqual(response.cookies[ReplicaStickinessMiddleware.cookie_name]['max-age'], 5)
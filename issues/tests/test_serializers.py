@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from rest_framework.renderers import JSONRenderer
+from ..models import Issue, State, Category
+from ..serializers import (IssueSerializer, UserSerializer, StateSerializer, CategorySerializer, IssueReadSerializer,
+                           UserReadSerializer, StateReadSerializer, CategoryReadSerializer)
+
+
+class ReadSerializersTest(TestCase):
+    """ Fast read-only serializers must render byte-identical JSON as the model serializers """
+
+    def setUp(self):
+        State.objects.create(name='New', mark_issue_as_finished=False)
+        State.objects.create(name='Finished', mark_issue_as_finished=True)
+        Category.objects.create(name='Bug')
+        Category.objects.create(name='Docs')
+        User.objects.create(username='first_superuser', password='Super001', is_superuser=True, is_staff=True)
+        User.objects.create(username='not_allowed_1', password='CanDoNothing1', is_active=False)
+
+        user = User.objects.get(username='first_superuser')
+        Issue.objects.create(name='Open bug', description='Popis "chyby"\n', creator=user, responsible_person=user,
+                             state=State.objects.get(name='New'), category=Category.objects.get(name='Bug'),
+                             created_at=datetime(2021, 9, 1, 12, 0, 0, 123456))
+        Issue.objects.create(name='Finished docs', description='...', creator=user, responsible_person=user,
+                             state=State.objects.get(name='Finished'), category=Category.objects.get(name='Docs'),
+                             created_at=datetime(2021, 9, 1, 12, 0, 0), finished_at=datetime(2021, 9, 3, 8, 30, 0))
+
+    def assertSameJSON(self, model_serializer, read_serializer, queryset):
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(model_serializer(queryset, many=True).data),
+                         renderer.render(read_serializer(read_serializer.get_values(queryset), many=True).data))
+        instance = queryset.first()
+        self.assertEqual(renderer.render(model_serializer(instance).data),
+                         renderer.render(read_serializer(read_serializer.get_values(queryset).first()).data))
+
+    def test_issues(self):
+        self.assertSameJSON(IssueSerializer, IssueReadSerializer, Issue.objects.all())
+
+    def test_users(self):
+        self.assertSameJSON(UserSerializer, UserReadSerializer, User.objects.order_by('id'))
+
+    def test_states(self):
+        self.assertSameJSON(StateSerializer, StateReadSerializer, State.objects.all())
+
+    def test_categories(self):
+        self.assertSameJSON(CategorySerializer, CategoryReadSerializer, Category.objects.all())
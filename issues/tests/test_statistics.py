@@ -0,0 +1,218 @@
+import json
+from datetime import datetime, timedelta
+
+from rest_framework import status
+from django.test import TestCase, RequestFactory, Client
+from django.urls import reverse
+from django.contrib.auth.models import User, AnonymousUser
+from django.core.cache import cache
+from ..models import Issue, State, Category, IssueStatistics
+from ..sketch import DurationSketch
+from ..statistics import get_duration_statistics, build_statistics, rebuild_statistics
+from ..templatetags.custom_filters import issues_statistics
+
+
+class DurationStatisticsTest(TestCase):
+    """ Test module for cached duration statistics """
+
+    def setUp(self):
+        cache.clear()
+        State.objects.create(name='New', mark_issue_as_finished=False)
+        State.objects.create(name='Finished', mark_issue_as_finished=True)
+        Category.objects.create(name='Bug')
+        User.objects.create(username='first_superuser', password='Super001', is_superuser=True, is_staff=True)
+
+        user = User.objects.get(username='first_superuser')
+        for days, hours in ((1, 0), (3, 12), (2, 6)):
+            Issue.objects.create(name='Finished bug', description='Bug...', creator=user, responsible_person=user,
+                                 state=State.objects.get(name='Finished'), category=Category.objects.get(name='Bug'),
+                                 created_at=datetime(2021, 9, 1, 12, 0, 0),
+                                 finished_at=datetime(2021, 9, 1, 12, 0, 0) + timedelta(days=days, hours=hours))
+        Issue.objects.create(name='Open bug', description='Bug...', creator=user, responsible_person=user,
+                             state=State.objects.get(name='New'), category=Category.objects.get(name='Bug'),
+                             created_at=datetime(2021, 9, 1, 12, 0, 0))
+
+    def test_statistics_values(self):
+        statistics = get_duration_statistics()
+        self.assertEqual(statistics['max'], timedelta(days=3, hours=12))
+        self.assertEqual(statistics['min'], timedelta(days=1))
+        self.assertEqual(statistics['avg'], timedelta(days=2, hours=6))
+
+    def test_statistics_are_cached(self):
+        get_duration_statistics()
+        with self.assertNumQueries(0):
+            get_duration_statistics()
+
+    def test_statistics_invalidated_on_save_and_delete(self):
+        get_duration_statistics()
+        issue = Issue.objects.get(name='Open bug')
+        issue.state = State.objects.get(name='Finished')
+        issue.finished_at = datetime(2021, 9, 11, 12, 0, 0)
+        issue.save()
+        self.assertEqual(get_duration_statistics()['max'], timedelta(days=10))
+
+        issue.delete()
+        self.assertEqual(get_duration_statistics()['max'], timedelta(days=3, hours=12))
+
+    def test_statistics_without_finished_issues(self):
+        Issue.objects.exclude(finished_at__isnull=True).delete()
+        statistics = get_duration_statistics()
+        self.assertEqual(statistics['avg'], None)
+
+    def test_header_for_staff_and_anonymous(self):
+        request = RequestFactory().get('/admin/')
+        request.user = User.objects.get(username='first_superuser')
+        self.assertEqual(issues_statistics(request),
+                         'Délka issues: průměrná 2 dnů a  6:00:00 | max. 3 dnů a  12:00:00 | min. 1 day, 0:00:00')
+        request.user = AnonymousUser()
+        self.assertEqual(issues_statistics(request), 'Django Admin')
+
+
+class RollupStatisticsTest(TestCase):
+    """ Test module for incrementally maintained rollup statistics """
+
+    def setUp(self):
+        State.objects.create(name='New', mark_issue_as_finished=False)
+        State.objects.create(name='Finished', mark_issue_as_finished=True)
+        Category.objects.create(name='Bug')
+        Category.objects.create(name='Docs')
+        User.objects.create(username='first_superuser', password='Super001', is_superuser=True, is_staff=True)
+
+        user = User.objects.get(username='first_superuser')
+        for name, category, days in (('Bug 1', 'Bug', 1), ('Bug 2', 'Bug', 4), ('Docs 1', 'Docs', 2)):
+            Issue.objects.create(name=name, description='...', creator=user, responsible_person=user,
+                                 state=State.objects.get(name='Finished'), category=Category.objects.get(name=category),
+                                 created_at=datetime(2021, 9, 1, 12, 0, 0),
+                                 finished_at=datetime(2021, 9, 1, 12, 0, 0) + timedelta(days=days))
+        Issue.objects.create(name='Open bug', description='...', creator=user, responsible_person=user,
+                             state=State.objects.get(name='New'), category=Category.objects.get(name='Bug'),
+                             created_at=datetime(2021, 9, 1, 12, 0, 0))
+
+    def assertStatisticsConsistent(self):
+        fields = ('group', 'issues_count', 'open_count', 'finished_count', 'duration_sum', 'duration_min',
+                  'duration_max', 'duration_sketch')
+        normalized = lambda values: values[:-1] + (DurationSketch.from_dict(values[-1]).to_dict(),)
+        stored_rows = IssueStatistics.objects.filter(issues_count__gt=0).values_list(*fields)
+        stored = {_r[0]: normalized(_r) for _r in stored_rows}
+        expected = {_r['group']: normalized(tuple(_r[_f] for _f in fields)) for _r in build_statistics(Issue)}
+        self.assertEqual(stored, expected)
+
+    def test_rollups_after_create(self):
+        self.assertStatisticsConsistent()
+        bug = Category.objects.get(name='Bug')
+        row = IssueStatistics.objects.get(pk=f'category:{bug.id}')
+        self.assertEqual((row.issues_count, row.open_count, row.finished_count), (3, 1, 2))
+        self.assertEqual(row.duration_max, timedelta(days=4) // timedelta(microseconds=1))
+
+    def test_rollups_after_update(self):
+        issue = Issue.objects.get(name='Open bug')
+        issue.state = State.objects.get(name='Finished')
+        issue.finished_at = datetime(2021, 9, 11, 12, 0, 0)
+        issue.save()
+        self.assertStatisticsConsistent()
+
+        issue = Issue.objects.get(name='Bug 2')
+        issue.category = Category.objects.get(name='Docs')
+        issue.save(update_fields=('category',))
+        self.assertStatisticsConsistent()
+
+    def test_rollups_after_delete_of_extreme_value(self):
+        Issue.objects.get(name='Bug 2').delete()
+        self.assertStatisticsConsistent()
+        self.assertEqual(get_duration_statistics()['max'], timedelta(days=2))
+
+    def test_rollup_read_is_single_query(self):
+        cache.clear()
+        with self.assertNumQueries(1):
+            get_duration_statistics()
+
+    def test_rebuild(self):
+        IssueStatistics.objects.all().update(issues_count=0, duration_sum=0)
+        rebuild_statistics()
+        self.assertStatisticsConsistent()
+
+
+class DurationSketchTest(TestCase):
+    """ Test module for the mergeable quantile sketch """
+
+    def test_quantiles_within_relative_accuracy(self):
+        sketch = DurationSketch(relative_accuracy=0.01)
+        values = [_i * 1000 for _i in range(1, 10001)]
+        for value in values:
+            sketch.add(value)
+        for q in (0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            self.assertLessEqual(abs(sketch.quantile(q) - exact) / exact, 0.01)
+
+    def test_merge_and_remove(self):
+        first, second = DurationSketch(), DurationSketch()
+        for value in range(1, 101):
+            (first if value % 2 else second).add(value)
+        first.merge(second)
+        self.assertEqual(first.count, 100)
+        for value in range(51, 101):
+            first.remove(value)
+        self.assertEqual(first.count, 50)
+        self.assertLessEqual(first.quantile(1), 50 * 1.01)
+
+    def test_serialization(self):
+        sketch = DurationSketch()
+        for value in (0, 10, 1000, 1000):
+            sketch.add(value)
+        restored = DurationSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+        self.assertEqual((restored.count, restored.zero_count, restored.bins), (4, 1, sketch.bins))
+        self.assertEqual(restored.histogram([0, 100]), [2, 2])
+
+
+class DurationStatsAPITest(TestCase):
+    """ GET durations percentiles using API """
+
+    def setUp(self):
+        State.objects.create(name='Finished', mark_issue_as_finished=True)
+        Category.objects.create(name='Bug')
+        Category.objects.create(name='Docs')
+        User.objects.create(username='first_superuser', password='Super001', is_superuser=True, is_staff=True)
+        User.objects.create(username='not_allowed_1', password='CanDoNothing1')
+
+        user = User.objects.get(username='first_superuser')
+        for category, hours in (('Bug', 1), ('Bug', 2), ('Bug', 30), ('Docs', 200)):
+            Issue.objects.create(name='Issue', description='...', creator=user, responsible_person=user,
+                                 state=State.objects.get(name='Finished'), category=Category.objects.get(name=category),
+                                 created_at=datetime(2021, 9, 1, 12, 0, 0),
+                                 finished_at=datetime(2021, 9, 1, 12, 0, 0) + timedelta(hours=hours))
+        self.client = Client()
+
+    def test_total_durations(self):
+        self.client.force_login(User.objects.get(username='first_superuser'))
+        with self.assertNumQueries(3):
+            # session + user + rollup rows
+            response = self.client.get(reverse('get_duration_stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['finished_count'], 4)
+        self.assertEqual(response.data['max'], 200 * 3600)
+        self.assertLessEqual(abs(response.data['percentiles']['p50'] - 2 * 3600), 2 * 3600 * 0.01)
+        self.assertEqual(sum(_b['count'] for _b in response.data['histogram']), 4)
+        self.assertEqual(response.data['histogram'][-1]['to'], None)
+
+    def test_merged_categories_and_responsible_person(self):
+        self.client.force_login(User.objects.get(username='first_superuser'))
+        bug, docs = Category.objects.get(name='Bug'), Category.objects.get(name='Docs')
+        response = self.client.get(reverse('get_duration_stats'), {'category': bug.id})
+        self.assertEqual(response.data['finished_count'], 3)
+        response = self.client.get(reverse('get_duration_stats'), {'category': f'{bug.id},{docs.id}'})
+        self.assertEqual(response.data['finished_count'], 4)
+        response = self.client.get(reverse('get_duration_stats'),
+                                   {'responsible_person': User.objects.get(username='first_superuser').id})
+        self.assertEqual(response.data['finished_count'], 4)
+
+    def test_invalid_parameters(self):
+        self.client.force_login(User.objects.get(username='first_superuser'))
+        response = self.client.get(reverse('get_duration_stats'), {'category': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('get_duration_stats'), {'category': 1, 'responsible_person': 1})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_durations_403(self):
+        self.client.force_login(User.objects.get(username='not_allowed_1'))
+        response = self.client.get(reverse('get_duration_stats'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -1,10 +1,22 @@
+import csv
+import io
 import json
+from datetime import datetime
+from importlib import import_module
+from unittest.mock import patch
 
 from rest_framework import status
-from django.test import TestCase, Client
+from django.apps import apps
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth.models import User
-from ..models import Issue, State, Category
+from ..models import Issue, State, Category, IssueStatistics, IssueTombstone
+from ..reference_cache import get_reference_cache
+from ..statistics import build_statistics
+from .utils import QueryBudgetMixin
 
 
 client = Client()
@@ -28,14 +40,15 @@ class GetAllUsersTest(TestCase):
 
         # URL and user are valid
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
 
-        # response.data length must be equal records count from DB
+        # data length must be equal records count from DB
         users = User.objects.all()
-        self.assertEqual(len(users), len(response.data))
+        self.assertEqual(len(users), len(data))
 
         # response field are relevant to serializer's fields
-        if len(response.data) > 0:
-            self.assertEqual([x for x in response.data[0].keys()],
+        if len(data) > 0:
+            self.assertEqual([x for x in data[0].keys()],
                              ['id', 'username', 'is_superuser', 'is_staff', 'is_active'])
 
     def test_get_all_users_403(self):
@@ -64,14 +77,15 @@ class GetAllStatesTest(TestCase):
 
         # URL and user are valid
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
 
-        # response.data length must be equal records count from DB
+        # data length must be equal records count from DB
         states = State.objects.all()
-        self.assertEqual(len(states), len(response.data))
+        self.assertEqual(len(states), len(data))
 
         # response field are relevant to serializer's fields
-        if len(response.data) > 0:
-            self.assertEqual([x for x in response.data[0].keys()], ['id', 'name'])
+        if len(data) > 0:
+            self.assertEqual([x for x in data[0].keys()], ['id', 'name'])
 
     def test_get_all_states_403(self):
         user = User.objects.get(username='not_allowed_1')
@@ -98,14 +112,15 @@ class GetAllCategoriesTest(TestCase):
 
         # URL and user are valid
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
 
-        # response.data length must be equal records count from DB
+        # data length must be equal records count from DB
         categories = Category.objects.all()
-        self.assertEqual(len(categories), len(response.data))
+        self.assertEqual(len(categories), len(data))
 
         # response field are relevant to serializer's fields
-        if len(response.data) > 0:
-            self.assertEqual([x for x in response.data[0].keys()], ['id', 'name'])
+        if len(data) > 0:
+            self.assertEqual([x for x in data[0].keys()], ['id', 'name'])
 
     def test_get_all_categories_403(self):
         user = User.objects.get(username='not_allowed_1')
@@ -114,7 +129,7 @@ class GetAllCategoriesTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
 
-class IssuesAPITest(TestCase):
+class IssuesAPITest(QueryBudgetMixin, TestCase):
     """ Tests for Issue model using API """
 
     def setUp(self):
@@ -410,3 +425,663 @@ class IssuesAPITest(TestCase):
         response = client.put(reverse('get_delete_update_issue', kwargs={'pk': Issue.objects.get(name='Bug 42').id}),
                               data=json.dumps(valid_payload), content_type='application/json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def patch(self, issue, payload):
+        return client.patch(reverse('get_delete_update_issue', kwargs={'pk': issue.id}), data=json.dumps(payload),
+                            content_type='application/json')
+
+    def test_patch_state_only(self):
+        client.force_login(User.objects.get(username='second_superuser'))
+        issue = Issue.objects.get(name='Bug 42')
+        # warm up the reference cache
+        self.patch(issue, {'state_id': State.objects.get(name='In progress').id})
+        state_id = State.objects.get(name='Delayed').id
+        # all queries of the request (statistics and cache invalidation included) fit the view's budget
+        with self.assertQueryBudget('get_delete_update_issue'), CaptureQueriesContext(connection) as queries:
+            response = self.patch(issue, {'state_id': state_id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['state_id'], State.objects.get(name='Delayed').id)
+        # SELECT + UPDATE of the issue, related rows are not loaded
+        issue_queries = [_q['sql'] for _q in queries if '"issues_issue"' in _q['sql']]
+        self.assertEqual(len(issue_queries), 2)
+        self.assertFalse([_q['sql'] for _q in queries if '"issues_category"' in _q['sql']])
+        self.assertIn('"state_id"', issue_queries[1])
+        self.assertNotIn('"description"', issue_queries[1])
+
+    def test_patch_finishing_state(self):
+        client.force_login(User.objects.get(username='second_superuser'))
+        issue = Issue.objects.get(name='Bug 42')
+        response = self.patch(issue, {'state_id': State.objects.get(name='Finished').id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(Issue.objects.get(name='Bug 42').finished_at)
+
+        # unfinished state resets finished_at (as Issue.clean does)
+        response = self.patch(issue, {'state_id': State.objects.get(name='New').id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(Issue.objects.get(name='Bug 42').finished_at)
+
+    def test_patch_invalid_and_403(self):
+        client.force_login(User.objects.get(username='second_superuser'))
+        issue = Issue.objects.get(name='Bug 42')
+        response = self.patch(issue, {'creator_id': User.objects.get(username='second_staff').id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.patch(issue, {'finished_at': '2021-09-06T16:30:48'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.patch(issue, {'name': ''})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        client.force_login(User.objects.get(username='first_staff'))
+        response = self.patch(issue, {'name': 'Bug-42'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class IssuesPaginationTest(TestCase):
+    """ Keyset pagination and filtering of issues using API """
+
+    def setUp(self):
+        State.objects.create(name='New', mark_issue_as_finished=False)
+        State.objects.create(name='In progress', mark_issue_as_finished=False)
+        Category.objects.create(name='Bug')
+        User.objects.create(username='first_staff', password='ReadOnly001', is_staff=True)
+        User.objects.create(username='first_superuser', password='Super001', is_superuser=True, is_staff=True)
+
+        user = User.objects.get(username='first_superuser')
+        # several issues share created_at and name => ties must be resolved by state and id
+        for day, name, state in ((1, 'A', 'New'), (1, 'A', 'In progress'), (1, 'A', 'New'), (1, 'B', 'New'),
+                                 (2, 'A', 'New'), (3, 'C', 'New'), (3, 'A', 'In progress')):
+            Issue.objects.create(name=name, description='...', category=Category.objects.get(name='Bug'),
+                                 state=State.objects.get(name=state), creator=user, responsible_person=user,
+                                 created_at=datetime(2021, 9, day, 12, 0, 0))
+
+    def test_walk_all_pages(self):
+        client.force_login(User.objects.get(username='first_staff'))
+        url, ids = reverse('get_post_issues') + '?page_size=3', []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data), 3)
+            ids += [_i['id'] for _i in response.data]
+            url = response['Link'][1:response['Link'].index('>')] if response.has_header('Link') else None
+        expected = list(Issue.objects.order_by('-created_at', 'name', 'state', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_default_page_without_link(self):
+        client.force_login(User.objects.get(username='first_staff'))
+        response = client.get(reverse('get_post_issues'))
+        self.assertEqual(len(response.data), Issue.objects.count())
+        self.assertFalse(response.has_header('Link'))
+
+    def test_invalid_cursor_and_page_size(self):
+        client.force_login(User.objects.get(username='first_staff'))
+        response = client.get(reverse('get_post_issues'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = client.get(reverse('get_post_issues'), {'page_size': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = client.get(reverse('get_post_issues'), {'page_size': 100000})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filters(self):
+        client.force_login(User.objects.get(username='first_staff'))
+        new, in_progress = State.objects.get(name='New'), State.objects.get(name='In progress')
+        response = client.get(reverse('get_post_issues'), {'state': in_progress.id})
+        self.assertEqual(len(response.data), 2)
+        response = client.get(reverse('get_post_issues'), {'state': f'{new.id},{in_progress.id}',
+                                                            'created_after': '2021-09-02',
+                                                            'created_before': '2021-09-03T12:00:00'})
+        self.assertEqual([_i['created_at'] for _i in response.data], ['2021-09-02T12:00:00'])
+        response = client.get(reverse('get_post_issues'), {'responsible_person': 999999})
+        self.assertEqual(response.data, [])
+        response = client.get(reverse('get_post_issues'), {'finished_after': '2021-09-01'})
+        self.assertEqual(response.data, [])
+
+    def test_invalid_filters(self):
+        client.force_login(User.objects.get(username='first_staff'))
+        response = client.get(reverse('get_post_issues'), {'category': 'bug'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = client.get(reverse('get_post_issues'), {'created_after': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class IssuesExportTest(TestCase):
+    """ Streaming export of issues using API """
+
+    def setUp(self):
+        State.objects.create(name='Finished', mark_issue_as_finished=True)
+        Category.objects.create(name='Bug')
+        User.objects.create(username='first_staff', password='ReadOnly001', is_staff=True)
+        User.objects.create(username='first_superuser', password='Super001', is_superuser=True, is_staff=True)
+        User.objects.create(username='not_allowed_1', password='CanDoNothing1')
+
+        user = User.objects.get(username='first_superuser')
+        Issue.objects.create(name='Bug, "quoted"', description='Řádek 1\nŘádek 2', creator=user,
+                             responsible_person=user, state=State.objects.get(name='Finished'),
+                             category=Category.objects.get(name='Bug'), created_at=datetime(2021, 9, 1, 12, 0, 0),
+                             finished_at=datetime(2021, 9, 2, 12, 0, 0))
+        Issue.objects.create(name='Second', description='...', creator=user, responsible_person=user,
+                             state=State.objects.get(name='Finished'), category=Category.objects.get(name='Bug'),
+                             created_at=datetime(2021, 9, 3, 12, 0, 0), finished_at=datetime(2021, 9, 4, 12, 0, 0))
+
+    def test_export_ndjson(self):
+        client.force_login(User.objects.get(username='first_staff'))
+        response = client.get(reverse('get_issues_export', kwargs={'export_format': 'ndjson'}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        rows = [json.loads(_l) for _l in b''.join(response.streaming_content).decode().splitlines()]
+        list_response = client.get(reverse('get_post_issues'))
+        self.assertEqual(rows, sorted([dict(_i) for _i in list_response.data], key=lambda _i: _i['id']))
+
+    def test_export_csv(self):
+        client.force_login(User.objects.get(username='first_staff'))
+        response = client.get(reverse('get_issues_export', kwargs={'export_format': 'csv'}),
+                              {'created_after': '2021-09-02'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:2], ['id', 'name'])
+        self.assertEqual([_r[1] for _r in rows[1:]], ['Second'])
+
+    def test_export_403(self):
+        client.force_login(User.objects.get(username='not_allowed_1'))
+        response = client.get(reverse('get_issues_export', kwargs={'export_format': 'csv'}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class IssuesBulkCreateTest(TestCase):
+    """ Bulk insert of issues using API """
+
+    def setUp(self):
+        State.objects.create(name='New', mark_issue_as_finished=False)
+        State.objects.create(name='Finished', mark_issue_as_finished=True)
+        Category.objects.create(name='Bug')
+        User.objects.create(username='first_superuser', password='Super001', is_superuser=True, is_staff=True)
+        User.objects.create(username='first_staff', password='ReadOnly001', is_staff=True)
+
+    def get_payload(self, count):
+        return [{'name': f'Imported {_i}', 'description': 'Imported issue',
+                 'creator_id': User.objects.get(username='first_superuser').id,
+                 'responsible_person_id': User.objects.get(username='first_staff').id,
+                 'state_id': State.objects.get(name='Finished').id, 'category_id': Category.objects.get(name='Bug').id,
+                 'created_at': '2021-09-04T22:38:48', 'finished_at': '2021-09-05T22:38:48'} for _i in range(count)]
+
+    def test_bulk_create_201(self):
+        client.force_login(User.objects.get(username='first_superuser'))
+        # number of queries does not depend on number of issues (the first request creates rollup rows)
+        query_counts = []
+        for count in (1, 5, 50):
+            payload = json.dumps(self.get_payload(count))
+            with CaptureQueriesContext(connection) as queries:
+                response = client.post(reverse('post_bulk_issues'), data=payload, content_type='application/json')
+            query_counts.append(len(queries))
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(response.data['created'], count)
+        self.assertEqual(query_counts[1], query_counts[2])
+        self.assertEqual(Issue.objects.filter(name__startswith='Imported').count(), 56)
+        self.assertEqual(IssueStatistics.objects.get(pk='total').finished_count, 56)
+
+    def test_bulk_create_errors_per_row(self):
+        client.force_login(User.objects.get(username='first_superuser'))
+        payload = self.get_payload(5)
+        payload[1]['creator_id'] = User.objects.get(username='first_staff').id
+        payload[2]['finished_at'] = '2021-08-01T00:00:00'
+        del payload[3]['name']
+        # required as by POST of a single issue (the model's default would be the start of the process)
+        del payload[4]['created_at']
+        response = client.post(reverse('post_bulk_issues'), data=json.dumps(payload),
+                               content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([_e['index'] for _e in response.data['errors']], [3, 4])
+        del payload[3:]
+        response = client.post(reverse('post_bulk_issues'), data=json.dumps(payload),
+                               content_type='application/json')
+        self.assertEqual([_e['index'] for _e in response.data['errors']], [1, 2])
+        self.assertEqual(Issue.objects.count(), 0)
+
+    def test_bulk_create_invalid_payload_and_403(self):
+        client.force_login(User.objects.get(username='first_superuser'))
+        response = client.post(reverse('post_bulk_issues'), data=json.dumps({'name': 'x'}),
+                               content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        client.force_login(User.objects.get(username='first_staff'))
+        response = client.post(reverse('post_bulk_issues'), data=json.dumps(self.get_payload(1)),
+                               content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class IssuesBulkTransitionTest(TestCase):
+    """ Bulk change of issues' state using API """
+
+    def setUp(self):
+        State.objects.create(name='New', mark_issue_as_finished=False)
+        State.objects.create(name='Finished', mark_issue_as_finished=True)
+        State.objects.create(name='Canceled', mark_issue_as_finished=True)
+        Category.objects.create(name='Bug')
+        Category.objects.create(name='Docs')
+        User.objects.create(username='first_superuser', password='Super001', is_superuser=True, is_staff=True)
+        User.objects.create(username='first_staff', password='ReadOnly001', is_staff=True)
+
+        user = User.objects.get(username='first_superuser')
+        for name, category in (('Bug 1', 'Bug'), ('Bug 2', 'Bug'), ('Docs 1', 'Docs')):
+            Issue.objects.create(name=name, description='...', creator=user, responsible_person=user,
+                                 state=State.objects.get(name='New'), category=Category.objects.get(name=category),
+                                 created_at=datetime(2021, 9, 1, 12, 0, 0))
+        Issue.objects.create(name='Canceled bug', description='...', creator=user, responsible_person=user,
+                             state=State.objects.get(name='Canceled'), category=Category.objects.get(name='Bug'),
+                             created_at=datetime(2021, 9, 1, 12, 0, 0), finished_at=datetime(2021, 9, 2, 12, 0, 0))
+
+    def transition(self, payload):
+        return client.post(reverse('post_issues_transition'), data=json.dumps(payload),
+                           content_type='application/json')
+
+    def assertStatisticsConsistent(self):
+        fields = ('group', 'issues_count', 'open_count', 'finished_count', 'duration_sum')
+        stored = set(IssueStatistics.objects.filter(issues_count__gt=0).values_list(*fields))
+        self.assertEqual(stored, {tuple(_r[_f] for _f in fields) for _r in build_statistics(Issue)})
+
+    def test_finish_by_filter(self):
+        client.force_login(User.objects.get(username='first_superuser'))
+        finished = State.objects.get(name='Finished')
+        response = self.transition({'state_id': finished.id,
+                                    'filter': {'category': Category.objects.get(name='Bug').id}})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 3)
+        for issue in Issue.objects.filter(category__name='Bug'):
+            self.assertEqual(issue.state_id, finished.id)
+            self.assertIsNotNone(issue.finished_at)
+        # already finished issue keeps its finished_at
+        self.assertEqual(Issue.objects.get(name='Canceled bug').finished_at, datetime(2021, 9, 2, 12, 0, 0))
+        self.assertEqual(Issue.objects.get(name='Docs 1').state.name, 'New')
+        self.assertStatisticsConsistent()
+
+    def test_reopen_by_ids(self):
+        client.force_login(User.objects.get(username='first_superuser'))
+        ids = list(Issue.objects.filter(name__in=('Bug 1', 'Canceled bug')).values_list('id', flat=True))
+        response = self.transition({'state_id': State.objects.get(name='New').id, 'ids': ids})
+        self.assertEqual(response.data['updated'], 1)
+        self.assertIsNone(Issue.objects.get(name='Canceled bug').finished_at)
+        self.assertStatisticsConsistent()
+
+    @override_settings(ISSUES_BULK_MAX_SIZE=2)
+    def test_filter_over_max_size(self):
+        # all issues of a transition share a change sequence number => no more of them than of a page of the feed
+        client.force_login(User.objects.get(username='first_superuser'))
+        response = self.transition({'state_id': State.objects.get(name='Finished').id,
+                                    'filter': {'category': Category.objects.get(name='Bug').id}})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Issue.objects.filter(state__name='Finished').count(), 0)
+
+    def test_invalid_payload_and_403(self):
+        client.force_login(User.objects.get(username='first_superuser'))
+        response = self.transition({'state_id': 999999, 'ids': [1]})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.transition({'state_id': State.objects.get(name='New').id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.transition({'state_id': State.objects.get(name='New').id, 'ids': ['x']})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # booleans are not ids (True == 1)
+        response = self.transition({'state_id': State.objects.get(name='New').id, 'ids': [True]})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        client.force_login(User.objects.get(username='first_staff'))
+        response = self.transition({'state_id': State.objects.get(name='New').id, 'ids': [1]})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ConditionalRequestsTest(TestCase):
+    """ ETag and Last-Modified of issue and reference endpoints """
+
+    def setUp(self):
+        State.objects.create(name='New', mark_issue_as_finished=False)
+        Category.objects.create(name='Bug')
+        User.objects.create(username='first_superuser', password='Super001', is_superuser=True, is_staff=True)
+        user = User.objects.get(username='first_superuser')
+        Issue.objects.create(name='Test bug', description='Bug...', category=Category.objects.get(name='Bug'),
+                             state=State.objects.get(name='New'), creator=user, responsible_person=user)
+        client.force_login(user)
+
+    def test_issue_not_modified(self):
+        url = reverse('get_delete_update_issue', kwargs={'pk': Issue.objects.get(name='Test bug').id})
+        response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # every change makes a new ETag
+        client.patch(url, data=json.dumps({'name': 'Renamed bug'}), content_type='application/json')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_issue_update_precondition(self):
+        url = reverse('get_delete_update_issue', kwargs={'pk': Issue.objects.get(name='Test bug').id})
+        response = client.patch(url, data=json.dumps({'name': 'Renamed bug'}), content_type='application/json',
+                                HTTP_IF_MATCH='"issue-0-0"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+    def test_reference_endpoints_not_modified(self):
+        for url_name, model in (('get_all_states', State), ('get_all_categories', Category),
+                                ('get_all_users', User)):
+            response = client.get(reverse(url_name))
+            etag = response['ETag']
+            response = client.get(reverse(url_name), HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+            model.objects.first().save()
+            response = client.get(reverse(url_name), HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_reference_etag_of_persisted_version(self):
+        # another process (its own local and Django cache) answers with the same ETag and Last-Modified
+        response = client.get(reverse('get_all_states'))
+        cache.clear()
+        get_reference_cache(State).clear()
+        other_response = client.get(reverse('get_all_states'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(other_response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(other_response['Last-Modified'], response['Last-Modified'])
+
+
+class ReferenceResponseCacheTest(TestCase):
+    """ Pre-rendered responses of users, states and categories """
+
+    def setUp(self):
+        User.objects.create(username='first_staff', password='ReadOnly001', is_staff=True)
+        State.objects.create(name='New', mark_issue_as_finished=False)
+        client.force_login(User.objects.get(username='first_staff'))
+
+    def test_hit_skips_orm(self):
+        content = client.get(reverse('get_all_states')).content
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('get_all_states'))
+        self.assertEqual(response.content, content)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertFalse([_q for _q in queries if 'issues_state' in _q['sql']])
+
+    def test_invalidation_on_save_and_delete(self):
+        client.get(reverse('get_all_states'))
+        state = State.objects.create(name='Finished', mark_issue_as_finished=True)
+        names = [_s['name'] for _s in json.loads(client.get(reverse('get_all_states')).content)]
+        self.assertEqual(names, ['New', 'Finished'])
+        state.delete()
+        names = [_s['name'] for _s in json.loads(client.get(reverse('get_all_states')).content)]
+        self.assertEqual(names, ['New'])
+
+    def test_browsable_api(self):
+        response = client.get(reverse('get_all_states'), HTTP_ACCEPT='text/html')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, 'New')
+
+
+class IssuesMultiGetTest(TestCase):
+    """ Many issues by id using API """
+
+    def setUp(self):
+        State.objects.create(name='New', mark_issue_as_finished=False)
+        Category.objects.create(name='Bug')
+        User.objects.create(username='first_staff', password='ReadOnly001', is_staff=True)
+        User.objects.create(username='first_superuser', password='Super001', is_superuser=True, is_staff=True)
+
+        user = User.objects.get(username='first_superuser')
+        for index in range(5):
+            Issue.objects.create(name=f'Issue {index}', description='Chyba', creator=user, responsible_person=user,
+                                 state=State.objects.get(name='New'), category=Category.objects.get(name='Bug'))
+        client.force_login(User.objects.get(username='first_staff'))
+
+    def test_order_and_missing_ids(self):
+        ids = list(Issue.objects.order_by('-id').values_list('id', flat=True))
+        requested = [ids[0], 0, ids[3], ids[1], ids[0]]
+        for response in (client.get(reverse('get_post_issues'), {'ids': ','.join(map(str, requested))}),
+                         client.get(reverse('get_issues_by_ids'), {'ids': ','.join(map(str, requested))}),
+                         client.post(reverse('get_issues_by_ids'), data=json.dumps({'ids': requested}),
+                                     content_type='application/json')):
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual([_i['id'] for _i in response.data['issues']], [ids[0], ids[3], ids[1]])
+            self.assertEqual(response.data['missing'], [0])
+
+    def test_same_data_as_single_issue(self):
+        issue = Issue.objects.get(name='Issue 2')
+        response = client.get(reverse('get_issues_by_ids'), {'ids': str(issue.id)})
+        single = client.get(reverse('get_delete_update_issue', kwargs={'pk': issue.id}))
+        self.assertEqual(response.data['issues'], [single.data])
+
+    @override_settings(ISSUES_MULTI_GET_MAX_SIZE=3)
+    def test_invalid_ids(self):
+        for data in ({'ids': 'a,b'}, {'ids': ''}, {'ids': '1,2,3,4'}):
+            response = client.get(reverse('get_issues_by_ids'), data)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        for data in ({'ids': [1, 'x']}, {'ids': []}, [1, 2]):
+            response = client.post(reverse('get_issues_by_ids'), data=json.dumps(data),
+                                   content_type='application/json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch('issues.issue_cache.IN_CHUNK_SIZE', 2)
+    @override_settings(ISSUES_ISSUE_CACHE=True)
+    def test_chunked_queries(self):
+        cache.clear()
+        ids = list(Issue.objects.values_list('id', flat=True))
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(reverse('get_issues_by_ids'), data=json.dumps({'ids': ids}),
+                                   content_type='application/json')
+        self.assertEqual(len(response.data['issues']), 5)
+        self.assertEqual(len([_q for _q in queries if 'FROM "issues_issue"' in _q['sql']]), 3)
+        # all of them are cached now
+        with CaptureQueriesContext(connection) as queries:
+            client.post(reverse('get_issues_by_ids'), data=json.dumps({'ids': ids}), content_type='application/json')
+        self.assertFalse([_q for _q in queries if 'FROM "issues_issue"' in _q['sql']])
+
+
+class IssueChangesTest(TestCase):
+    """ Change feed of issues using API """
+
+    def setUp(self):
+        State.objects.create(name='New', mark_issue_as_finished=False)
+        State.objects.create(name='Finished', mark_issue_as_finished=True)
+        Category.objects.create(name='Bug')
+        User.objects.create(username='first_superuser', password='Super001', is_superuser=True, is_staff=True)
+        User.objects.create(username='not_allowed_1', password='CanDoNothing1')
+
+        user = User.objects.get(username='first_superuser')
+        for index in range(3):
+            Issue.objects.create(name=f'Issue {index}', description='...', creator=user, responsible_person=user,
+                                 state=State.objects.get(name='New'), category=Category.objects.get(name='Bug'),
+                                 created_at=datetime(2021, 9, 1, 12, 0, 0))
+
+    def changes(self, **params):
+        return client.get(reverse('get_issue_changes'), params)
+
+    def test_initial_sync_and_changes(self):
+        client.force_login(User.objects.get(username='first_superuser'))
+        response = self.changes()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([_i['name'] for _i in response.data['issues']], ['Issue 0', 'Issue 1', 'Issue 2'])
+        self.assertEqual(response.data['deleted'], [])
+        self.assertFalse(response.data['has_more'])
+        checkpoint = response.data['checkpoint']
+
+        # nothing changed since the checkpoint
+        response = self.changes(since=checkpoint)
+        self.assertEqual((response.data['issues'], response.data['deleted']), ([], []))
+        self.assertEqual(response.data['checkpoint'], checkpoint)
+
+        issue = Issue.objects.get(name='Issue 1')
+        client.patch(reverse('get_delete_update_issue', kwargs={'pk': issue.pk}), data={'name': 'Renamed'},
+                     content_type='application/json')
+        deleted = Issue.objects.get(name='Issue 2')
+        client.delete(reverse('get_delete_update_issue', kwargs={'pk': deleted.pk}))
+        response = self.changes(since=checkpoint)
+        self.assertEqual([_i['name'] for _i in response.data['issues']], ['Renamed'])
+        self.assertEqual(response.data['deleted'], [deleted.pk])
+        self.assertGreater(int(response.data['checkpoint']), int(checkpoint))
+
+    def test_legacy_issues_are_paged(self):
+        # issues saved before the change feed existed (change_seq 0) are numbered by the migration
+        Issue.objects.update(change_seq=0)
+        import_module('issues.migrations.0010_issue_change_seq_legacy').number_legacy_issues(apps, None)
+        self.assertEqual(len(set(Issue.objects.values_list('change_seq', flat=True))), 3)
+        client.force_login(User.objects.get(username='first_superuser'))
+        response = self.changes(limit=2)
+        self.assertEqual([_i['name'] for _i in response.data['issues']], ['Issue 0', 'Issue 1'])
+        self.assertTrue(response.data['has_more'])
+        response = self.changes(since=response.data['checkpoint'], limit=2)
+        self.assertEqual([_i['name'] for _i in response.data['issues']], ['Issue 2'])
+        self.assertFalse(response.data['has_more'])
+        # new changes come after them
+        Issue.objects.get(name='Issue 0').save()
+        response = self.changes(since=response.data['checkpoint'])
+        self.assertEqual([_i['name'] for _i in response.data['issues']], ['Issue 0'])
+
+    def test_paging_keeps_bulk_changes_together(self):
+        client.force_login(User.objects.get(username='first_superuser'))
+        checkpoint = self.changes().data['checkpoint']
+        client.post(reverse('post_issues_transition'), content_type='application/json',
+                    data=json.dumps({'state_id': State.objects.get(name='Finished').id,
+                                     'filter': {'category': Category.objects.get(name='Bug').id}}))
+        Issue.objects.filter(name='Issue 0').delete()
+        self.assertEqual(IssueTombstone.objects.count(), 1)
+
+        # the transition (one change of 2 issues now) is not split even though the limit is 1
+        response = self.changes(since=checkpoint, limit=1)
+        self.assertEqual([_i['name'] for _i in response.data['issues']], ['Issue 1', 'Issue 2'])
+        self.assertEqual(response.data['deleted'], [])
+        self.assertTrue(response.data['has_more'])
+        response = self.changes(since=response.data['checkpoint'], limit=1)
+        self.assertEqual(response.data['issues'], [])
+        self.assertEqual(response.data['deleted'], list(IssueTombstone.objects.values_list('issue_id', flat=True)))
+        self.assertFalse(response.data['has_more'])
+
+    def test_bulk_create_assigns_sequence(self):
+        client.force_login(User.objects.get(username='first_superuser'))
+        checkpoint = self.changes().data['checkpoint']
+        user = User.objects.get(username='first_superuser')
+        payload = [{'name': f'Bulk {_i}', 'description': '...', 'creator_id': user.id,
+                    'responsible_person_id': user.id, 'state_id': State.objects.get(name='New').id,
+                    'category_id': Category.objects.get(name='Bug').id, 'created_at': '2021-09-01T12:00:00'}
+                   for _i in range(3)]
+        client.post(reverse('post_bulk_issues'), data=json.dumps(payload), content_type='application/json')
+        response = self.changes(since=checkpoint, limit=2)
+        self.assertEqual([_i['name'] for _i in response.data['issues']], ['Bulk 0', 'Bulk 1'])
+        response = self.changes(since=response.data['checkpoint'])
+        self.assertEqual([_i['name'] for _i in response.data['issues']], ['Bulk 2'])
+
+    def test_invalid_params_and_403(self):
+        client.force_login(User.objects.get(username='first_superuser'))
+        self.assertEqual(self.changes(since='x').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.changes(limit=0).status_code, status.HTTP_400_BAD_REQUEST)
+        client.force_login(User.objects.get(username='not_allowed_1'))
+        self.assertEqual(self.changes().status_code, status.HTTP_403_FORBIDDEN)
+
+
+class IssuesSearchTest(TestCase):
+    """ Full-text search of issues using API and admin """
+
+    def setUp(self):
+        State.objects.create(name='New', mark_issue_as_finished=False)
+        Category.objects.create(name='Bug')
+        User.objects.create(username='first_superuser', password='Super001', is_superuser=True, is_staff=True)
+        User.objects.create(username='not_allowed_1', password='CanDoNothing1')
+
+        user = User.objects.get(username='first_superuser')
+        for name, description in (('Přihlášení selhává', 'Po zadání hesla se stránka znovu načte'),
+                                  ('Export do CSV', 'Chybí hlavička, přihlášení funguje'),
+                                  ('Překlep v patičce', '...')):
+            Issue.objects.create(name=name, description=description, creator=user, responsible_person=user,
+                                 state=State.objects.get(name='New'), category=Category.objects.get(name='Bug'),
+                                 created_at=datetime(2021, 9, 1, 12, 0, 0))
+
+    def search(self, **params):
+        return client.get(reverse('get_issues_search'), params)
+
+    def test_search_ranked_by_prefix(self):
+        client.force_login(User.objects.get(username='first_superuser'))
+        # diacritics and case are ignored, the match in the name ranks higher
+        response = self.search(q='prihlas')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([_i['name'] for _i in response.data], ['Přihlášení selhává', 'Export do CSV'])
+        self.assertEqual([_i['name'] for _i in self.search(q='hlavi prihl').data], ['Export do CSV'])
+        self.assertEqual(self.search(q='neexistuje').data, [])
+
+    def test_search_follows_changes(self):
+        client.force_login(User.objects.get(username='first_superuser'))
+        issue = Issue.objects.get(name='Překlep v patičce')
+        client.patch(reverse('get_delete_update_issue', kwargs={'pk': issue.pk}),
+                     data={'description': 'Přihlášení v patičce'}, content_type='application/json')
+        self.assertEqual(len(self.search(q='přihlášení').data), 3)
+        Issue.objects.get(name='Export do CSV').delete()
+        self.assertEqual([_i['name'] for _i in self.search(q='přihlášení').data],
+                         ['Přihlášení selhává', 'Překlep v patičce'])
+
+    def test_search_pages(self):
+        client.force_login(User.objects.get(username='first_superuser'))
+        all_names = [_i['name'] for _i in self.search(q='p').data]
+        self.assertEqual(len(all_names), 3)
+        url, names = reverse('get_issues_search') + '?q=p&page_size=1', []
+        while url:
+            response = client.get(url)
+            self.assertEqual(len(response.data), 1)
+            names += [_i['name'] for _i in response.data]
+            url = response['Link'][1:response['Link'].index('>')] if response.has_header('Link') else None
+        self.assertEqual(names, all_names)
+
+    def test_admin_search(self):
+        client.force_login(User.objects.get(username='first_superuser'))
+        response = client.get('/admin/issues/issue/', {'q': 'PŘIHLÁŠ'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+    def test_invalid_params_and_403(self):
+        client.force_login(User.objects.get(username='first_superuser'))
+        self.assertEqual(self.search(q='  ').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.search(q='p', cursor='x').status_code, status.HTTP_400_BAD_REQUEST)
+        client.force_login(User.objects.get(username='not_allowed_1'))
+        self.assertEqual(self.search(q='p').status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AsyncReadAPITest(TestCase):
+    """ Async read-only API returns the same responses as the sync one """
+
+    def setUp(self):
+        State.objects.create(name='New', mark_issue_as_finished=False)
+        Category.objects.create(name='Bug')
+        User.objects.create(username='first_staff', password='ReadOnly001', is_staff=True)
+        User.objects.create(username='not_allowed_1', password='CanDoNothing1')
+
+        user = User.objects.get(username='first_staff')
+        for day in (1, 2, 3):
+            Issue.objects.create(name=f'Issue {day}', description='...', creator=user, responsible_person=user,
+                                 state=State.objects.get(name='New'), category=Category.objects.get(name='Bug'),
+                                 created_at=datetime(2021, 9, day, 12, 0, 0))
+
+    def test_same_responses(self):
+        client.force_login(User.objects.get(username='first_staff'))
+        issue = Issue.objects.get(name='Issue 2')
+        for sync_url, async_url in ((reverse('get_delete_update_issue', kwargs={'pk': issue.pk}),
+                                     reverse('async_get_issue', kwargs={'pk': issue.pk})),
+                                    (reverse('get_post_issues'), reverse('async_get_issues')),
+                                    (reverse('get_all_users'), reverse('async_get_all_users')),
+                                    (reverse('get_all_states'), reverse('async_get_all_states')),
+                                    (reverse('get_all_categories'), reverse('async_get_all_categories'))):
+            sync_response, async_response = client.get(sync_url), client.get(async_url)
+            self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+            self.assertEqual(async_response.content, sync_response.content)
+            for header in ('ETag', 'Last-Modified'):
+                self.assertEqual(async_response.get(header), sync_response.get(header))
+            if sync_response.get('ETag'):
+                response = client.get(async_url, HTTP_IF_NONE_MATCH=sync_response['ETag'])
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_pages_and_errors(self):
+        client.force_login(User.objects.get(username='first_staff'))
+        response = client.get(reverse('async_get_issues'), {'page_size': 2})
+        self.assertEqual([_i['name'] for _i in json.loads(response.content)], ['Issue 3', 'Issue 2'])
+        self.assertIn('rel="next"', response['Link'])
+        response = client.get(reverse('async_get_issues'), {'page_size': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(client.get(reverse('async_get_issue', kwargs={'pk': 999999})).status_code,
+                         status.HTTP_404_NOT_FOUND)
+        self.assertEqual(client.post(reverse('async_get_all_states')).status_code,
+                         status.HTTP_405_METHOD_NOT_ALLOWED)
+        client.force_login(User.objects.get(username='not_allowed_1'))
+        self.assertEqual(client.get(reverse('async_get_all_users')).status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,16 @@
+from contextlib import contextmanager
+
+from ..query_budget import record_queries, get_query_budget
+
+
+class QueryBudgetMixin:
+    """ assertQueryBudget(url_name) for TestCase: queries in the block fit the view's budget, none repeats (N+1) """
+
+    @contextmanager
+    def assertQueryBudget(self, url_name):
+        budget = get_query_budget(url_name)
+        with record_queries() as recorder:
+            yield recorder
+        if budget is not None:
+            self.assertLessEqual(recorder.count, budget, f'{url_name}: {recorder.count} queries, budget {budget}')
+        self.assertEqual(recorder.get_repeated(), [], f'{url_name}: repeated queries')
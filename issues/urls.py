@@ -1,6 +1,6 @@
 from django.conf.urls import url
 from django.urls import path
-from . import views
+from . import views, async_views
 
 
 urlpatterns = [
@@ -14,6 +14,36 @@ urlpatterns = [
         views.get_post_issues,
         name='get_post_issues'
     ),
+    url(
+        r'^api/v1/issues/bulk/$',
+        views.post_bulk_issues,
+        name='post_bulk_issues'
+    ),
+    url(
+        r'^api/v1/issues/by_ids/$',
+        views.get_issues_by_ids,
+        name='get_issues_by_ids'
+    ),
+    url(
+        r'^api/v1/issues/transition/$',
+        views.post_issues_transition,
+        name='post_issues_transition'
+    ),
+    url(
+        r'^api/v1/issues/changes/$',
+        views.get_issue_changes,
+        name='get_issue_changes'
+    ),
+    url(
+        r'^api/v1/issues/search/$',
+        views.get_issues_search,
+        name='get_issues_search'
+    ),
+    url(
+        r'^api/v1/issues/export/(?P<export_format>ndjson|csv)/$',
+        views.get_issues_export,
+        name='get_issues_export'
+    ),
     url(
         r'^api/v1/users/$',
         views.get_all_users,
@@ -29,5 +59,36 @@ urlpatterns = [
         views.get_all_categories,
         name='get_all_categories'
     ),
+    url(
+        r'^api/v1/stats/durations/$',
+        views.get_duration_stats,
+        name='get_duration_stats'
+    ),
+    url(
+        r'^api/v1/async/issues/(?P<pk>[0-9]+)/$',
+        async_views.get_issue,
+        name='async_get_issue'
+    ),
+    url(
+        r'^api/v1/async/issues/$',
+        async_views.get_issues,
+        name='async_get_issues'
+    ),
+    url(
+        r'^api/v1/async/users/$',
+        async_views.get_all_users,
+        name='async_get_all_users'
+    ),
+    url(
+        r'^api/v1/async/states/$',
+        async_views.get_all_states,
+        name='async_get_all_states'
+    ),
+    url(
+        r'^api/v1/async/categories/$',
+        async_views.get_all_categories,
+        name='async_get_all_categories'
+    ),
+    path('metrics', views.get_metrics, name='get_metrics'),
     path('', views.StartPage.as_view(), name='StartPage')
 ]
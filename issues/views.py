@@ -1,37 +1,57 @@
 from django.contrib.auth.models import User
 from django.views import View
-from django.http import HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseRedirect
+from django.views.decorators.http import condition
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from .serializers import IssueSerializer, UserSerializer, CategorySerializer, StateSerializer
-
-from .models import Issue, Category, State
-
-
-@api_view(['GET', 'DELETE', 'PUT'])
+from .conditional import (issue_etag, issue_last_modified, reference_etag, reference_last_modified,
+                          get_reference_stamp)
+from .archive import is_archive_included
+from .bulk import bulk_create_issues, bulk_transition_issues
+from .changes import get_changes, parse_checkpoint, parse_limit
+from .exceptions import IssueException
+from .export import export_issues
+from .filters import filter_issues
+from .issue_cache import issue_cache
+from .multi_get import parse_ids, find_issues
+from .metrics import render_metrics
+from .pagination import IssueKeysetPagination, IssueSearchPagination
+from .routers import replica_for_safe_methods
+from .search import is_search_available, build_match_query
+from .serializers import (IssueSerializer, IssueReadSerializer, UserReadSerializer, CategoryReadSerializer,
+                          StateReadSerializer, render_reference_data)
+from .statistics import summarize_durations, get_group
+
+from .models import Issue, Category, State, IssueStatistics, ArchivedIssue
+
+
+@api_view(['GET', 'DELETE', 'PUT', 'PATCH'])
+@condition(etag_func=issue_etag, last_modified_func=issue_last_modified)
 def get_delete_update_issue(request, pk):
+    # get details of a single issue (from cache, the entry is usually loaded by the ETag function already)
+    if request.method == 'GET':
+        entry = getattr(request, 'issue_entry', None) or issue_cache.get(pk)
+        if entry is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(entry['data'])
+
     try:
         issue = Issue.objects.get(pk=pk)
     except Issue.DoesNotExist:
         return Response(status=status.HTTP_404_NOT_FOUND)
 
-    # get details of a single issue
-    if request.method == 'GET':
-        serializer = IssueSerializer(issue)
-        return Response(serializer.data)
-
     # update details of a single issue
     if request.method == 'PUT':
         if not request.user.is_superuser:
             return Response(status=status.HTTP_403_FORBIDDEN)
         data = {
             'name': request.data.get('name', issue.name),
-            'creator_id': request.data.get('creator_id', issue.creator.id),
-            'responsible_person_id': request.data.get('responsible_person_id', issue.responsible_person.id),
+            'creator_id': request.data.get('creator_id', issue.creator_id),
+            'responsible_person_id': request.data.get('responsible_person_id', issue.responsible_person_id),
             'description': request.data.get('description', issue.description),
-            'state_id': request.data.get('state_id', issue.state.id),
-            'category_id': request.data.get('category_id', issue.category.id),
+            'state_id': request.data.get('state_id', issue.state_id),
+            'category_id': request.data.get('category_id', issue.category_id),
             'created_at': request.data.get('created_at', issue.created_at),
             'finished_at': request.data.get('finished_at', issue.finished_at)
         }
@@ -41,6 +61,16 @@ def get_delete_update_issue(request, pk):
             return Response(serializer.data, status=status.HTTP_204_NO_CONTENT)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    # update only the submitted fields of a single issue
+    if request.method == 'PATCH':
+        if not request.user.is_superuser:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+        serializer = IssueSerializer(issue, data=request.data, partial=True)
+        if serializer.is_valid():
+            serializer.save()
+            return Response(serializer.data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
     # delete a single issue
     if request.method == 'DELETE':
         if not request.user.is_superuser:
@@ -50,13 +80,20 @@ def get_delete_update_issue(request, pk):
 
 
 @api_view(['GET', 'POST'])
+@replica_for_safe_methods
 def get_post_issues(request):
 
-    # get all issues
+    # get a page of (filtered) issues (next page is linked in the <Link> header), archived ones on demand
     if request.method == 'GET':
-        issues = Issue.objects.all()
-        serializer = IssueSerializer(issues, many=True)
-        return Response(serializer.data)
+        if 'ids' in request.query_params:
+            # issues of the given ids (no filters, no pages)
+            return Response(find_issues(parse_ids(request.query_params['ids'])))
+        paginator = IssueKeysetPagination()
+        models = (Issue, ArchivedIssue) if is_archive_included(request.query_params) else (Issue, )
+        issues = [filter_issues(IssueReadSerializer.get_values(_m.objects.all()), request.query_params)
+                  for _m in models]
+        serializer = IssueReadSerializer(paginator.paginate_querysets(issues, request), many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     # insert a new record for an issue
     if request.method == 'POST':
@@ -79,28 +116,127 @@ def get_post_issues(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET', 'POST'])
+def get_issues_by_ids(request):
+    # many issues by id at once: ?ids=1,2,3 or {"ids": [1, 2, 3]} (a POST body holds thousands of ids)
+    if request.method == 'GET':
+        return Response(find_issues(parse_ids(request.query_params.get('ids'))))
+    if request.method == 'POST':
+        if not isinstance(request.data, dict):
+            raise IssueException(400, [('chyba', 'Očekáván objekt s <ids>')])
+        return Response(find_issues(parse_ids(request.data.get('ids'))))
+
+
+@api_view(['POST', ])
+def post_bulk_issues(request):
+    # insert a list of new issues at once (all or nothing)
+    if request.method == 'POST':
+        if not request.user.is_superuser:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+        issues, errors = bulk_create_issues(request.data)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'created': len(issues)}, status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST', ])
+def post_issues_transition(request):
+    # move issues given by ids or filter to a new state at once
+    if request.method == 'POST':
+        if not request.user.is_superuser:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+        return Response({'updated': bulk_transition_issues(request.data)})
+
+
+@api_view(['GET', ])
+def get_issue_changes(request):
+    # issues saved or deleted since the checkpoint <since> (all issues without it) and a checkpoint for the next call
+    if request.method == 'GET':
+        since = parse_checkpoint(request.query_params.get('since'))
+        return Response(get_changes(since, parse_limit(request.query_params.get('limit'))))
+
+
 @api_view(['GET', ])
+def get_issues_search(request):
+    # a page of issues matching all words (prefixes) of <q> in name or description, best match first
+    if request.method == 'GET':
+        text = request.query_params.get('q', '')
+        if not build_match_query(text):
+            raise IssueException(400, [('chyba', 'Zadejte hledaný text <q>')])
+        if not is_search_available():
+            raise IssueException(400, [('chyba', 'Fulltextové vyhledávání není v této databázi dostupné')])
+        models = (Issue, ArchivedIssue) if is_archive_included(request.query_params) else (Issue, )
+        paginator = IssueSearchPagination([_m._meta.db_table for _m in models])
+        ids = [_id for _id, _rank in paginator.paginate_queryset(text, request)]
+        issues = {_i['id']: _i for _m in models for _i in IssueReadSerializer.get_values(_m.objects.filter(pk__in=ids))}
+        serializer = IssueReadSerializer([issues[_id] for _id in ids if _id in issues], many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+@api_view(['GET', ])
+@replica_for_safe_methods
+def get_issues_export(request, export_format):
+    # stream all (filtered) issues as NDJSON or CSV
+    if request.method == 'GET':
+        return export_issues(filter_issues(Issue.objects.all(), request.query_params), export_format)
+
+
+def reference_data_response(request, serializer_class):
+    if request.accepted_renderer.format != 'json':
+        # e.g. the browsable API renders the data itself
+        model = serializer_class.serializer_class.Meta.model
+        return Response(serializer_class(serializer_class.get_values(model.objects.all()), many=True).data)
+    # pre-rendered JSON of the version given by the ETag
+    version = get_reference_stamp(request, serializer_class.serializer_class.Meta.model)[0]
+    return HttpResponse(render_reference_data(serializer_class, version), content_type='application/json')
+
+
+@api_view(['GET', ])
+@condition(etag_func=reference_etag(User), last_modified_func=reference_last_modified(User))
+@replica_for_safe_methods
 def get_all_users(request):
     if request.method == 'GET':
-        users = User.objects.all()
-        serializer = UserSerializer(users, many=True)
-        return Response(serializer.data)
+        return reference_data_response(request, UserReadSerializer)
 
 
 @api_view(['GET', ])
+@condition(etag_func=reference_etag(State), last_modified_func=reference_last_modified(State))
+@replica_for_safe_methods
 def get_all_states(request):
     if request.method == 'GET':
-        states = State.objects.all()
-        serializer = StateSerializer(states, many=True)
-        return Response(serializer.data)
+        return reference_data_response(request, StateReadSerializer)
 
 
 @api_view(['GET', ])
+@condition(etag_func=reference_etag(Category), last_modified_func=reference_last_modified(Category))
+@replica_for_safe_methods
 def get_all_categories(request):
     if request.method == 'GET':
-        categories = Category.objects.all()
-        serializer = CategorySerializer(categories, many=True)
-        return Response(serializer.data)
+        return reference_data_response(request, CategoryReadSerializer)
+
+
+@api_view(['GET', ])
+def get_duration_stats(request):
+    if request.method == 'GET':
+        # durations of given categories or responsible persons (ids separated by comma) are merged together
+        dimensions = [_d for _d in (IssueStatistics.CATEGORY, IssueStatistics.RESPONSIBLE_PERSON)
+                      if request.query_params.get(_d)]
+        if len(dimensions) > 1:
+            raise IssueException(400, [('chyba', 'Statistiky lze filtrovat pouze podle kategorie nebo řešitele')])
+        if not dimensions:
+            return Response(summarize_durations([IssueStatistics.TOTAL]))
+        try:
+            object_ids = [int(_id) for _id in request.query_params[dimensions[0]].split(',')]
+        except ValueError:
+            raise IssueException(400, [('chyba', f'<{dimensions[0]}>: neplatný seznam ID')])
+        return Response(summarize_durations([get_group(dimensions[0], _id) for _id in object_ids]))
+
+
+def get_metrics(request):
+    # Prometheus text format, staff only (plain Django view => the scraper may use a session or basic auth proxy)
+    if not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponse(status=status.HTTP_403_FORBIDDEN)
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 class StartPage(View):
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 
@@ -49,6 +50,8 @@ REST_FRAMEWORK = {
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'issues.middleware.MetricsMiddleware',
+    'issues.middleware.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -56,6 +59,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.middleware.locale.LocaleMiddleware',
+    'issues.middleware.ReplicaStickinessMiddleware',
 ]
 
 ROOT_URLCONF = 'tracker.urls'
@@ -89,6 +93,37 @@ DATABASES = {
     }
 }
 
+# Optional read replica (e.g. TRACKER_REPLICA_DB=/path/to/replica.sqlite3), read-only views read from it
+if os.environ.get('TRACKER_REPLICA_DB'):
+    DATABASES['replica'] = {
+        'ENGINE': os.environ.get('TRACKER_REPLICA_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': os.environ['TRACKER_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['issues.routers.ReadReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+# TRACKER_CACHE=file (with TRACKER_CACHE_DIR) shares the cache by all processes on the host, the default local
+# memory cache is per process (the issue cache is then off, see ISSUES_ISSUE_CACHE)
+if os.environ.get('TRACKER_CACHE') == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('TRACKER_CACHE_DIR', str(BASE_DIR / 'cache')),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -133,13 +168,16 @@ STATIC_URL = '/static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Records are written by a background thread (issues.log.QueueListenerHandler), request threads never wait on I/O.
+# Only a sample of slow SQL queries of requests is logged by the 'issues.sql' logger (ISSUES_SLOW_SQL_SECONDS,
+# ISSUES_SLOW_SQL_SAMPLE_RATE below), the per-query log of django.db.backends (DEBUG mode only) is off.
+# Console and file get the same JSON lines (issues.log.JsonFormatter).
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': True,
     'formatters': {
-        'standard': {
-            'format': "[%(asctime)s] %(levelname)s [%(name)s:%(lineno)s] %(message)s",
-            'datefmt': "%d/%b/%Y %H:%M:%S"
+        'json': {
+            '()': 'issues.log.JsonFormatter',
         },
     },
     'handlers': {
@@ -151,30 +189,111 @@ LOGGING = {
             'level': 'DEBUG',
             'class': 'logging.handlers.RotatingFileHandler',
             'filename': str(BASE_DIR) + "/logs/logfile",
-            'maxBytes': 50000,
-            'backupCount': 2,
-            'formatter': 'standard',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'json',
         },
         'console': {
             'level': 'INFO',
             'class': 'logging.StreamHandler',
-            'formatter': 'standard'
+            'formatter': 'json'
+        },
+        'queue': {
+            'level': 'DEBUG',
+            'class': 'issues.log.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console', 'cfg://handlers.logfile'],
         },
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'logfile'],
+            'handlers': ['queue'],
             'propagate': True,
             'level': 'WARNING',
         },
         'django.db.backends': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
+            'handlers': ['queue'],
+            'level': 'INFO',
             'propagate': False,
         },
         'issues': {
-            'handlers': ['console', 'logfile'],
+            'handlers': ['queue'],
             'level': 'DEBUG',
         },
     }
 }
+
+
+# Issues tracker
+
+# Issues list API: default and max. number of issues on one page (?page_size=)
+ISSUES_PAGE_SIZE = 100
+ISSUES_MAX_PAGE_SIZE = 1000
+
+# Max. number of issues in one request of the bulk API (a transition of more issues is refused, they share
+# a change sequence number => keep it at most ISSUES_MAX_PAGE_SIZE)
+ISSUES_BULK_MAX_SIZE = 1000
+
+# Max. number of ids in one request of the multi-get API
+ISSUES_MULTI_GET_MAX_SIZE = 5000
+
+# Max. number of users, states and categories (each) kept in the in-process reference cache
+ISSUES_REFERENCE_CACHE_SIZE = 1000
+
+# Other processes drop their cached users, states and categories at most this many seconds after a change
+ISSUES_REFERENCE_VERSION_CHECK_SECONDS = 1
+
+# Seconds for which the pre-rendered responses of users, states and categories are cached (per version)
+ISSUES_REFERENCE_RESPONSE_TIMEOUT = 24 * 3600
+
+# Cache of single issues: True / False, None = only when the default cache is shared by processes (not local memory)
+ISSUES_ISSUE_CACHE = None
+
+# Seconds for which the responses of single issues are cached (writes invalidate them earlier)
+ISSUES_ISSUE_CACHE_TIMEOUT = 3600
+
+# Seconds for which the duration statistics in the admin header are cached
+ISSUES_STATISTICS_CACHE_TIMEOUT = 60
+
+# DATABASES alias of the read replica (None = everything goes to the default database)
+ISSUES_READ_REPLICA = 'replica' if 'replica' in DATABASES else None
+
+# Seconds for which a client reads from the primary database after it has written something (replica lag)
+ISSUES_REPLICA_STICKY_SECONDS = 5
+
+# Issues finished more than this number of days ago are moved to the archive (archive_issues command),
+# this many issues in one transaction
+ISSUES_ARCHIVE_AFTER_DAYS = 365
+ISSUES_ARCHIVE_BATCH_SIZE = 1000
+
+# Max. number of SQL queries of one request per URL name (a warning is logged when exceeded, see
+# issues.middleware.QueryBudgetMiddleware), the default applies to other views (None = unlimited).
+# get_issues_export has none: its single query of rows runs while the response streams, after the middleware.
+ISSUES_QUERY_BUDGETS = {
+    'get_delete_update_issue': 15,
+    'get_post_issues': 12,
+    'get_issues_by_ids': 15,
+    'post_bulk_issues': 15,
+    'post_issues_transition': 20,
+    'get_issue_changes': 8,
+    'get_issues_search': 6,
+    'get_all_users': 4,
+    'get_all_states': 4,
+    'get_all_categories': 4,
+    'get_duration_stats': 4,
+    'async_get_issue': 4,
+    'async_get_issues': 4,
+    'async_get_all_users': 4,
+    'async_get_all_states': 4,
+    'async_get_all_categories': 4,
+}
+ISSUES_QUERY_BUDGET_DEFAULT = 50
+
+# The same query run this many times in one request is logged as a possible N+1
+ISSUES_QUERY_REPEAT_THRESHOLD = 5
+
+# Query count, time and max. repetition in X-Query-* response headers
+ISSUES_QUERY_DEBUG_HEADERS = DEBUG
+
+# SQL queries of requests taking at least this many seconds are logged, this fraction of them
+ISSUES_SLOW_SQL_SECONDS = 0.1
+ISSUES_SLOW_SQL_SAMPLE_RATE = 0.1